@@ -1,6 +1,10 @@
 """BRAINIAX init file."""
 import logging
 import os
+import time
+
+# Start of the boot, the server logs how long it took once the app is created
+BOOT_START_TIME = time.perf_counter()
 
 ROOT_LOG_LEVEL = "INFO"
 
@@ -0,0 +1,133 @@
+"""Measure the memory and recall effect of the Qdrant collection settings.
+
+Run `python -m brainiax.benchmark_vector_store` against a filled collection. Stored
+vectors are used as queries, their exact neighbors (a full scan of the original
+vectors) are compared with the results of the configured search (quantization,
+rescore, oversampling), and with the quantized vectors alone.
+"""
+import argparse
+import logging
+import math
+import statistics
+import time
+
+from qdrant_client.http import models as rest  # type: ignore
+
+from brainiax.components.vector_store.qdrant_vector_store import (
+    QdrantCollectionConfig,
+)
+from brainiax.components.vector_store.vector_store_component import (
+    VectorStoreComponent,
+)
+from brainiax.di import global_injector
+from brainiax.settings.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+_FLOAT32_BYTES = 4
+
+
+def _vectors_memory(collection: rest.CollectionInfo) -> dict[str, float]:
+    """Estimated size in MB of the original and quantized vectors of a collection."""
+    vectors = collection.config.params.vectors
+    assert isinstance(vectors, rest.VectorParams), "Named vectors are not supported"
+    count = collection.points_count or 0
+    memory = {"original": count * vectors.size * _FLOAT32_BYTES}
+    match collection.config.quantization_config:
+        case rest.ScalarQuantization():
+            memory["quantized"] = count * vectors.size
+        case rest.BinaryQuantization():
+            memory["quantized"] = count * math.ceil(vectors.size / 8)
+    return {name: size / 1024 / 1024 for name, size in memory.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m brainiax.benchmark_vector_store")
+    parser.add_argument(
+        "--queries", type=int, default=100, help="Number of vectors used as queries"
+    )
+    parser.add_argument(
+        "--limit", type=int, default=10, help="Number of neighbors of each query"
+    )
+    parser.add_argument(
+        "--collection",
+        help="Collection of documents to use, by default the default collection",
+    )
+    args = parser.parse_args()
+
+    settings = global_injector.get(Settings)
+    if settings.vectorstore.database != "qdrant":
+        raise SystemExit("Only the Qdrant vector store can be benchmarked")
+    vector_store = global_injector.get(VectorStoreComponent).get_vector_store(
+        args.collection
+    )
+    client = vector_store.client
+    collection_name = vector_store.collection_name
+    collection = client.get_collection(collection_name)
+
+    points, _ = client.scroll(
+        collection_name, limit=args.queries, with_payload=False, with_vectors=True
+    )
+    if not points:
+        raise SystemExit(f"The collection {collection_name} is empty")
+    queries = [point.vector for point in points]
+
+    def search(params: rest.SearchParams | None) -> tuple[list[set[str]], float]:
+        results = []
+        start = time.perf_counter()
+        for query in queries:
+            hits = client.search(
+                collection_name, query, limit=args.limit, search_params=params
+            )
+            results.append({str(hit.id) for hit in hits})
+        return results, (time.perf_counter() - start) / len(queries) * 1000
+
+    exact, exact_latency = search(
+        rest.SearchParams(
+            exact=True, quantization=rest.QuantizationSearchParams(ignore=True)
+        )
+    )
+
+    def report(name: str, params: rest.SearchParams | None) -> None:
+        results, latency = search(params)
+        recall = statistics.mean(
+            len(result & truth) / len(truth)
+            for result, truth in zip(results, exact, strict=True)
+            if truth
+        )
+        logger.info(
+            "search=%s recall@%s=%.3f latency=%.2fms", name, args.limit, recall, latency
+        )
+
+    logger.info(
+        "collection=%s points=%s quantization=%s",
+        collection_name,
+        collection.points_count,
+        type(collection.config.quantization_config).__name__
+        if collection.config.quantization_config
+        else None,
+    )
+    for name, size in _vectors_memory(collection).items():
+        logger.info("vectors=%s estimated_size=%.1fMB", name, size)
+    logger.info("search=exact latency=%.2fms", exact_latency)
+
+    searches: dict[str, rest.SearchParams | None] = {
+        "configured": (
+            QdrantCollectionConfig.from_settings(settings.qdrant).search_params
+            if settings.qdrant
+            else None
+        ),
+        "original_vectors": rest.SearchParams(
+            quantization=rest.QuantizationSearchParams(ignore=True)
+        ),
+    }
+    if collection.config.quantization_config is not None:
+        searches["quantized_without_rescore"] = rest.SearchParams(
+            quantization=rest.QuantizationSearchParams(rescore=False)
+        )
+    for name, params in searches.items():
+        report(name, params)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import logging
+import math
+
+import requests
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.embeddings.ollama import OllamaEmbedding  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+def _l2_normalized(embedding: list[float]) -> list[float]:
+    norm = math.sqrt(sum(value * value for value in embedding))
+    if not norm:
+        return embedding
+    return [value / norm for value in embedding]
+
+
+def _error_detail(response: requests.Response) -> str | None:
+    """Error message of a JSON error response, None if the body is not JSON."""
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    return body.get("error") if isinstance(body, dict) else None
+
+
+class BatchedOllamaEmbedding(OllamaEmbedding):
+    """Ollama embedding model sending a whole batch of texts in a single request.
+
+    `OllamaEmbedding` makes one `/api/embeddings` call per text, so on CPU-only
+    servers the per-request overhead dominates the ingestion time. This class uses
+    the `/api/embed` endpoint (Ollama >= 0.3.0), which accepts a list of inputs, and
+    falls back to one request per text when the server does not support it.
+
+    `/api/embed` returns L2-normalized vectors, so the ones of the fallback are
+    normalized too: queries and texts are embedded at the same scale either way.
+    """
+
+    _batch_endpoint_available: bool = PrivateAttr(default=True)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "BatchedOllamaEmbedding"
+
+    def get_general_text_embedding(self, prompt: str) -> list[float]:
+        return self._embed([prompt])[0]
+
+    def _get_text_embeddings(self, texts: list[str]) -> list[list[float]]:
+        return self._embed(texts)
+
+    def _embed(self, texts: list[str]) -> list[list[float]]:
+        if self._batch_endpoint_available:
+            response = requests.post(
+                url=f"{self.base_url}/api/embed",
+                headers={"Content-Type": "application/json"},
+                json={
+                    "model": self.model_name,
+                    "input": texts,
+                    "options": self.ollama_additional_kwargs,
+                },
+            )
+            response.encoding = "utf-8"
+            if response.status_code == 200:
+                embeddings: list[list[float]] = response.json()["embeddings"]
+                return embeddings
+            # An unknown route is answered with a plain text 404, while a missing
+            # model is a 404 with a JSON error: only the first one means that the
+            # endpoint is not supported
+            error = _error_detail(response)
+            if response.status_code != 404 or error is not None:
+                raise ValueError(
+                    f"Ollama call failed with status code {response.status_code}."
+                    f" Details: {error}"
+                )
+            logger.warning(
+                "Ollama server at %s does not support batched embeddings, "
+                "falling back to one request per text",
+                self.base_url,
+            )
+            self._batch_endpoint_available = False
+        embed_one = super().get_general_text_embedding
+        return [_l2_normalized(embed_one(text)) for text in texts]
@@ -0,0 +1,217 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+from array import array
+from pathlib import Path
+from typing import Any
+
+from llama_index.core.base.embeddings.base import BaseEmbedding, Embedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """On-disk LRU cache of embeddings, stored in a SQLite database.
+
+    Entries are keyed by a hash of the model name and of the embedded text, and
+    the least recently used ones are evicted once more than `max_entries` are
+    stored. Vectors are stored as float32, the precision used by the vector store.
+    This class is thread-safe.
+    """
+
+    def __init__(self, path: Path, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                embedding BLOB NOT NULL,
+                last_used INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used);
+            """
+        )
+        self._count, last_used = self._connection.execute(
+            "SELECT COUNT(*), COALESCE(MAX(last_used), 0) FROM embeddings"
+        ).fetchone()
+        # Logical clock ordering the accesses, cheaper and more reliable than time
+        self._clock: int = last_used
+
+    @staticmethod
+    def key(model_name: str, kind: str, text: str) -> str:
+        return hashlib.sha256(f"{model_name}\0{kind}\0{text}".encode()).hexdigest()
+
+    def get_many(self, keys: list[str]) -> dict[str, Embedding]:
+        """Get the cached embeddings of the given keys, missing keys are omitted."""
+        found: dict[str, Embedding] = {}
+        with self._lock:
+            # Stay under the SQLite limit of variables per statement
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                rows = self._connection.execute(
+                    f"SELECT key, embedding FROM embeddings "
+                    f"WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            if found:
+                self._clock += 1
+                self._connection.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(self._clock, key) for key in found],
+                )
+                self._connection.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, embeddings: dict[str, Embedding]) -> None:
+        if not embeddings:
+            return
+        with self._lock:
+            self._clock += 1
+            cursor = self._connection.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, embedding, last_used) "
+                "VALUES (?, ?, ?)",
+                [
+                    (key, array("f", embedding).tobytes(), self._clock)
+                    for key, embedding in embeddings.items()
+                ],
+            )
+            self._count += cursor.rowcount
+            if self._count > self.max_entries:
+                evicted = self._connection.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (self._count - self.max_entries,),
+                ).rowcount
+                self._count -= evicted
+                logger.debug("Evicted count=%s embeddings from the cache", evicted)
+            self._connection.commit()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self._count,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class CachedEmbedding(BaseEmbedding):
+    """Embedding model answering from an `EmbeddingCache` before calling the model.
+
+    Only the texts missing from the cache are sent to the wrapped model, in a
+    single batch. Query and text embeddings are cached separately, as some models
+    embed them differently.
+    """
+
+    _embedding_model: BaseEmbedding = PrivateAttr()
+    _cache: EmbeddingCache = PrivateAttr()
+
+    def __init__(self, embedding_model: BaseEmbedding, cache: EmbeddingCache) -> None:
+        super().__init__(
+            model_name=embedding_model.model_name,
+            embed_batch_size=embedding_model.embed_batch_size,
+            callback_manager=embedding_model.callback_manager,
+        )
+        self._embedding_model = embedding_model
+        self._cache = cache
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    @property
+    def cache(self) -> EmbeddingCache:
+        return self._cache
+
+    def _keys(self, kind: str, texts: list[str]) -> list[str]:
+        return [EmbeddingCache.key(self.model_name, kind, text) for text in texts]
+
+    def _merge(
+        self,
+        keys: list[str],
+        cached: dict[str, Embedding],
+        missing_keys: list[str],
+        computed: list[Embedding],
+    ) -> list[Embedding]:
+        new_embeddings = dict(zip(missing_keys, computed, strict=True))
+        self._cache.put_many(new_embeddings)
+        return [cached[key] if key in cached else new_embeddings[key] for key in keys]
+
+    def _get_embeddings(self, kind: str, texts: list[str]) -> list[Embedding]:
+        keys = self._keys(kind, texts)
+        cached = self._cache.get_many(keys)
+        # dict.fromkeys: embed a text repeated in the batch only once
+        missing = dict.fromkeys(
+            (key, text) for key, text in zip(keys, texts, strict=True) if key not in cached
+        )
+        missing_keys = [key for key, _ in missing]
+        missing_texts = [text for _, text in missing]
+        computed: list[Embedding] = []
+        if missing_texts:
+            if kind == "query":
+                computed = [
+                    self._embedding_model._get_query_embedding(text)
+                    for text in missing_texts
+                ]
+            else:
+                computed = self._embedding_model._get_text_embeddings(missing_texts)
+        return self._merge(keys, cached, missing_keys, computed)
+
+    async def _aget_embeddings(self, kind: str, texts: list[str]) -> list[Embedding]:
+        keys = self._keys(kind, texts)
+        cached = self._cache.get_many(keys)
+        missing = dict.fromkeys(
+            (key, text) for key, text in zip(keys, texts, strict=True) if key not in cached
+        )
+        missing_keys = [key for key, _ in missing]
+        missing_texts = [text for _, text in missing]
+        computed: list[Embedding] = []
+        if missing_texts:
+            if kind == "query":
+                computed = [
+                    await self._embedding_model._aget_query_embedding(text)
+                    for text in missing_texts
+                ]
+            else:
+                computed = await self._embedding_model._aget_text_embeddings(
+                    missing_texts
+                )
+        return self._merge(keys, cached, missing_keys, computed)
+
+    def _get_query_embedding(self, query: str) -> Embedding:
+        return self._get_embeddings("query", [query])[0]
+
+    async def _aget_query_embedding(self, query: str) -> Embedding:
+        return (await self._aget_embeddings("query", [query]))[0]
+
+    def _get_text_embedding(self, text: str) -> Embedding:
+        return self._get_embeddings("text", [text])[0]
+
+    async def _aget_text_embedding(self, text: str) -> Embedding:
+        return (await self._aget_embeddings("text", [text]))[0]
+
+    def _get_text_embeddings(self, texts: list[str]) -> list[Embedding]:
+        return self._get_embeddings("text", texts)
+
+    async def _aget_text_embeddings(self, texts: list[str]) -> list[Embedding]:
+        return await self._aget_embeddings("text", texts)
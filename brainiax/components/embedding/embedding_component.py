@@ -1,8 +1,14 @@
+import asyncio
 import logging
 
 from injector import inject, singleton
 from llama_index.core.embeddings import BaseEmbedding, MockEmbedding
-from brainiax.paths import models_cache_path
+
+from brainiax.components.embedding.embedding_cache import (
+    CachedEmbedding,
+    EmbeddingCache,
+)
+from brainiax.paths import local_data_path, models_cache_path
 from brainiax.settings.settings import Settings
 
 logger = logging.getLogger(__name__)
@@ -25,14 +31,47 @@ class EmbeddingComponent:
         logger.info(f"Initializing the embedding model in mode={embedding_mode}")
 
         try:
-            from llama_index.embeddings.ollama import OllamaEmbedding  # type: ignore
+            from brainiax.components.embedding.batched_ollama_embedding import (
+                BatchedOllamaEmbedding,
+            )
         except ImportError as e:
             raise ImportError(
                 "Local dependencies not found, install with `poetry install --extras embeddings-ollama`"
             ) from e
 
         ollama_settings = settings.ollama
-        self.embedding_model = OllamaEmbedding(
+        self.embedding_model = BatchedOllamaEmbedding(
             model_name=ollama_settings.embedding_model,
             base_url=ollama_settings.api_base,
+            embed_batch_size=settings.embedding.embed_batch_size,
         )
+
+        if settings.embedding.cache_max_entries > 0:
+            logger.info(
+                "Caching up to count=%s embeddings",
+                settings.embedding.cache_max_entries,
+            )
+            self.embedding_model = CachedEmbedding(
+                self.embedding_model,
+                EmbeddingCache(
+                    local_data_path / "embedding_cache.sqlite3",
+                    max_entries=settings.embedding.cache_max_entries,
+                ),
+            )
+
+    @property
+    def embedding_cache(self) -> EmbeddingCache | None:
+        """On-disk cache of the embeddings, None if disabled."""
+        if isinstance(self.embedding_model, CachedEmbedding):
+            return self.embedding_model.cache
+        return None
+
+    async def aembed_query(self, query: str) -> list[float]:
+        """
+        Embeds a query in a worker thread.
+
+        The embedding model and its cache make blocking calls, which would hold up
+        the other requests served by the event loop.
+        """
+
+        return await asyncio.to_thread(self.embedding_model.get_query_embedding, query)
@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+
+from injector import inject, singleton
+from llama_index.core.indices import VectorStoreIndex
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.storage import StorageContext
+
+from brainiax.components.embedding.embedding_component import EmbeddingComponent
+from brainiax.components.index.retrieval_cache import (
+    CachedRetriever,
+    IndexGeneration,
+    RetrievalCache,
+)
+from brainiax.components.llm.llm_component import LLMComponent
+from brainiax.components.node_store.node_store_component import NodeStoreComponent
+from brainiax.components.sparse_index.hybrid_retriever import HybridRetriever
+from brainiax.components.sparse_index.sparse_index_component import (
+    SparseIndexComponent,
+)
+from brainiax.components.vector_store.vector_store_component import (
+    VectorStoreComponent,
+    context_metadata_filters,
+)
+from brainiax.open_ai.extensions.context_filter import ContextFilter
+from brainiax.settings.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+@singleton
+class IndexComponent:
+    """
+    Storage contexts and retrieval indexes of the collections, shared by the services.
+
+    They are built on first use and cached per collection, so the stores are not
+    loaded when the server boots, and only once for all the services using them.
+    """
+
+    @inject
+    def __init__(
+        self,
+        settings: Settings,
+        llm_component: LLMComponent,
+        vector_store_component: VectorStoreComponent,
+        embedding_component: EmbeddingComponent,
+        node_store_component: NodeStoreComponent,
+        sparse_index_component: SparseIndexComponent,
+    ) -> None:
+        self.settings = settings
+        self.llm_component = llm_component
+        self.vector_store_component = vector_store_component
+        self.embedding_component = embedding_component
+        self.node_store_component = node_store_component
+        self.sparse_index_component = sparse_index_component
+        self._storage_contexts: dict[str, StorageContext] = {}
+        self._indexes: dict[str, VectorStoreIndex] = {}
+        self._generations: dict[str, IndexGeneration] = {}
+        self.retrieval_cache = RetrievalCache(settings.rag.cache_max_entries)
+        self._lock = threading.RLock()
+
+    @property
+    def storage_context(self) -> StorageContext:
+        return self.get_storage_context()
+
+    @property
+    def index(self) -> VectorStoreIndex:
+        return self.get_index()
+
+    def get_storage_context(self, collection: str | None = None) -> StorageContext:
+        """Storage context of a collection, the default one if not given."""
+        collection = collection or self.settings.vectorstore.default_collection
+        storage_context = self._storage_contexts.get(collection)
+        if storage_context is None:
+            with self._lock:
+                storage_context = self._storage_contexts.get(collection)
+                if storage_context is None:
+                    doc_store, index_store = self.node_store_component.get_stores(
+                        collection
+                    )
+                    storage_context = StorageContext.from_defaults(
+                        vector_store=self.vector_store_component.get_vector_store(
+                            collection
+                        ),
+                        docstore=doc_store,
+                        index_store=index_store,
+                    )
+                    self._storage_contexts[collection] = storage_context
+        return storage_context
+
+    def get_index(self, collection: str | None = None) -> VectorStoreIndex:
+        """Index querying the vector store of a collection, nodes are not loaded."""
+        collection = collection or self.settings.vectorstore.default_collection
+        index = self._indexes.get(collection)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(collection)
+                if index is None:
+                    start = time.perf_counter()
+                    storage_context = self.get_storage_context(collection)
+                    index = VectorStoreIndex.from_vector_store(
+                        storage_context.vector_store,
+                        storage_context=storage_context,
+                        llm=self.llm_component.llm,
+                        embed_model=self.embedding_component.embedding_model,
+                        show_progress=True,
+                    )
+                    self._indexes[collection] = index
+                    logger.info(
+                        "Loaded the retrieval index of collection=%s in %.2fs",
+                        collection,
+                        time.perf_counter() - start,
+                    )
+        return index
+
+    def get_generation(self, collection: str | None = None) -> IndexGeneration:
+        """Generation of the index of a collection, bumped by its ingest component."""
+        collection = collection or self.settings.vectorstore.default_collection
+        with self._lock:
+            return self._generations.setdefault(collection, IndexGeneration())
+
+    def get_retriever(
+        self,
+        collection: str | None = None,
+        context_filter: ContextFilter | None = None,
+        similarity_top_k: int = 2,
+        similarity_cutoff: float | None = None,
+    ) -> BaseRetriever:
+        """Retriever of the chunks of a collection, hybrid if `rag.hybrid.enabled`.
+
+        Its results are cached in `retrieval_cache` until the collection changes.
+        Async retrievals embed the query themselves, in a worker thread.
+        `similarity_cutoff` is applied by the hybrid retriever only, before the
+        fusion; the results of a vector retriever are filtered by the caller.
+        """
+        collection = collection or self.settings.vectorstore.default_collection
+        index = self.get_index(collection)
+        hybrid = self.settings.rag.hybrid
+        retriever: BaseRetriever
+        if not hybrid.enabled:
+            retriever = self.vector_store_component.get_retriever(
+                index=index,
+                context_filter=context_filter,
+                similarity_top_k=similarity_top_k,
+            )
+        else:
+            candidates = max(similarity_top_k, hybrid.candidates)
+            retriever = HybridRetriever(
+                vector_retriever=self.vector_store_component.get_retriever(
+                    index=index,
+                    context_filter=context_filter,
+                    similarity_top_k=candidates,
+                ),
+                bm25_index=self.sparse_index_component.get_index(collection),
+                docstore=self.get_storage_context(collection).docstore,
+                executor=self.sparse_index_component.executor,
+                similarity_top_k=similarity_top_k,
+                candidates=candidates,
+                alpha=hybrid.alpha,
+                filters=context_metadata_filters(context_filter),
+                similarity_cutoff=similarity_cutoff,
+            )
+
+        return CachedRetriever(
+            retriever,
+            cache=self.retrieval_cache,
+            key=(
+                collection,
+                context_filter.model_dump_json() if context_filter else None,
+                similarity_top_k,
+                similarity_cutoff if hybrid.enabled else None,
+            ),
+            generation=self.get_generation(collection),
+            docstore=self.get_storage_context(collection).docstore,
+            aembed_query=self.embedding_component.aembed_query,
+        )
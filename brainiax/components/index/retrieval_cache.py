@@ -0,0 +1,154 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from typing import Any
+
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle
+from llama_index.core.storage.docstore import BaseDocumentStore
+
+
+class IndexGeneration:
+    """Version of the nodes of an index, bumped by every change of them.
+
+    The results cached for a generation are not used once it is bumped.
+    """
+
+    def __init__(self) -> None:
+        self._value = 0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def bump(self) -> None:
+        with self._lock:
+            self._value += 1
+
+
+@dataclass
+class _CachedRetrieval:
+    nodes: list[tuple[str, float | None]]
+    # Seconds taken by the retrieval, saved by each hit
+    latency: float
+
+
+class RetrievalCache:
+    """In-memory LRU cache of the ids and scores of the nodes retrieved for a query.
+
+    The least recently used entries are evicted once more than `max_entries` are
+    stored, 0 disables the cache. This class is thread-safe.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._entries: OrderedDict[Hashable, _CachedRetrieval] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> list[tuple[str, float | None]] | None:
+        if not self.max_entries:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += entry.latency
+            return entry.nodes
+
+    def put(self, key: Hashable, nodes: list[NodeWithScore], latency: float) -> None:
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._entries[key] = _CachedRetrieval(
+                [(node.node_id, node.score) for node in nodes], latency
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_seconds": self.saved_seconds,
+            }
+
+
+class CachedRetriever(BaseRetriever):
+    """Answers from a `RetrievalCache` before embedding the query and searching.
+
+    Entries are keyed by the query, the `key` of the retriever (collection, filter
+    and top k) and the generation of the index, so changing the index invalidates
+    them. The cached nodes are read from the doc store. Async retrievals embed
+    the query with `aembed_query` on a miss only.
+    """
+
+    def __init__(
+        self,
+        retriever: BaseRetriever,
+        cache: RetrievalCache,
+        key: Hashable,
+        generation: IndexGeneration,
+        docstore: BaseDocumentStore,
+        aembed_query: Callable[[str], Awaitable[list[float]]],
+    ) -> None:
+        super().__init__()
+        self._retriever = retriever
+        self._cache = cache
+        self._key = key
+        self._generation = generation
+        self._docstore = docstore
+        self._aembed_query = aembed_query
+
+    def _cache_key(self, query_bundle: QueryBundle) -> Hashable:
+        return (self._key, self._generation.value, query_bundle.query_str)
+
+    def _cached_nodes(self, key: Hashable) -> list[NodeWithScore] | None:
+        cached = self._cache.get(key)
+        if cached is None:
+            return None
+        nodes = []
+        for node_id, score in cached:
+            node = self._docstore.get_document(node_id, raise_error=False)
+            if node is None:
+                return None
+            nodes.append(NodeWithScore(node=node, score=score))
+        return nodes
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        key = self._cache_key(query_bundle)
+        nodes = self._cached_nodes(key)
+        if nodes is None:
+            start = time.perf_counter()
+            nodes = self._retriever.retrieve(query_bundle)
+            self._cache.put(key, nodes, time.perf_counter() - start)
+        return nodes
+
+    async def _aretrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        key = self._cache_key(query_bundle)
+        nodes = await asyncio.to_thread(self._cached_nodes, key)
+        if nodes is None:
+            start = time.perf_counter()
+            if query_bundle.embedding is None:
+                query_bundle = QueryBundle(
+                    query_bundle.query_str,
+                    embedding=await self._aembed_query(query_bundle.query_str),
+                )
+            nodes = await self._retriever.aretrieve(query_bundle)
+            self._cache.put(key, nodes, time.perf_counter() - start)
+        return nodes
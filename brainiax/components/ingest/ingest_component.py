@@ -1,8 +1,14 @@
 import abc
 import logging
+import multiprocessing
+import multiprocessing.pool
+import queue
 import threading
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Literal
 
 from llama_index.core.data_structs import IndexDict
 from llama_index.core.embeddings.utils import EmbedType
@@ -11,13 +17,36 @@ from llama_index.core.indices.base import BaseIndex
 from llama_index.core.ingestion import run_transformations
 from llama_index.core.schema import BaseNode, Document, TransformComponent
 from llama_index.core.storage import StorageContext
+from llama_index.core.storage.docstore import BaseDocumentStore
+from llama_index.core.storage.docstore.keyval_docstore import KVDocumentStore
+from llama_index.core.vector_stores.types import VectorStore
 
+from brainiax.components.index.retrieval_cache import IndexGeneration
 from brainiax.components.ingest.ingest_helper import IngestionHelper
+from brainiax.components.ingest.persist_scheduler import (
+    PersistCallback,
+    PersistScheduler,
+    persist_storage_context_atomically,
+)
+from brainiax.components.node_store.sqlite_store import SQLiteKVStore
+from brainiax.components.sparse_index.bm25_index import BM25Index
 from brainiax.paths import local_data_path
 from brainiax.settings.settings import Settings
 
 logger = logging.getLogger(__name__)
 
+IngestStep = Literal["parsed", "embedded", "indexed", "persisted", "persist_failed"]
+
+IngestProgressCallback = Callable[[IngestStep, int], None]
+"""Notified of the ingestion steps of a file, with the count of documents or nodes.
+
+`parsed` is sent with the number of documents the file was transformed into,
+`embedded` with the number of nodes embedded (possibly several times), `indexed`
+once the documents are searchable, and `persisted` once they are saved to disk,
+or `persist_failed` if the persist including them failed.
+"""
+
+
 class BaseIngestComponent(abc.ABC):
     def __init__(
         self,
@@ -33,7 +62,12 @@ class BaseIngestComponent(abc.ABC):
         self.transformations = transformations
 
     @abc.abstractmethod
-    def ingest(self, file_name: str, file_data: Path) -> list[Document]:
+    def ingest(
+        self,
+        file_name: str,
+        file_data: Path,
+        progress: IngestProgressCallback | None = None,
+    ) -> list[Document]:
         pass
 
     @abc.abstractmethod
@@ -44,6 +78,20 @@ class BaseIngestComponent(abc.ABC):
     def delete(self, doc_id: str) -> None:
         pass
 
+    @abc.abstractmethod
+    def bulk_delete(self, doc_ids: list[str]) -> list[str]:
+        pass
+
+    @abc.abstractmethod
+    def reset(self) -> None:
+        pass
+
+    def flush(self) -> None:
+        """Persist the pending changes of the stores right away."""
+
+    def close(self) -> None:
+        """Release the resources held by the component (workers, pools...)."""
+
 
 class BaseIngestComponentWithIndex(BaseIngestComponent, abc.ABC):
     def __init__(
@@ -52,15 +100,51 @@ class BaseIngestComponentWithIndex(BaseIngestComponent, abc.ABC):
         embed_model: EmbedType,
         transformations: list[TransformComponent],
         *args: Any,
+        persist_interval: float = 0.0,
+        persist_max_pending_operations: int = 1,
+        pdf_window_size: int = 0,
+        persist_dir: Path = local_data_path,
+        sparse_index: BM25Index | None = None,
+        generation: IndexGeneration | None = None,
         **kwargs: Any,
     ) -> None:
         super().__init__(storage_context, embed_model, transformations, *args, **kwargs)
 
         self.show_progress = True
+        self.pdf_window_size = pdf_window_size
+        self.persist_dir = persist_dir
+        # Kept up to date with the nodes of the index, for the keyword searches
+        self.sparse_index = sparse_index
+        # Bumped by every change of the nodes, invalidates the cached retrievals
+        self.generation = generation or IndexGeneration()
         self._index_thread_lock = (
-            threading.Lock()
+            threading.RLock()
         )  # Thread lock! Not Multiprocessing lock
-        self._index = self._initialize_index()
+        # Loaded by the first operation needing it, not when the server boots
+        self._index_instance: BaseIndex[IndexDict] | None = None
+        self._persist_scheduler = PersistScheduler(
+            persist=self._persist_index,
+            lock=self._index_thread_lock,
+            interval=persist_interval,
+            max_pending_operations=persist_max_pending_operations,
+        )
+
+    @property
+    def _index(self) -> BaseIndex[IndexDict]:
+        if self._index_instance is None:
+            with self._index_thread_lock:
+                if self._index_instance is None:
+                    start = time.perf_counter()
+                    self._index_instance = self._initialize_index()
+                    logger.info(
+                        "Loaded the ingestion index in %.2fs",
+                        time.perf_counter() - start,
+                    )
+        return self._index_instance
+
+    @_index.setter
+    def _index(self, index: BaseIndex[IndexDict]) -> None:
+        self._index_instance = index
 
     def _initialize_index(self) -> BaseIndex[IndexDict]:
         """Initialize the index from the storage context."""
@@ -84,20 +168,274 @@ class BaseIngestComponentWithIndex(BaseIngestComponent, abc.ABC):
                 embed_model=self.embed_model,
                 transformations=self.transformations,
             )
-            index.storage_context.persist(persist_dir=local_data_path)
+            persist_storage_context_atomically(index.storage_context, self.persist_dir)
         return index
 
-    def _save_index(self) -> None:
-        self._index.storage_context.persist(persist_dir=local_data_path)
+    def _persist_index(self) -> None:
+        persist_storage_context_atomically(
+            self._index.storage_context, self.persist_dir
+        )
+        if self.sparse_index is not None:
+            self.sparse_index.persist()
+
+    def _save_index(self, on_persisted: PersistCallback | None = None) -> None:
+        """Schedule the persist of the index, grouped with the following changes."""
+        self._persist_scheduler.mark_dirty(on_persisted=on_persisted)
+
+    def flush(self) -> None:
+        self._persist_scheduler.flush()
+
+    def close(self) -> None:
+        self._persist_scheduler.close()
 
     def delete(self, doc_id: str) -> None:
         with self._index_thread_lock:
             # Delete the document from the index
             self._index.delete_ref_doc(doc_id, delete_from_docstore=True)
+            if self.sparse_index is not None:
+                self.sparse_index.delete([doc_id])
+            self.generation.bump()
 
             # Save the index
             self._save_index()
 
+    def bulk_delete(self, doc_ids: list[str]) -> list[str]:
+        """Delete many documents under a single lock, with a single persist.
+
+        Unlike `BaseIndex.delete_ref_doc`, the vector store is called once per
+        document instead of once per node, and the index struct is updated once.
+        Returns the ids of the deleted documents, unknown ids are ignored.
+        """
+        deleted_doc_ids: list[str] = []
+        with self._index_thread_lock:
+            docstore = self._index.docstore
+            vector_store = self._index.vector_store
+            index_struct = self._index.index_struct
+            for doc_id in doc_ids:
+                ref_doc_info = docstore.get_ref_doc_info(doc_id)
+                if ref_doc_info is None:
+                    logger.debug("Document=%s not found, nothing to delete", doc_id)
+                    continue
+                vector_store.delete(doc_id)
+                for node_id in ref_doc_info.node_ids:
+                    index_struct.delete(node_id)
+                docstore.delete_ref_doc(doc_id, raise_error=False)
+                deleted_doc_ids.append(doc_id)
+            if deleted_doc_ids:
+                self.storage_context.index_store.add_index_struct(index_struct)
+                if self.sparse_index is not None:
+                    self.sparse_index.delete(deleted_doc_ids)
+                self.generation.bump()
+                self._save_index()
+        logger.info("Deleted count=%s documents", len(deleted_doc_ids))
+        return deleted_doc_ids
+
+    def reset(self) -> None:
+        """Delete all the documents, by dropping the stores instead of the documents.
+
+        The vector store collection and the doc store are emptied, the index is
+        recreated, and the result is persisted right away.
+        """
+        with self._index_thread_lock:
+            _clear_vector_store(self.storage_context.vector_store, self._index)
+            _clear_docstore(self.storage_context.docstore)
+            if self.sparse_index is not None:
+                self.sparse_index.clear()
+            self.storage_context.index_store.delete_index_struct(self._index.index_id)
+            self._index = VectorStoreIndex(
+                nodes=[],
+                storage_context=self.storage_context,
+                store_nodes_override=True,  # Force store nodes in index and document stores
+                show_progress=self.show_progress,
+                embed_model=self.embed_model,
+                transformations=self.transformations,
+            )
+            self.generation.bump()
+            self._save_index()
+            self._persist_scheduler.flush()
+        logger.info("Deleted all the ingested documents")
+
+    def _ingest_file(
+        self,
+        file_name: str,
+        file_data: Path,
+        progress: IngestProgressCallback | None = None,
+    ) -> list[Document]:
+        """Parse the file and save its documents.
+
+        PDFs are streamed when `pdf_window_size` is set: their pages are parsed and
+        saved window by window, so the memory used does not grow with the number of
+        pages and the first pages are searchable before the last ones are parsed.
+        Only the ids and metadata of the pages are returned, not their text.
+        """
+        if not IngestionHelper.is_streamed(file_name, self.pdf_window_size):
+            documents = IngestionHelper.transform_file_into_documents(
+                file_name, file_data
+            )
+            logger.info(
+                "Transformed file=%s into count=%s documents", file_name, len(documents)
+            )
+            if progress is not None:
+                progress("parsed", len(documents))
+            logger.debug("Saving the documents in the index and doc store")
+            return self._save_docs(documents, progress)
+
+        saved_documents: list[Document] = []
+        for documents in IngestionHelper.iter_pdf_documents(
+            file_name, file_data, self.pdf_window_size
+        ):
+            if progress is not None:
+                progress("parsed", len(documents))
+            self._save_docs(documents, progress)
+            saved_documents.extend(
+                Document(id_=document.doc_id, metadata=document.metadata)
+                for document in documents
+            )
+            logger.debug(
+                "Saved count=%s pages of file=%s", len(saved_documents), file_name
+            )
+        logger.info(
+            "Streamed file=%s into count=%s documents", file_name, len(saved_documents)
+        )
+        return saved_documents
+
+    def _ingest_streamed_files(
+        self, files: list[tuple[str, Path]]
+    ) -> tuple[list[Document], list[tuple[str, Path]]]:
+        """Ingest the files of a bulk ingestion that are streamed, one after another.
+
+        Returns their documents and the files left to ingest. A file that fails
+        to be ingested is reported and skipped.
+        """
+        documents: list[Document] = []
+        other_files: list[tuple[str, Path]] = []
+        for file_name, file_data in files:
+            if not IngestionHelper.is_streamed(file_name, self.pdf_window_size):
+                other_files.append((file_name, file_data))
+                continue
+            try:
+                documents.extend(self._ingest_file(file_name, file_data))
+            except Exception:
+                logger.exception("Failed to ingest file_name=%s", file_name)
+        return documents, other_files
+
+    def _save_docs(
+        self,
+        documents: list[Document],
+        progress: IngestProgressCallback | None = None,
+    ) -> list[Document]:
+        logger.debug("Transforming count=%s documents into nodes", len(documents))
+        with self._index_thread_lock:
+            for document in documents:
+                self._index.insert(document, show_progress=True)
+                if progress is None and self.sparse_index is None:
+                    continue
+                ref_doc_info = self._index.docstore.get_ref_doc_info(
+                    document.get_doc_id()
+                )
+                node_ids = ref_doc_info.node_ids if ref_doc_info else []
+                if self.sparse_index is not None:
+                    self.sparse_index.add(self._index.docstore.get_nodes(node_ids))
+                if progress is not None:
+                    progress("embedded", len(node_ids))
+            self.generation.bump()
+            logger.debug("Scheduling the persist of the index and nodes")
+            # persist the index and nodes
+            self._save_index_with_progress(documents, progress)
+        return documents
+
+    def _save_index_with_progress(
+        self, documents: list[Document], progress: IngestProgressCallback | None
+    ) -> None:
+        """Schedule the persist of the index, notifying `progress` of the documents.
+
+        The documents are `indexed` (searchable) as soon as they are inserted, and
+        `persisted` once the grouped persist including them is done.
+        """
+        if progress is None:
+            self._save_index()
+            return
+        progress("indexed", len(documents))
+
+        def on_persisted(error: Exception | None) -> None:
+            progress("persisted" if error is None else "persist_failed", len(documents))
+
+        self._save_index(on_persisted=on_persisted)
+
+
+def _clear_vector_store(vector_store: VectorStore, index: BaseIndex[IndexDict]) -> None:
+    try:
+        from brainiax.components.vector_store.hnswlib_vector_store import (
+            HnswlibVectorStore,
+        )
+    except ImportError:
+        pass
+    else:
+        if isinstance(vector_store, HnswlibVectorStore):
+            vector_store.clear()
+            return
+
+    try:
+        from llama_index.vector_stores.qdrant import QdrantVectorStore  # type: ignore
+        from qdrant_client.http import models as rest  # type: ignore
+    except ImportError:
+        pass
+    else:
+        if isinstance(vector_store, QdrantVectorStore):
+            # Drop and recreate the collection, with the same configuration and
+            # payload indexes
+            client = vector_store.client
+            collection_name = vector_store.collection_name
+            if client.collection_exists(collection_name):
+                collection = client.get_collection(collection_name)
+                params = collection.config.params
+                client.delete_collection(collection_name)
+                client.create_collection(
+                    collection_name,
+                    vectors_config=params.vectors,
+                    sparse_vectors_config=params.sparse_vectors,
+                    on_disk_payload=params.on_disk_payload,
+                    hnsw_config=rest.HnswConfigDiff(
+                        **collection.config.hnsw_config.model_dump()
+                    ),
+                    optimizers_config=rest.OptimizersConfigDiff(
+                        **collection.config.optimizer_config.model_dump()
+                    ),
+                    quantization_config=collection.config.quantization_config,
+                )
+                for field_name, index_info in collection.payload_schema.items():
+                    client.create_payload_index(
+                        collection_name,
+                        field_name,
+                        field_schema=index_info.params or index_info.data_type,
+                    )
+            return
+
+    for doc_id in index.ref_doc_info:
+        vector_store.delete(doc_id)
+
+
+def _clear_docstore(docstore: BaseDocumentStore) -> None:
+    if isinstance(docstore, KVDocumentStore):
+        # Drop the collections of the key-value store directly, deleting the nodes
+        # one by one would also update their ref docs
+        kvstore = docstore._kvstore
+        for collection in (
+            docstore._node_collection,
+            docstore._ref_doc_collection,
+            docstore._metadata_collection,
+        ):
+            if isinstance(kvstore, SQLiteKVStore):
+                kvstore.delete_collection(collection)
+                continue
+            for key in list(kvstore.get_all(collection=collection)):
+                kvstore.delete(key, collection=collection)
+        return
+
+    for node_id in list(docstore.docs):
+        docstore.delete_document(node_id, raise_error=False)
+
+
 class SimpleIngestComponent(BaseIngestComponentWithIndex):
     def __init__(
         self,
@@ -109,43 +447,481 @@ class SimpleIngestComponent(BaseIngestComponentWithIndex):
     ) -> None:
         super().__init__(storage_context, embed_model, transformations, *args, **kwargs)
 
-    def ingest(self, file_name: str, file_data: Path) -> list[Document]:
+    def ingest(
+        self,
+        file_name: str,
+        file_data: Path,
+        progress: IngestProgressCallback | None = None,
+    ) -> list[Document]:
         logger.info("Ingesting file_name=%s", file_name)
-        documents = IngestionHelper.transform_file_into_documents(file_name, file_data)
-        logger.info(
-            "Transformed file=%s into count=%s documents", file_name, len(documents)
-        )
-        logger.debug("Saving the documents in the index and doc store")
-        return self._save_docs(documents)
+        return self._ingest_file(file_name, file_data, progress)
 
     def bulk_ingest(self, files: list[tuple[str, Path]]) -> list[Document]:
         saved_documents = []
         for file_name, file_data in files:
-            documents = IngestionHelper.transform_file_into_documents(
-                file_name, file_data
-            )
-            saved_documents.extend(self._save_docs(documents))
+            saved_documents.extend(self._ingest_file(file_name, file_data))
         return saved_documents
 
-    def _save_docs(self, documents: list[Document]) -> list[Document]:
+
+def _transform_file_into_documents_safely(
+    file: tuple[str, Path]
+) -> tuple[str, list[Document] | None, str | None]:
+    """Transform a file into documents, returning the error instead of raising it.
+
+    Runs in the worker processes of `ParallelizedIngestComponent`, so it must stay
+    a module level (picklable) function.
+    """
+    file_name, file_data = file
+    try:
+        documents = IngestionHelper.transform_file_into_documents(file_name, file_data)
+        return file_name, documents, None
+    except Exception as e:
+        return file_name, None, f"{type(e).__name__}: {e}"
+
+
+class ParallelizedIngestComponent(BaseIngestComponentWithIndex):
+    """Parse the files of a bulk ingestion in parallel.
+
+    The files are transformed into documents in a pool of `count_workers`
+    processes; only the index insert and the persist steps stay serialized
+    behind the index lock. A file that fails to be parsed is reported and
+    skipped, the rest of the batch is still ingested.
+    """
+
+    def __init__(
+        self,
+        storage_context: StorageContext,
+        embed_model: EmbedType,
+        transformations: list[TransformComponent],
+        count_workers: int,
+        *args: Any,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(storage_context, embed_model, transformations, *args, **kwargs)
+        assert count_workers > 0, "At least one worker is needed to parse the files"
+        self.count_workers = count_workers
+        # Created on the first bulk ingestion, so that no process is spawned
+        # when the server is only used for querying
+        self._file_to_documents_work_pool: multiprocessing.pool.Pool | None = None
+        self._work_pool_lock = threading.Lock()
+
+    def _get_work_pool(self) -> multiprocessing.pool.Pool:
+        with self._work_pool_lock:
+            if self._file_to_documents_work_pool is None:
+                logger.info(
+                    "Starting a pool of count=%s workers to parse the files",
+                    self.count_workers,
+                )
+                self._file_to_documents_work_pool = multiprocessing.Pool(
+                    processes=self.count_workers
+                )
+            return self._file_to_documents_work_pool
+
+    def ingest(
+        self,
+        file_name: str,
+        file_data: Path,
+        progress: IngestProgressCallback | None = None,
+    ) -> list[Document]:
+        logger.info("Ingesting file_name=%s", file_name)
+        # A single file cannot be parsed in parallel, avoid the pool round trip
+        return self._ingest_file(file_name, file_data, progress)
+
+    def bulk_ingest(self, files: list[tuple[str, Path]]) -> list[Document]:
+        # Streamed files are parsed window by window, not by the pool
+        streamed_documents, files = self._ingest_streamed_files(files)
+        documents: list[Document] = []
+        failed_file_names: list[str] = []
+        for file_name, file_documents, error in self._get_work_pool().imap_unordered(
+            _transform_file_into_documents_safely, files
+        ):
+            if file_documents is None:
+                logger.error("Failed to ingest file_name=%s: %s", file_name, error)
+                failed_file_names.append(file_name)
+                continue
+            logger.info(
+                "Transformed file=%s into count=%s documents",
+                file_name,
+                len(file_documents),
+            )
+            documents.extend(file_documents)
+
+        if failed_file_names:
+            logger.warning(
+                "count=%s of %s files could not be ingested: %s",
+                len(failed_file_names),
+                len(files),
+                failed_file_names,
+            )
+        return streamed_documents + self._save_docs(documents)
+
+    def close(self) -> None:
+        with self._work_pool_lock:
+            if self._file_to_documents_work_pool is not None:
+                self._file_to_documents_work_pool.terminate()
+                self._file_to_documents_work_pool = None
+        super().close()
+
+    def __del__(self) -> None:
+        # We need to do the appropriate cleanup of the multiprocessing pool
+        # when the object is deleted. Using root logger to avoid
+        # the logger to be deleted before the pool
+        logging.debug("Closing the ingest component work pool")
+        self.close()
+
+
+class BatchIngestComponent(ParallelizedIngestComponent):
+    """Embed the nodes of a whole batch of documents at once.
+
+    The documents are first split into nodes in a single bulk call, the nodes are
+    then embedded in batches of `embed_batch_size` regardless of the document they
+    belong to, and finally added to the vector store and doc store in bulk. This
+    removes the per-document round trips of `BaseIndex.insert`, which dominate the
+    ingestion time of documents made of a few nodes each (e.g. PDF pages).
+    """
+
+    def _save_docs(
+        self,
+        documents: list[Document],
+        progress: IngestProgressCallback | None = None,
+    ) -> list[Document]:
         logger.debug("Transforming count=%s documents into nodes", len(documents))
+        # Splitting and embedding do not touch the index, no need to hold the lock
+        nodes = run_transformations(
+            documents,  # type: ignore[arg-type]
+            self.transformations,
+            show_progress=self.show_progress,
+        )
+        if progress is not None:
+            progress("embedded", len(nodes))
+        logger.info(
+            "Inserting count=%s nodes of count=%s documents in the index",
+            len(nodes),
+            len(documents),
+        )
         with self._index_thread_lock:
+            self._index.insert_nodes(nodes, show_progress=True)
+            if self.sparse_index is not None:
+                self.sparse_index.add(nodes)
+            self.generation.bump()
             for document in documents:
-                self._index.insert(document, show_progress=True)
-            logger.debug("Persisting the index and nodes")
+                self._index.docstore.set_document_hash(
+                    document.get_doc_id(), document.hash
+                )
+            logger.debug("Scheduling the persist of the index and nodes")
             # persist the index and nodes
-            self._save_index()
-            logger.debug("Persisted the index and nodes")
+            self._save_index_with_progress(documents, progress)
         return documents
 
+
+@dataclass
+class PipelineStageStats:
+    """Throughput and queue depth statistics of a stage of the ingestion pipeline."""
+
+    name: str
+    files: int = 0
+    # Documents for the parse stage
+    nodes: int = 0
+    busy_seconds: float = 0.0
+    # Depth of the queue feeding the stage, sampled every time it takes a file
+    max_queue_depth: int = 0
+    total_queue_depth: int = 0
+
+    @property
+    def files_per_second(self) -> float:
+        """Files the stage can process per second, when it is not starved."""
+        return self.files / self.busy_seconds if self.busy_seconds else 0.0
+
+    @property
+    def mean_queue_depth(self) -> float:
+        return self.total_queue_depth / self.files if self.files else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.name}: files={self.files} nodes={self.nodes} "
+            f"busy={self.busy_seconds:.2f}s files/s={self.files_per_second:.2f} "
+            f"queue_depth(mean={self.mean_queue_depth:.1f}, max={self.max_queue_depth})"
+        )
+
+
+_PIPELINE_END = object()
+
+
+class PipelineIngestComponent(ParallelizedIngestComponent):
+    """Ingest the files of a bulk ingestion through a pipeline of stages.
+
+    Files go through 4 stages connected by bounded queues: parse (in the process
+    pool of `ParallelizedIngestComponent`), split into nodes, embed, and write to
+    the index. The stages run concurrently: while a file is being embedded, the
+    next ones are parsed and split and the previous one is written, so the
+    throughput is bound by the slowest stage instead of the sum of all of them.
+
+    A file failing a stage is reported and skipped. If a stage itself fails, the
+    other stages are cancelled: they discard their files, the queues are drained
+    until every stage has ended, and the error is raised.
+
+    The statistics of the last bulk ingestion are kept in `last_pipeline_stats`.
+    """
+
+    def __init__(
+        self,
+        storage_context: StorageContext,
+        embed_model: EmbedType,
+        transformations: list[TransformComponent],
+        count_workers: int,
+        queue_size: int,
+        *args: Any,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(
+            storage_context, embed_model, transformations, count_workers, *args, **kwargs
+        )
+        assert queue_size > 0, "The pipeline queues must hold at least one file"
+        self.queue_size = queue_size
+        self._split_transformations = [
+            transformation
+            for transformation in self.transformations
+            if transformation is not self.embed_model
+        ]
+        self.last_pipeline_stats: list[PipelineStageStats] = []
+
+    def bulk_ingest(self, files: list[tuple[str, Path]]) -> list[Document]:
+        # Streamed files are parsed window by window, not by the pipeline
+        streamed_documents, files = self._ingest_streamed_files(files)
+        start = time.perf_counter()
+        stats = [
+            PipelineStageStats(name)
+            for name in ("parse", "split", "embed", "write")
+        ]
+        parse_stats, split_stats, embed_stats, write_stats = stats
+        parsed: queue.Queue[Any] = queue.Queue(maxsize=self.queue_size)
+        split: queue.Queue[Any] = queue.Queue(maxsize=self.queue_size)
+        embedded: queue.Queue[Any] = queue.Queue(maxsize=self.queue_size)
+        # Set when a stage fails, the other stages then discard their files
+        cancelled = threading.Event()
+        stage_errors: list[BaseException] = []
+
+        stages = [
+            threading.Thread(
+                target=self._parse_stage,
+                args=(files, parsed, parse_stats),
+                kwargs={"cancelled": cancelled, "errors": stage_errors},
+                name="ingest-pipeline-parse",
+            ),
+            threading.Thread(
+                target=self._transform_stage,
+                args=(parsed, split, self._split_transformations, split_stats),
+                kwargs={"cancelled": cancelled, "errors": stage_errors},
+                name="ingest-pipeline-split",
+            ),
+            threading.Thread(
+                target=self._transform_stage,
+                args=(split, embedded, [self.embed_model], embed_stats),
+                kwargs={"cancelled": cancelled, "errors": stage_errors},
+                name="ingest-pipeline-embed",
+            ),
+        ]
+        for stage in stages:
+            stage.start()
+
+        documents: list[Document] = []
+        try:
+            for file_name, file_documents, nodes in self._iter_queue(
+                embedded, write_stats
+            ):
+                write_start = time.perf_counter()
+                with self._index_thread_lock:
+                    self._index.insert_nodes(nodes, show_progress=False)
+                    if self.sparse_index is not None:
+                        self.sparse_index.add(nodes)
+                    self.generation.bump()
+                    for document in file_documents:
+                        self._index.docstore.set_document_hash(
+                            document.get_doc_id(), document.hash
+                        )
+                    self._save_index()
+                write_stats.busy_seconds += time.perf_counter() - write_start
+                write_stats.nodes += len(nodes)
+                documents.extend(file_documents)
+                logger.debug("Wrote count=%s nodes of file=%s", len(nodes), file_name)
+        except BaseException:
+            logger.error("The pipeline failed in stage=%s", write_stats.name)
+            cancelled.set()
+            # Unblock the stages waiting for room in the queues, until they end
+            while embedded.get() is not _PIPELINE_END:
+                pass
+            raise
+        finally:
+            for stage in stages:
+                stage.join()
+        if stage_errors:
+            raise RuntimeError("The ingestion pipeline failed") from stage_errors[0]
+
+        self.last_pipeline_stats = stats
+        logger.info(
+            "Ingested count=%s files in %.2fs through the pipeline:\n%s",
+            len(files),
+            time.perf_counter() - start,
+            "\n".join(str(stage_stats) for stage_stats in stats),
+        )
+        return streamed_documents + documents
+
+    def _parse_stage(
+        self,
+        files: list[tuple[str, Path]],
+        output: "queue.Queue[Any]",
+        stats: PipelineStageStats,
+        cancelled: threading.Event,
+        errors: list[BaseException],
+    ) -> None:
+        start = time.perf_counter()
+        # Bound the files parsed ahead, parsed documents wait in `output` otherwise
+        max_in_flight = self.count_workers + self.queue_size
+        in_flight = threading.BoundedSemaphore(max_in_flight)
+
+        def on_parsed(
+            result: tuple[str, list[Document] | None, str | None]
+        ) -> None:
+            file_name, file_documents, error = result
+            if cancelled.is_set():
+                pass
+            elif file_documents is None:
+                logger.error("Failed to ingest file_name=%s: %s", file_name, error)
+            else:
+                stats.files += 1
+                stats.nodes += len(file_documents)
+                output.put((file_name, file_documents, file_documents))
+            in_flight.release()
+
+        def on_error(error: BaseException) -> None:
+            logger.error("Failed to parse a file: %s", error)
+            in_flight.release()
+
+        try:
+            pool = self._get_work_pool()
+            for file in files:
+                in_flight.acquire()
+                if cancelled.is_set():
+                    in_flight.release()
+                    break
+                pool.apply_async(
+                    _transform_file_into_documents_safely,
+                    (file,),
+                    callback=on_parsed,
+                    error_callback=on_error,
+                )
+            # Wait for the files being parsed
+            for _ in range(max_in_flight):
+                in_flight.acquire()
+            # The parsing runs in several processes, report its wall time
+            stats.busy_seconds = time.perf_counter() - start
+        except BaseException as e:
+            logger.exception("The pipeline failed in stage=%s", stats.name)
+            errors.append(e)
+            cancelled.set()
+        finally:
+            output.put(_PIPELINE_END)
+
+    def _transform_stage(
+        self,
+        source: "queue.Queue[Any]",
+        output: "queue.Queue[Any]",
+        transformations: list[TransformComponent],
+        stats: PipelineStageStats,
+        cancelled: threading.Event,
+        errors: list[BaseException],
+    ) -> None:
+        try:
+            for file_name, file_documents, nodes in self._iter_queue(source, stats):
+                if cancelled.is_set():
+                    continue
+                start = time.perf_counter()
+                try:
+                    nodes = run_transformations(nodes, transformations)
+                except Exception:
+                    logger.exception(
+                        "Failed to ingest file_name=%s in stage=%s",
+                        file_name,
+                        stats.name,
+                    )
+                    continue
+                finally:
+                    stats.busy_seconds += time.perf_counter() - start
+                stats.nodes += len(nodes)
+                output.put((file_name, file_documents, nodes))
+        except BaseException as e:
+            logger.exception("The pipeline failed in stage=%s", stats.name)
+            errors.append(e)
+            cancelled.set()
+            # Unblock the previous stage if it waits for room in the queue
+            while source.get() is not _PIPELINE_END:
+                pass
+        finally:
+            output.put(_PIPELINE_END)
+
+    @staticmethod
+    def _iter_queue(
+        source: "queue.Queue[Any]", stats: PipelineStageStats
+    ) -> Iterator[tuple[str, list[Document], list[BaseNode]]]:
+        while True:
+            depth = source.qsize()
+            item = source.get()
+            if item is _PIPELINE_END:
+                return
+            stats.files += 1
+            stats.max_queue_depth = max(stats.max_queue_depth, depth)
+            stats.total_queue_depth += depth
+            yield item
+
+
 def get_ingestion_component(
     storage_context: StorageContext,
     embed_model: EmbedType,
     transformations: list[TransformComponent],
     settings: Settings,
+    persist_dir: Path = local_data_path,
+    sparse_index: BM25Index | None = None,
+    generation: IndexGeneration | None = None,
 ) -> BaseIngestComponent:
+    """Get the ingestion component for the given configuration."""
+    ingest_mode = settings.embedding.ingest_mode
+    index_kwargs: dict[str, Any] = {
+        "persist_dir": persist_dir,
+        "sparse_index": sparse_index,
+        "generation": generation,
+        "persist_interval": settings.data.persist_interval,
+        "persist_max_pending_operations": settings.data.persist_max_pending_operations,
+        "pdf_window_size": settings.embedding.pdf_window_size,
+    }
+    if ingest_mode == "pipeline":
+        return PipelineIngestComponent(
+            storage_context=storage_context,
+            embed_model=embed_model,
+            transformations=transformations,
+            count_workers=settings.embedding.count_workers,
+            queue_size=settings.embedding.pipeline_queue_size,
+            **index_kwargs,
+        )
+    elif ingest_mode == "batch":
+        return BatchIngestComponent(
+            storage_context=storage_context,
+            embed_model=embed_model,
+            transformations=transformations,
+            count_workers=settings.embedding.count_workers,
+            **index_kwargs,
+        )
+    elif ingest_mode == "parallel":
+        return ParallelizedIngestComponent(
+            storage_context=storage_context,
+            embed_model=embed_model,
+            transformations=transformations,
+            count_workers=settings.embedding.count_workers,
+            **index_kwargs,
+        )
+    else:
         return SimpleIngestComponent(
             storage_context=storage_context,
             embed_model=embed_model,
             transformations=transformations,
+            **index_kwargs,
         )
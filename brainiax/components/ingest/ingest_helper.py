@@ -1,63 +1,101 @@
+import hashlib
+import importlib
 import logging
+import threading
+import time
+from collections.abc import Iterator, Mapping
 from pathlib import Path
 
 from llama_index.core.readers import StringIterableReader
 from llama_index.core.readers.base import BaseReader
-from llama_index.core.readers.json import JSONReader
 from llama_index.core.schema import Document
 
 logger = logging.getLogger(__name__)
 
+# Metadata of the documents filtered on by `ContextFilter`
+PAGE_NUMBER_METADATA_KEY = "page_number"  # 1 based position of the page in the file
+INGESTED_AT_METADATA_KEY = "ingested_at"  # Unix time of the ingestion, in seconds
+
 
 # Inspired by the `llama_index.core.readers.file.base` module
-def _try_loading_included_file_formats() -> dict[str, type[BaseReader]]:
-    try:
-        from llama_index.readers.file.docs import (  # type: ignore
-            DocxReader,
-            HWPReader,
-            PDFReader,
-        )
-        from llama_index.readers.file.epub import EpubReader  # type: ignore
-        from llama_index.readers.file.image import ImageReader  # type: ignore
-        from llama_index.readers.file.ipynb import IPYNBReader  # type: ignore
-        from llama_index.readers.file.markdown import MarkdownReader  # type: ignore
-        from llama_index.readers.file.mbox import MboxReader  # type: ignore
-        from llama_index.readers.file.slides import PptxReader  # type: ignore
-        from llama_index.readers.file.tabular import PandasCSVReader  # type: ignore
-        from llama_index.readers.file.video_audio import (  # type: ignore
-            VideoAudioReader,
-        )
-    except ImportError as e:
-        raise ImportError("`llama-index-readers-file` package not found") from e
-
-    default_file_reader_cls: dict[str, type[BaseReader]] = {
-        ".hwp": HWPReader,
-        ".pdf": PDFReader,
-        ".docx": DocxReader,
-        ".pptx": PptxReader,
-        ".ppt": PptxReader,
-        ".pptm": PptxReader,
-        ".jpg": ImageReader,
-        ".png": ImageReader,
-        ".jpeg": ImageReader,
-        ".mp3": VideoAudioReader,
-        ".mp4": VideoAudioReader,
-        ".csv": PandasCSVReader,
-        ".epub": EpubReader,
-        ".md": MarkdownReader,
-        ".mbox": MboxReader,
-        ".ipynb": IPYNBReader,
-    }
-    return default_file_reader_cls
-
-
-# Patching the default file reader to support other file types
-FILE_READER_CLS = _try_loading_included_file_formats()
-FILE_READER_CLS.update(
-    {
-        ".json": JSONReader,
-    }
-)
+# Extension -> (module, class name) of its reader
+_FILE_READER_CLS_PATHS: dict[str, tuple[str, str]] = {
+    ".hwp": ("llama_index.readers.file.docs", "HWPReader"),
+    ".pdf": ("llama_index.readers.file.docs", "PDFReader"),
+    ".docx": ("llama_index.readers.file.docs", "DocxReader"),
+    ".pptx": ("llama_index.readers.file.slides", "PptxReader"),
+    ".ppt": ("llama_index.readers.file.slides", "PptxReader"),
+    ".pptm": ("llama_index.readers.file.slides", "PptxReader"),
+    ".jpg": ("llama_index.readers.file.image", "ImageReader"),
+    ".png": ("llama_index.readers.file.image", "ImageReader"),
+    ".jpeg": ("llama_index.readers.file.image", "ImageReader"),
+    ".mp3": ("llama_index.readers.file.video_audio", "VideoAudioReader"),
+    ".mp4": ("llama_index.readers.file.video_audio", "VideoAudioReader"),
+    ".csv": ("llama_index.readers.file.tabular", "PandasCSVReader"),
+    ".epub": ("llama_index.readers.file.epub", "EpubReader"),
+    ".md": ("llama_index.readers.file.markdown", "MarkdownReader"),
+    ".mbox": ("llama_index.readers.file.mbox", "MboxReader"),
+    ".ipynb": ("llama_index.readers.file.ipynb", "IPYNBReader"),
+    # Patching the default file readers to support other file types
+    ".json": ("llama_index.core.readers.json", "JSONReader"),
+}
+
+
+class LazyFileReaderRegistry(Mapping[str, type[BaseReader]]):
+    """Mapping of file extensions to reader classes, importing a reader on first use.
+
+    Importing every reader (and the libraries they rely on) up front slows down
+    every server boot and worker process, even if no such file is ingested. Here a
+    reader is imported the first time a file with its extension is read, and a
+    missing optional dependency only fails the ingestion of that extension.
+    This class is thread-safe.
+    """
+
+    def __init__(self, reader_cls_paths: dict[str, tuple[str, str]]) -> None:
+        self._reader_cls_paths = dict(reader_cls_paths)
+        self._reader_cls: dict[str, type[BaseReader]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, extension: str, module_name: str, class_name: str) -> None:
+        with self._lock:
+            self._reader_cls_paths[extension] = (module_name, class_name)
+            self._reader_cls.pop(extension, None)
+
+    def __getitem__(self, extension: str) -> type[BaseReader]:
+        """Get the reader class of the extension, importing it if needed.
+
+        :raises KeyError: if no reader is registered for the extension
+        :raises ImportError: if the reader or its dependencies are not installed
+        """
+        with self._lock:
+            reader_cls = self._reader_cls.get(extension)
+            if reader_cls is not None:
+                return reader_cls
+            module_name, class_name = self._reader_cls_paths[extension]
+            logger.debug("Importing the reader of extension=%s", extension)
+            try:
+                module = importlib.import_module(module_name)
+            except ImportError as e:
+                raise ImportError(
+                    f"Cannot read {extension} files, the reader {class_name} could "
+                    f"not be imported ({e}). Is `llama-index-readers-file` installed?"
+                ) from e
+            reader_cls = getattr(module, class_name)
+            self._reader_cls[extension] = reader_cls
+            return reader_cls
+
+    def __contains__(self, extension: object) -> bool:
+        # Do not import the reader to know if there is one
+        return extension in self._reader_cls_paths
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._reader_cls_paths)
+
+    def __len__(self) -> int:
+        return len(self._reader_cls_paths)
+
+
+FILE_READER_CLS = LazyFileReaderRegistry(_FILE_READER_CLS_PATHS)
 
 
 class IngestionHelper:
@@ -71,18 +109,78 @@ class IngestionHelper:
     def transform_file_into_documents(
         file_name: str, file_data: Path
     ) -> list[Document]:
+        file_hash = IngestionHelper.file_hash(file_data)
+        ingested_at = int(time.time())
         documents = IngestionHelper._load_file_to_documents(file_name, file_data)
-        for document in documents:
+        for page_number, document in enumerate(documents, start=1):
             document.metadata["file_name"] = file_name
+            document.metadata["file_hash"] = file_hash
+            document.metadata[INGESTED_AT_METADATA_KEY] = ingested_at
+            if "page_label" in document.metadata:
+                # Paginated readers (PDF) return one document per page, in order
+                document.metadata[PAGE_NUMBER_METADATA_KEY] = page_number
         IngestionHelper._exclude_metadata(documents)
         return documents
 
+    @staticmethod
+    def is_streamed(file_name: str, pdf_window_size: int) -> bool:
+        """Whether the file is read window by window with `iter_pdf_documents`."""
+        return pdf_window_size > 0 and Path(file_name).suffix.lower() == ".pdf"
+
+    @staticmethod
+    def iter_pdf_documents(
+        file_name: str, file_data: Path, window_size: int
+    ) -> Iterator[list[Document]]:
+        """Transform a PDF into one document per page, yielded `window_size` at a time.
+
+        The documents are the same as the ones of `transform_file_into_documents`,
+        but only the pages of the current window are extracted in memory.
+        """
+        try:
+            import pypdf  # type: ignore
+        except ImportError as e:
+            raise ImportError(
+                "pypdf is required to read PDF files: `pip install pypdf`"
+            ) from e
+
+        file_hash = IngestionHelper.file_hash(file_data)
+        ingested_at = int(time.time())
+        with file_data.open("rb") as f:
+            pdf = pypdf.PdfReader(f)
+            page_labels = pdf.page_labels
+            documents: list[Document] = []
+            for page_number, page in enumerate(pdf.pages):
+                documents.append(
+                    Document(
+                        text=page.extract_text(),
+                        metadata={
+                            "page_label": page_labels[page_number],
+                            PAGE_NUMBER_METADATA_KEY: page_number + 1,
+                            "file_name": file_name,
+                            "file_hash": file_hash,
+                            INGESTED_AT_METADATA_KEY: ingested_at,
+                        },
+                    )
+                )
+                if len(documents) == window_size:
+                    IngestionHelper._exclude_metadata(documents)
+                    yield documents
+                    documents = []
+            if documents:
+                IngestionHelper._exclude_metadata(documents)
+                yield documents
+
+    @staticmethod
+    def file_hash(file_data: Path) -> str:
+        """Hash of the content of the file, used to detect unchanged re-uploads."""
+        with file_data.open("rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+
     @staticmethod
     def _load_file_to_documents(file_name: str, file_data: Path) -> list[Document]:
         logger.debug("Transforming file_name=%s into documents", file_name)
         extension = Path(file_name).suffix
-        reader_cls = FILE_READER_CLS.get(extension)
-        if reader_cls is None:
+        if extension not in FILE_READER_CLS:
             logger.debug(
                 "No reader found for extension=%s, using default string reader",
                 extension,
@@ -92,7 +190,7 @@ class IngestionHelper:
             return string_reader.load_data([file_data.read_text()])
 
         logger.debug("Specific reader found for extension=%s", extension)
-        return reader_cls().load_data(file_data)
+        return FILE_READER_CLS[extension]().load_data(file_data)
 
     @staticmethod
     def _exclude_metadata(documents: list[Document]) -> None:
@@ -100,6 +198,18 @@ class IngestionHelper:
         for document in documents:
             document.metadata["doc_id"] = document.doc_id
             # We don't want the Embeddings search to receive this metadata
-            document.excluded_embed_metadata_keys = ["doc_id"]
+            document.excluded_embed_metadata_keys = [
+                "doc_id",
+                "file_hash",
+                PAGE_NUMBER_METADATA_KEY,
+                INGESTED_AT_METADATA_KEY,
+            ]
             # We don't want the LLM to receive these metadata in the context
-            document.excluded_llm_metadata_keys = ["file_name", "doc_id", "page_label"]
+            document.excluded_llm_metadata_keys = [
+                "file_name",
+                "doc_id",
+                "page_label",
+                "file_hash",
+                PAGE_NUMBER_METADATA_KEY,
+                INGESTED_AT_METADATA_KEY,
+            ]
@@ -0,0 +1,201 @@
+import atexit
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections.abc import Callable
+from pathlib import Path
+
+from llama_index.core.storage import StorageContext
+
+logger = logging.getLogger(__name__)
+
+PersistCallback = Callable[[Exception | None], None]
+"""Called with None once the changes are persisted, or with the persist error."""
+
+
+STORES_POINTER_FILE_NAME = "stores.current"
+_STORES_DIR_PREFIX = ".stores-"
+
+
+def stores_dir(persist_dir: Path) -> Path:
+    """Folder of the last complete persist of the stores of `persist_dir`.
+
+    `persist_dir` itself if the stores were never persisted, or persisted before
+    the persists were versioned.
+    """
+    try:
+        name = (persist_dir / STORES_POINTER_FILE_NAME).read_text().strip()
+    except FileNotFoundError:
+        return persist_dir
+    return persist_dir / name
+
+
+def _fsync_dir(path: Path) -> None:
+    # Directories cannot be opened, nor synced, on Windows
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def persist_storage_context_atomically(
+    storage_context: StorageContext, persist_dir: Path
+) -> None:
+    """Persist the storage context without ever leaving a half-written persist.
+
+    All the stores are written to a new folder of `persist_dir` and synced to
+    disk, then `stores.current` is atomically replaced to point to that folder.
+    A crash at any point leaves the pointer on the previous persist, so the doc
+    store and the index store read back are always from the same persist. The
+    folders of the previous persists are deleted afterwards.
+    """
+    persist_dir.mkdir(parents=True, exist_ok=True)
+    new_dir = Path(tempfile.mkdtemp(prefix=_STORES_DIR_PREFIX, dir=persist_dir))
+    try:
+        storage_context.persist(persist_dir=str(new_dir))
+        for file in new_dir.iterdir():
+            with file.open("r+b") as f:
+                os.fsync(f.fileno())
+        _fsync_dir(new_dir)
+
+        tmp_pointer = persist_dir / f"{STORES_POINTER_FILE_NAME}.tmp"
+        with tmp_pointer.open("w") as f:
+            f.write(new_dir.name)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_pointer, persist_dir / STORES_POINTER_FILE_NAME)
+        _fsync_dir(persist_dir)
+    except BaseException:
+        shutil.rmtree(new_dir, ignore_errors=True)
+        raise
+
+    # Not read anymore: the previous persists, the ones interrupted by a crash
+    # and the files persisted before the persists were versioned
+    for path in persist_dir.glob(f"{_STORES_DIR_PREFIX}*"):
+        if path != new_dir:
+            shutil.rmtree(path, ignore_errors=True)
+    for file in new_dir.iterdir():
+        (persist_dir / file.name).unlink(missing_ok=True)
+
+
+class PersistScheduler:
+    """Group the persists of the index instead of persisting after every change.
+
+    Changes are recorded with `mark_dirty`, and the actual persist runs when
+    `max_pending_operations` changes are pending, when `interval` seconds have
+    passed since the first pending change, or when the scheduler is closed (on
+    the server shutdown, and at interpreter exit). With the `simple` node store
+    a persist rewrites the whole stores, so grouping them amortizes this cost
+    over the grouped changes, but it still grows with the size of the corpus.
+    With the `sqlite` node store a persist only commits the changes.
+
+    The persist function is always called holding `lock`, which must be the lock
+    protecting the index, so that the stores are not modified while written.
+    """
+
+    def __init__(
+        self,
+        persist: Callable[[], None],
+        lock: threading.RLock,
+        interval: float,
+        max_pending_operations: int,
+    ) -> None:
+        self._persist = persist
+        self._lock = lock
+        self.interval = interval
+        self.max_pending_operations = max(max_pending_operations, 1)
+        self._pending_operations = 0
+        self._on_persisted_callbacks: list[PersistCallback] = []
+        self._closed = threading.Event()
+        self._dirty = threading.Event()
+
+        self._flusher: threading.Thread | None = None
+        if self.interval > 0 and self.max_pending_operations > 1:
+            self._flusher = threading.Thread(
+                target=self._flush_periodically, name="persist-scheduler", daemon=True
+            )
+            self._flusher.start()
+        atexit.register(self.close)
+
+    @property
+    def pending_operations(self) -> int:
+        return self._pending_operations
+
+    def mark_dirty(
+        self, operations: int = 1, on_persisted: PersistCallback | None = None
+    ) -> None:
+        """Record changes to persist, persisting right away if too many are pending.
+
+        `on_persisted` is called once the changes are persisted, or with the error
+        if the persist including them fails. Without a periodic persist (interval
+        of 0), changes with an `on_persisted` callback are persisted right away,
+        instead of waiting for more changes that may never come.
+        """
+        with self._lock:
+            self._pending_operations += operations
+            if on_persisted is not None:
+                self._on_persisted_callbacks.append(on_persisted)
+            if self._pending_operations >= self.max_pending_operations or (
+                on_persisted is not None and self._flusher is None
+            ):
+                self._flush_locked()
+            else:
+                self._dirty.set()
+
+    def flush(self) -> None:
+        """Persist the pending changes, if any."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if self._pending_operations == 0:
+            return
+        logger.debug(
+            "Persisting the index after count=%s operations", self._pending_operations
+        )
+        callbacks, self._on_persisted_callbacks = self._on_persisted_callbacks, []
+        try:
+            self._persist()
+        except Exception as e:
+            # The changes stay pending, and are persisted by the next persist, but
+            # the callers waiting for this one are told that it failed
+            self._notify(callbacks, e)
+            raise
+        self._pending_operations = 0
+        self._dirty.clear()
+        self._notify(callbacks, None)
+
+    @staticmethod
+    def _notify(callbacks: list[PersistCallback], error: Exception | None) -> None:
+        for callback in callbacks:
+            try:
+                callback(error)
+            except Exception:
+                logger.exception("Failed to notify the persist of the index")
+
+    def _flush_periodically(self) -> None:
+        while not self._closed.is_set():
+            self._dirty.wait()
+            # Give the following operations `interval` seconds to join the persist
+            if self._closed.wait(self.interval):
+                return
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to persist the index")
+
+    def close(self) -> None:
+        """Persist the pending changes and stop the periodic persist."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._dirty.set()  # Wake up the flusher so that it can exit
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        atexit.unregister(self.close)
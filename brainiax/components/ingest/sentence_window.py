@@ -0,0 +1,160 @@
+import logging
+import uuid
+from collections.abc import Sequence
+from typing import Any
+
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.node_parser import SentenceWindowNodeParser
+from llama_index.core.node_parser.node_utils import build_nodes_from_splits
+from llama_index.core.node_parser.text.sentence_window import DEFAULT_WINDOW_SIZE
+from llama_index.core.postprocessor.types import BaseNodePostprocessor
+from llama_index.core.schema import BaseNode, Document, NodeWithScore, QueryBundle
+from llama_index.core.storage.docstore import BaseDocumentStore
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_INDEX_METADATA_KEY = "sentence_index"
+WINDOW_START_METADATA_KEY = "window_start"
+WINDOW_END_METADATA_KEY = "window_end"
+WINDOW_METADATA_KEYS = [
+    SENTENCE_INDEX_METADATA_KEY,
+    WINDOW_START_METADATA_KEY,
+    WINDOW_END_METADATA_KEY,
+]
+
+# Metadata keys of the nodes of `SentenceWindowNodeParser`, still found in the
+# stores filled before the compact representation
+_LEGACY_WINDOW_METADATA_KEY = "window"
+
+_SENTENCE_NODE_NAMESPACE = uuid.UUID("6f2b1f39-4d2e-4c36-9a55-7d5f0c8e6a1b")
+
+
+def sentence_node_id(ref_doc_id: str, sentence_index: int) -> str:
+    """Id of the node of a sentence, computed from its document and position.
+
+    A UUID, as required by Qdrant for the ids of its points.
+    """
+    return str(uuid.uuid5(_SENTENCE_NODE_NAMESPACE, f"{ref_doc_id}:{sentence_index}"))
+
+
+def _sentence_node_id_func(i: int, doc: BaseNode) -> str:
+    return sentence_node_id(doc.node_id, i)
+
+
+class CompactSentenceWindowNodeParser(SentenceWindowNodeParser):
+    """Split documents into one node per sentence, without storing their windows.
+
+    `SentenceWindowNodeParser` copies the window of surrounding sentences and the
+    sentence itself in the metadata of every node, so each sentence is stored
+    about `2 * window_size + 2` times in the doc store and the vector store. Here
+    each node only stores its sentence and the bounds of its window, and its id
+    is derived from its position, so `SentenceWindowPostprocessor` can rebuild the
+    window from the doc store at retrieval time.
+    """
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CompactSentenceWindowNodeParser"
+
+    @classmethod
+    def from_defaults(  # type: ignore[override]
+        cls, window_size: int = DEFAULT_WINDOW_SIZE, **kwargs: Any
+    ) -> "CompactSentenceWindowNodeParser":
+        return super().from_defaults(  # type: ignore[return-value]
+            window_size=window_size,
+            id_func=_sentence_node_id_func,
+            **kwargs,
+        )
+
+    def build_window_nodes_from_documents(
+        self, documents: Sequence[Document]
+    ) -> list[BaseNode]:
+        all_nodes: list[BaseNode] = []
+        for doc in documents:
+            text_splits = self.sentence_splitter(doc.text)
+            nodes = build_nodes_from_splits(text_splits, doc, id_func=self.id_func)
+            for i, node in enumerate(nodes):
+                node.metadata[SENTENCE_INDEX_METADATA_KEY] = i
+                node.metadata[WINDOW_START_METADATA_KEY] = max(0, i - self.window_size)
+                node.metadata[WINDOW_END_METADATA_KEY] = min(
+                    i + self.window_size + 1, len(nodes)
+                )
+                # exclude window metadata from embed and llm
+                node.excluded_embed_metadata_keys = [
+                    *node.excluded_embed_metadata_keys,
+                    *WINDOW_METADATA_KEYS,
+                ]
+                node.excluded_llm_metadata_keys = [
+                    *node.excluded_llm_metadata_keys,
+                    *WINDOW_METADATA_KEYS,
+                ]
+            all_nodes.extend(nodes)
+        return all_nodes
+
+
+class SentenceWindowPostprocessor(BaseNodePostprocessor):
+    """Replace the content of retrieved sentences by their window of sentences.
+
+    The windows of the nodes of `CompactSentenceWindowNodeParser` are rebuilt from
+    the sentences of the doc store, fetched in one go for all the retrieved nodes.
+    Nodes stored with their window in the metadata (`SentenceWindowNodeParser`)
+    use it directly, as `MetadataReplacementPostProcessor` did.
+    """
+
+    _docstore: BaseDocumentStore = PrivateAttr()
+
+    def __init__(self, docstore: BaseDocumentStore, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._docstore = docstore
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "SentenceWindowPostprocessor"
+
+    def _postprocess_nodes(
+        self,
+        nodes: list[NodeWithScore],
+        query_bundle: QueryBundle | None = None,
+    ) -> list[NodeWithScore]:
+        window_node_ids: dict[str, list[str]] = {}
+        for n in nodes:
+            metadata = n.node.metadata
+            if _LEGACY_WINDOW_METADATA_KEY in metadata:
+                n.node.set_content(metadata[_LEGACY_WINDOW_METADATA_KEY])
+            elif SENTENCE_INDEX_METADATA_KEY in metadata and n.node.ref_doc_id:
+                window_node_ids[n.node.node_id] = [
+                    sentence_node_id(n.node.ref_doc_id, i)
+                    for i in range(
+                        metadata[WINDOW_START_METADATA_KEY],
+                        metadata[WINDOW_END_METADATA_KEY],
+                    )
+                ]
+        if not window_node_ids:
+            return nodes
+
+        sentences: dict[str, str] = {}
+        unique_node_ids = list(
+            dict.fromkeys(i for ids in window_node_ids.values() for i in ids)
+        )
+        for node in self._docstore.get_nodes(unique_node_ids, raise_error=False):
+            if node is not None:
+                sentences[node.node_id] = node.get_content()
+        for n in nodes:
+            node_ids = window_node_ids.get(n.node.node_id)
+            if node_ids is None:
+                continue
+            missing = [i for i in node_ids if i not in sentences]
+            if missing:
+                logger.warning(
+                    "count=%s sentences of the window of node=%s are missing",
+                    len(missing),
+                    n.node.node_id,
+                )
+            n.node.set_content(
+                " ".join(
+                    n.node.get_content() if i == n.node.node_id else sentences[i]
+                    for i in node_ids
+                    if i == n.node.node_id or i in sentences
+                )
+            )
+        return nodes
@@ -1,34 +1,120 @@
 import logging
+import threading
+import time
+from pathlib import Path
 
 from injector import inject, singleton
 from llama_index.core.storage.docstore import BaseDocumentStore, SimpleDocumentStore
 from llama_index.core.storage.index_store import SimpleIndexStore
 from llama_index.core.storage.index_store.types import BaseIndexStore
 
+from brainiax.components.ingest.persist_scheduler import stores_dir
 from brainiax.paths import local_data_path
+from brainiax.settings.settings import Settings
 
 logger = logging.getLogger(__name__)
 
+SQLITE_NODE_STORE_FILE_NAME = "node_store.sqlite"
+
 
 @singleton
 class NodeStoreComponent:
-    index_store: BaseIndexStore
-    doc_store: BaseDocumentStore
+    """Doc and index stores of each collection, loaded on first use.
+
+    Loading the `simple` stores reads their whole JSON files, which takes longer
+    as the corpus grows: it is not done at boot but by the first request needing
+    them. The stores of the default collection are in the local data folder, the
+    ones of the other collections in its `collections/<collection>` folders.
+    """
 
     @inject
-    def __init__(self) -> None:
-        try:
-            self.index_store = SimpleIndexStore.from_persist_dir(
-                persist_dir=str(local_data_path)
-            )
-        except FileNotFoundError:
-            logger.debug("Local index store not found, creating a new one")
-            self.index_store = SimpleIndexStore()
-
-        try:
-            self.doc_store = SimpleDocumentStore.from_persist_dir(
-                persist_dir=str(local_data_path)
-            )
-        except FileNotFoundError:
-            logger.debug("Local document store not found, creating a new one")
-            self.doc_store = SimpleDocumentStore()
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self._stores: dict[str, tuple[BaseDocumentStore, BaseIndexStore]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def index_store(self) -> BaseIndexStore:
+        return self.get_stores()[1]
+
+    @property
+    def doc_store(self) -> BaseDocumentStore:
+        return self.get_stores()[0]
+
+    def persist_dir(self, collection: str | None = None) -> Path:
+        """Folder of the stores of a collection, the default one if not given."""
+        collection = collection or self.settings.vectorstore.default_collection
+        if collection == self.settings.vectorstore.default_collection:
+            return local_data_path
+        return local_data_path / "collections" / collection
+
+    def list_collections(self) -> list[str]:
+        """Collections with a folder of stores, the default one first."""
+        default_collection = self.settings.vectorstore.default_collection
+        collections_path = local_data_path / "collections"
+        other_collections = (
+            sorted(path.name for path in collections_path.iterdir() if path.is_dir())
+            if collections_path.is_dir()
+            else []
+        )
+        return [default_collection] + [
+            collection
+            for collection in other_collections
+            if collection != default_collection
+        ]
+
+    def get_stores(
+        self, collection: str | None = None
+    ) -> tuple[BaseDocumentStore, BaseIndexStore]:
+        """Doc and index stores of a collection, the default one if not given."""
+        collection = collection or self.settings.vectorstore.default_collection
+        stores = self._stores.get(collection)
+        if stores is None:
+            with self._lock:
+                stores = self._stores.get(collection)
+                if stores is None:
+                    stores = self._load(collection)
+                    self._stores[collection] = stores
+        return stores
+
+    def _load(self, collection: str) -> tuple[BaseDocumentStore, BaseIndexStore]:
+        start = time.perf_counter()
+        persist_dir = self.persist_dir(collection)
+        index_store: BaseIndexStore
+        doc_store: BaseDocumentStore
+        match self.settings.nodestore.database:
+            case "sqlite":
+                from brainiax.components.node_store.sqlite_store import (
+                    SQLiteDocumentStore,
+                    SQLiteIndexStore,
+                    SQLiteKVStore,
+                )
+
+                kvstore = SQLiteKVStore(persist_dir / SQLITE_NODE_STORE_FILE_NAME)
+                index_store = SQLiteIndexStore(kvstore)
+                doc_store = SQLiteDocumentStore(kvstore)
+
+            case "simple":
+                json_dir = stores_dir(persist_dir)
+                try:
+                    index_store = SimpleIndexStore.from_persist_dir(
+                        persist_dir=str(json_dir)
+                    )
+                except FileNotFoundError:
+                    logger.debug("Local index store not found, creating a new one")
+                    index_store = SimpleIndexStore()
+
+                try:
+                    doc_store = SimpleDocumentStore.from_persist_dir(
+                        persist_dir=str(json_dir)
+                    )
+                except FileNotFoundError:
+                    logger.debug("Local document store not found, creating a new one")
+                    doc_store = SimpleDocumentStore()
+        logger.info(
+            "Loaded the %s doc and index stores of collection=%s in %.2fs",
+            self.settings.nodestore.database,
+            collection,
+            time.perf_counter() - start,
+        )
+        return doc_store, index_store
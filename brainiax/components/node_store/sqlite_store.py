@@ -0,0 +1,235 @@
+import json
+import logging
+import sqlite3
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from llama_index.core.data_structs.data_structs import IndexStruct
+from llama_index.core.storage.docstore.keyval_docstore import KVDocumentStore
+from llama_index.core.storage.index_store.keyval_index_store import KVIndexStore
+from llama_index.core.storage.index_store.utils import index_struct_to_json
+from llama_index.core.storage.kvstore.simple_kvstore import SimpleKVStore
+from llama_index.core.storage.kvstore.types import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_COLLECTION,
+    BaseKVStore,
+)
+
+from brainiax.components.ingest.persist_scheduler import stores_dir
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteKVStore(BaseKVStore):
+    """Key-value store in a SQLite database, in WAL mode.
+
+    Values are only read from the database when looked up, instead of loading the
+    whole store in memory like `SimpleKVStore`. Changes are made in a transaction
+    that is committed by `commit`, which the doc and index stores call when they
+    are persisted: the persists grouped by the ingest component are grouped
+    commits. The callbacks added with `before_commit` write their pending changes
+    in the same transaction. This class is thread-safe.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.RLock()
+        self._before_commit: list[Callable[[], None]] = []
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS kv (
+                collection TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (collection, key)
+            ) WITHOUT ROWID;
+            """
+        )
+
+    def put(self, key: str, val: dict, collection: str = DEFAULT_COLLECTION) -> None:
+        self.put_all([(key, val)], collection=collection)
+
+    async def aput(
+        self, key: str, val: dict, collection: str = DEFAULT_COLLECTION
+    ) -> None:
+        self.put(key, val, collection)
+
+    def put_all(
+        self,
+        kv_pairs: list[tuple[str, dict]],
+        collection: str = DEFAULT_COLLECTION,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        # A single statement whatever the batch size, nothing is committed anyway
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO kv (collection, key, value) VALUES (?, ?, ?)",
+                [(collection, key, json.dumps(val)) for key, val in kv_pairs],
+            )
+
+    async def aput_all(
+        self,
+        kv_pairs: list[tuple[str, dict]],
+        collection: str = DEFAULT_COLLECTION,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        self.put_all(kv_pairs, collection, batch_size)
+
+    def get(self, key: str, collection: str = DEFAULT_COLLECTION) -> dict | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM kv WHERE collection = ? AND key = ?",
+                (collection, key),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    async def aget(
+        self, key: str, collection: str = DEFAULT_COLLECTION
+    ) -> dict | None:
+        return self.get(key, collection)
+
+    def get_all(self, collection: str = DEFAULT_COLLECTION) -> dict[str, dict]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT key, value FROM kv WHERE collection = ?", (collection,)
+            ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    async def aget_all(self, collection: str = DEFAULT_COLLECTION) -> dict[str, dict]:
+        return self.get_all(collection)
+
+    def delete(self, key: str, collection: str = DEFAULT_COLLECTION) -> bool:
+        with self._lock:
+            cursor = self._connection.execute(
+                "DELETE FROM kv WHERE collection = ? AND key = ?", (collection, key)
+            )
+        return cursor.rowcount > 0
+
+    async def adelete(self, key: str, collection: str = DEFAULT_COLLECTION) -> bool:
+        return self.delete(key, collection)
+
+    def delete_collection(self, collection: str) -> None:
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM kv WHERE collection = ?", (collection,)
+            )
+
+    def count(self, collection: str = DEFAULT_COLLECTION) -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM kv WHERE collection = ?", (collection,)
+            ).fetchone()[0]
+
+    def before_commit(self, callback: Callable[[], None]) -> None:
+        self._before_commit.append(callback)
+
+    def commit(self) -> None:
+        with self._lock:
+            for callback in self._before_commit:
+                callback()
+            self._connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self.commit()
+            self._connection.close()
+
+
+class SQLiteDocumentStore(KVDocumentStore):
+    """Document store in a `SQLiteKVStore`, persisting it commits the changes."""
+
+    def __init__(self, kvstore: SQLiteKVStore, **kwargs: Any) -> None:
+        super().__init__(kvstore, **kwargs)
+        self._sqlite_kvstore = kvstore
+
+    def persist(self, *args: Any, **kwargs: Any) -> None:
+        self._sqlite_kvstore.commit()
+
+
+class SQLiteIndexStore(KVIndexStore):
+    """Index store in a `SQLiteKVStore`, persisting it commits the changes.
+
+    The index struct of a vector store index lists all the node ids, and the index
+    adds it again after every change. Instead of serializing it on every change,
+    the added index structs are only written when the key-value store commits,
+    in the same transaction as the nodes: persisting the doc store before the
+    index store never commits nodes missing from the index struct.
+    """
+
+    def __init__(self, kvstore: SQLiteKVStore, **kwargs: Any) -> None:
+        super().__init__(kvstore, **kwargs)
+        self._sqlite_kvstore = kvstore
+        self._pending_index_structs: dict[str, IndexStruct] = {}
+        self._lock = threading.Lock()
+        kvstore.before_commit(self._write_pending_index_structs)
+
+    def add_index_struct(self, index_struct: IndexStruct) -> None:
+        with self._lock:
+            self._pending_index_structs[index_struct.index_id] = index_struct
+
+    def delete_index_struct(self, key: str) -> None:
+        # Not holding the lock, the key-value store takes it before committing
+        with self._lock:
+            self._pending_index_structs.pop(key, None)
+        super().delete_index_struct(key)
+
+    def get_index_struct(self, struct_id: str | None = None) -> IndexStruct | None:
+        with self._lock:
+            if struct_id in self._pending_index_structs:
+                return self._pending_index_structs[struct_id]
+        if struct_id is None:
+            structs = self.index_structs()
+            assert len(structs) == 1
+            return structs[0]
+        return super().get_index_struct(struct_id)
+
+    def index_structs(self) -> list[IndexStruct]:
+        with self._lock:
+            pending = dict(self._pending_index_structs)
+        stored = [
+            index_struct
+            for index_struct in super().index_structs()
+            if index_struct.index_id not in pending
+        ]
+        return stored + list(pending.values())
+
+    def _write_pending_index_structs(self) -> None:
+        with self._lock:
+            pending, self._pending_index_structs = self._pending_index_structs, {}
+        self._sqlite_kvstore.put_all(
+            [(key, index_struct_to_json(struct)) for key, struct in pending.items()],
+            collection=self._collection,
+        )
+
+    def persist(self, *args: Any, **kwargs: Any) -> None:
+        self._sqlite_kvstore.commit()
+
+
+def migrate_json_stores_to_sqlite(persist_dir: Path, kvstore: SQLiteKVStore) -> int:
+    """Copy the doc and index stores persisted as JSON in `persist_dir` to SQLite.
+
+    The collections of the JSON files are copied as they are, the JSON files are
+    left untouched. Returns the number of copied entries.
+    """
+    count = 0
+    json_dir = stores_dir(persist_dir)
+    for file_name in ("docstore.json", "index_store.json"):
+        json_path = json_dir / file_name
+        if not json_path.exists():
+            logger.info("No %s to migrate in %s", file_name, persist_dir)
+            continue
+        data = SimpleKVStore.from_persist_path(str(json_path)).to_dict()
+        for collection, values in data.items():
+            kvstore.put_all(list(values.items()), collection=collection)
+            logger.info(
+                "Migrated count=%s entries of collection=%s", len(values), collection
+            )
+            count += len(values)
+    kvstore.commit()
+    return count
@@ -0,0 +1,249 @@
+import heapq
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from collections.abc import Iterable
+from operator import itemgetter
+from pathlib import Path
+from typing import Any
+
+from llama_index.core.schema import BaseNode, MetadataMode
+from llama_index.core.vector_stores.types import MetadataFilters
+
+from brainiax.components.ingest.ingest_helper import (
+    INGESTED_AT_METADATA_KEY,
+    PAGE_NUMBER_METADATA_KEY,
+)
+from brainiax.components.vector_store.sql_filters import metadata_filters_to_sql
+
+BM25_FILE_NAME = "bm25.sqlite"
+
+# Words joined by these characters are also indexed as a single term
+_WORD = re.compile(r"\w+(?:[-./+^]\w+)*")
+# Runs of letters or of digits, the parts of a word
+_WORD_PART = re.compile(r"[^\W\d_]+|\d+")
+
+# Too frequent to tell the chunks apart, their postings would be read by most
+# searches for nothing
+STOPWORDS = frozenset(
+    """
+    a an and are as at be but by can do does for from has have how i if in is it
+    its of on or s so t that the their them there these they this to was we were
+    what when where which who why will with you your
+    """.split()
+)
+
+_BUILT = "built"
+
+
+def tokenize(text: str) -> list[str]:
+    """Terms of a text, lowercased.
+
+    A word made of several parts, like a course code or a formula name, gives a
+    term joining all its parts and a term for each part: `CS-101`, `CS101` and
+    `cs_101` all give `cs101`, `cs` and `101`, so the exact code matches any of its
+    spellings. Stopwords are dropped.
+    """
+    terms: list[str] = []
+    for word in _WORD.findall(text.lower()):
+        parts = _WORD_PART.findall(word)
+        if len(parts) > 1:
+            terms.append("".join(parts))
+        terms.extend(part for part in parts if part not in STOPWORDS)
+    return terms
+
+
+class BM25Index:
+    """Inverted index of the chunks of a collection, searched with BM25 scores.
+
+    The postings (term, chunk, frequency) and the chunks are stored in a SQLite
+    database, with the metadata used by the filters as indexed columns. A search
+    reads the postings of the terms of the query only. The index is updated when
+    chunks are added or deleted, and the changes are committed by `persist`, with
+    the grouped persists of the ingest component. This class is thread-safe.
+    """
+
+    def __init__(self, path: Path, k1: float = 1.2, b: float = 0.75) -> None:
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(
+            f"""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS nodes (
+                node_id TEXT PRIMARY KEY,
+                doc_id TEXT,
+                file_name TEXT,
+                {PAGE_NUMBER_METADATA_KEY} INTEGER,
+                {INGESTED_AT_METADATA_KEY} REAL,
+                length INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS nodes_doc_id ON nodes (doc_id);
+            CREATE INDEX IF NOT EXISTS nodes_file_name ON nodes (file_name);
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                node_id TEXT NOT NULL,
+                frequency INTEGER NOT NULL,
+                PRIMARY KEY (term, node_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_node_id ON postings (node_id);
+            CREATE TABLE IF NOT EXISTS index_info (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            """
+        )
+        # Collection statistics of the scores, kept up to date in memory
+        self._node_count, self._total_length = self._connection.execute(
+            "SELECT COUNT(*), TOTAL(length) FROM nodes"
+        ).fetchone()
+
+    @property
+    def needs_build(self) -> bool:
+        """Whether the index was just created, and misses the existing chunks."""
+        with self._lock:
+            return (
+                self._connection.execute(
+                    "SELECT value FROM index_info WHERE key = ?", (_BUILT,)
+                ).fetchone()
+                is None
+            )
+
+    def build(self, nodes: Iterable[BaseNode]) -> None:
+        """Index the chunks ingested before the index existed, committed right away."""
+        with self._lock:
+            self.add(nodes)
+            self._connection.execute(
+                "INSERT OR REPLACE INTO index_info (key, value) VALUES (?, 1)",
+                (_BUILT,),
+            )
+            self._connection.commit()
+
+    def add(self, nodes: Iterable[BaseNode]) -> None:
+        """Index chunks, replacing the previous version of the ones already indexed."""
+        node_rows: list[tuple[Any, ...]] = []
+        postings: list[tuple[str, str, int]] = []
+        for node in nodes:
+            frequencies = Counter(
+                tokenize(node.get_content(metadata_mode=MetadataMode.NONE))
+            )
+            metadata = node.metadata
+            node_rows.append(
+                (
+                    node.node_id,
+                    node.ref_doc_id,
+                    metadata.get("file_name"),
+                    metadata.get(PAGE_NUMBER_METADATA_KEY),
+                    metadata.get(INGESTED_AT_METADATA_KEY),
+                    sum(frequencies.values()),
+                )
+            )
+            postings.extend(
+                (term, node.node_id, frequency)
+                for term, frequency in frequencies.items()
+            )
+        if not node_rows:
+            return
+        with self._lock:
+            self._delete_nodes([row[0] for row in node_rows])
+            self._connection.executemany(
+                "INSERT INTO nodes (node_id, doc_id, file_name, "
+                f"{PAGE_NUMBER_METADATA_KEY}, {INGESTED_AT_METADATA_KEY}, length) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                node_rows,
+            )
+            self._connection.executemany(
+                "INSERT INTO postings (term, node_id, frequency) VALUES (?, ?, ?)",
+                postings,
+            )
+            self._node_count += len(node_rows)
+            self._total_length += sum(row[-1] for row in node_rows)
+
+    def delete(self, doc_ids: list[str]) -> None:
+        """Remove the chunks of documents from the index."""
+        with self._lock:
+            node_ids = [
+                node_id
+                for doc_id in doc_ids
+                for (node_id,) in self._connection.execute(
+                    "SELECT node_id FROM nodes WHERE doc_id = ?", (doc_id,)
+                )
+            ]
+            self._delete_nodes(node_ids)
+
+    def _delete_nodes(self, node_ids: list[str]) -> None:
+        for node_id in node_ids:
+            row = self._connection.execute(
+                "SELECT length FROM nodes WHERE node_id = ?", (node_id,)
+            ).fetchone()
+            if row is None:
+                continue
+            self._connection.execute(
+                "DELETE FROM postings WHERE node_id = ?", (node_id,)
+            )
+            self._connection.execute("DELETE FROM nodes WHERE node_id = ?", (node_id,))
+            self._node_count -= 1
+            self._total_length -= row[0]
+
+    def clear(self) -> None:
+        """Remove all the chunks from the index, committed right away."""
+        with self._lock:
+            self._connection.execute("DELETE FROM postings")
+            self._connection.execute("DELETE FROM nodes")
+            self._connection.commit()
+            self._node_count, self._total_length = 0, 0
+
+    def search(
+        self, query: str, top_k: int, filters: MetadataFilters | None = None
+    ) -> list[tuple[str, float]]:
+        """Ids and BM25 scores of the `top_k` chunks best matching the query terms."""
+        query_terms = Counter(tokenize(query))
+        if not query_terms:
+            return []
+        terms = list(query_terms)
+        placeholders = ", ".join("?" * len(terms))
+        where, params = "1", []
+        if filters is not None:
+            where, params = metadata_filters_to_sql(filters)
+        with self._lock:
+            if not self._node_count:
+                return []
+            node_count = self._node_count
+            average_length = self._total_length / node_count
+            document_frequencies = dict(
+                self._connection.execute(
+                    "SELECT term, COUNT(*) FROM postings "
+                    f"WHERE term IN ({placeholders}) GROUP BY term",
+                    terms,
+                ).fetchall()
+            )
+            rows = self._connection.execute(
+                "SELECT postings.term, postings.node_id, postings.frequency, "
+                "nodes.length FROM postings "
+                "JOIN nodes ON nodes.node_id = postings.node_id "
+                f"WHERE postings.term IN ({placeholders}) AND ({where})",
+                [*terms, *params],
+            ).fetchall()
+
+        idf = {
+            term: math.log(1 + (node_count - count + 0.5) / (count + 0.5))
+            for term, count in document_frequencies.items()
+        }
+        scores: dict[str, float] = {}
+        for term, node_id, frequency, length in rows:
+            saturation = frequency + self.k1 * (
+                1 - self.b + self.b * length / average_length
+            )
+            term_score = idf[term] * frequency * (self.k1 + 1) / saturation
+            scores[node_id] = scores.get(node_id, 0.0) + query_terms[term] * term_score
+        return heapq.nlargest(top_k, scores.items(), key=itemgetter(1))
+
+    def persist(self) -> None:
+        with self._lock:
+            self._connection.commit()
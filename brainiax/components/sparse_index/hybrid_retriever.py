@@ -0,0 +1,119 @@
+import asyncio
+from concurrent.futures import Executor
+from operator import itemgetter
+
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import BaseNode, NodeWithScore, QueryBundle
+from llama_index.core.storage.docstore import BaseDocumentStore
+from llama_index.core.vector_stores.types import MetadataFilters
+
+from brainiax.components.sparse_index.bm25_index import BM25Index
+
+
+def _normalized(scores: dict[str, float]) -> dict[str, float]:
+    """Scores rescaled between 0 (the lowest) and 1 (the highest)."""
+    if not scores:
+        return {}
+    lowest, highest = min(scores.values()), max(scores.values())
+    if highest == lowest:
+        return {node_id: 1.0 for node_id in scores}
+    return {
+        node_id: (score - lowest) / (highest - lowest)
+        for node_id, score in scores.items()
+    }
+
+
+class HybridRetriever(BaseRetriever):
+    """Fuses the results of a vector search with the ones of a BM25 search.
+
+    Both searches fetch `candidates` chunks and run concurrently, the BM25 one in
+    `executor` (or a worker thread in async code). Their scores are normalized
+    between 0 and 1 and summed with the weights `alpha` and `1 - alpha`: a chunk
+    containing the exact terms of the query comes first even if its embedding is
+    not the closest. The results of the vector search are returned as is when the
+    query has no indexed term.
+
+    `similarity_cutoff` drops the results of the vector search with a lower
+    similarity before fusing them, as the fused scores are relative to the other
+    candidates. The chunks found by the BM25 search only are kept.
+    """
+
+    def __init__(
+        self,
+        vector_retriever: BaseRetriever,
+        bm25_index: BM25Index,
+        docstore: BaseDocumentStore,
+        executor: Executor,
+        similarity_top_k: int,
+        candidates: int,
+        alpha: float,
+        filters: MetadataFilters | None = None,
+        similarity_cutoff: float | None = None,
+    ) -> None:
+        super().__init__()
+        self._vector_retriever = vector_retriever
+        self._bm25_index = bm25_index
+        self._docstore = docstore
+        self._executor = executor
+        self._similarity_top_k = similarity_top_k
+        self._candidates = candidates
+        self._alpha = alpha
+        self._filters = filters
+        self._similarity_cutoff = similarity_cutoff
+
+    def _bm25_search(self, query: str) -> list[tuple[str, float]]:
+        return self._bm25_index.search(query, self._candidates, self._filters)
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        bm25_future = self._executor.submit(self._bm25_search, query_bundle.query_str)
+        vector_results = self._vector_retriever.retrieve(query_bundle)
+        return self._fuse(vector_results, bm25_future.result())
+
+    async def _aretrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        vector_results, bm25_results = await asyncio.gather(
+            self._vector_retriever.aretrieve(query_bundle),
+            asyncio.to_thread(self._bm25_search, query_bundle.query_str),
+        )
+        # The chunks found by the BM25 search only are read from the doc store
+        return await asyncio.to_thread(self._fuse, vector_results, bm25_results)
+
+    def _fuse(
+        self,
+        vector_results: list[NodeWithScore],
+        bm25_results: list[tuple[str, float]],
+    ) -> list[NodeWithScore]:
+        if self._similarity_cutoff is not None:
+            cutoff = self._similarity_cutoff
+            vector_results = [
+                result for result in vector_results if (result.score or 0.0) >= cutoff
+            ]
+        if not bm25_results:
+            return vector_results[: self._similarity_top_k]
+
+        nodes: dict[str, BaseNode] = {
+            result.node.node_id: result.node for result in vector_results
+        }
+        vector_scores = _normalized(
+            {result.node.node_id: result.score or 0.0 for result in vector_results}
+        )
+        bm25_scores = _normalized(dict(bm25_results))
+        scores = {
+            node_id: self._alpha * vector_scores.get(node_id, 0.0)
+            + (1 - self._alpha) * bm25_scores.get(node_id, 0.0)
+            for node_id in vector_scores.keys() | bm25_scores.keys()
+        }
+
+        fused: list[NodeWithScore] = []
+        for node_id, score in sorted(
+            scores.items(), key=itemgetter(1), reverse=True
+        ):
+            node = nodes.get(node_id) or self._docstore.get_document(
+                node_id, raise_error=False
+            )
+            # Not in the doc store anymore, its deletion from the index was lost
+            if node is None:
+                continue
+            fused.append(NodeWithScore(node=node, score=score))
+            if len(fused) == self._similarity_top_k:
+                break
+        return fused
@@ -0,0 +1,67 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from injector import inject, singleton
+from llama_index.core.schema import BaseNode
+
+from brainiax.components.node_store.node_store_component import NodeStoreComponent
+from brainiax.components.sparse_index.bm25_index import BM25_FILE_NAME, BM25Index
+from brainiax.settings.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+@singleton
+class SparseIndexComponent:
+    """BM25 indexes of the collections, next to their doc stores.
+
+    An index is opened on first use. When it does not exist yet, it is built from
+    the chunks of the doc store, then the ingest component keeps it up to date.
+    `executor` runs the BM25 searches alongside the vector searches.
+    """
+
+    @inject
+    def __init__(
+        self, settings: Settings, node_store_component: NodeStoreComponent
+    ) -> None:
+        self.settings = settings
+        self.node_store_component = node_store_component
+        self.executor = ThreadPoolExecutor(thread_name_prefix="bm25-search")
+        self._indexes: dict[str, BM25Index] = {}
+        self._lock = threading.Lock()
+
+    def get_index(self, collection: str | None = None) -> BM25Index:
+        """BM25 index of a collection, the default one if not given."""
+        collection = collection or self.settings.vectorstore.default_collection
+        index = self._indexes.get(collection)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(collection)
+                if index is None:
+                    index = self._load(collection)
+                    self._indexes[collection] = index
+        return index
+
+    def _load(self, collection: str) -> BM25Index:
+        hybrid = self.settings.rag.hybrid
+        index = BM25Index(
+            self.node_store_component.persist_dir(collection) / BM25_FILE_NAME,
+            k1=hybrid.k1,
+            b=hybrid.b,
+        )
+        if index.needs_build:
+            start = time.perf_counter()
+            doc_store, _ = self.node_store_component.get_stores(collection)
+            nodes = [
+                node for node in doc_store.docs.values() if isinstance(node, BaseNode)
+            ]
+            index.build(nodes)
+            logger.info(
+                "Built the BM25 index of collection=%s from count=%s chunks in %.2fs",
+                collection,
+                len(nodes),
+                time.perf_counter() - start,
+            )
+        return index
@@ -0,0 +1,435 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any
+
+import hnswlib  # type: ignore
+import numpy as np
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    VectorStoreQuery,
+    VectorStoreQueryResult,
+)
+from llama_index.core.vector_stores.utils import (
+    metadata_dict_to_node,
+    node_to_metadata_dict,
+)
+
+from brainiax.components.ingest.ingest_helper import (
+    INGESTED_AT_METADATA_KEY,
+    PAGE_NUMBER_METADATA_KEY,
+)
+from brainiax.components.vector_store.sql_filters import metadata_filters_to_sql
+from brainiax.settings.settings import HnswlibSettings
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE_NAME = "index.bin"
+NODES_FILE_NAME = "nodes.sqlite"
+
+# Payloads are read through a memory map of the database, up to this size
+_MMAP_SIZE = 1024 * 1024 * 1024
+
+
+class HnswlibVectorStore(BasePydanticVectorStore):
+    """Vector store searching an HNSW index in the server process.
+
+    The nodes are stored in a SQLite database next to the index: their payload
+    (text and metadata) is read from disk through a memory map for the results
+    only, and the metadata used by the filters are indexed columns. Filtered
+    searches only visit the matching nodes of the graph, or compare the query with
+    all of them when there are few.
+
+    hnswlib loads the graph and the vectors in memory. Writing the index takes
+    time proportional to its size, so the grouped persists of the ingest
+    component only commit the database, which keeps the vectors added since the
+    last write of the index: they are added back to it on load. The index is
+    written once `snapshot_interval` vectors changed, and on close. This class is
+    thread-safe.
+    """
+
+    stores_text: bool = True
+    flat_metadata: bool = False
+
+    persist_dir: str
+
+    _settings: HnswlibSettings = PrivateAttr()
+    _index: Any = PrivateAttr()
+    _connection: sqlite3.Connection = PrivateAttr()
+    _lock: threading.RLock = PrivateAttr()
+    # Vectors added or deleted since the index was last written
+    _changes: int = PrivateAttr(default=0)
+    _closed: bool = PrivateAttr(default=False)
+
+    def __init__(self, persist_dir: Path, settings: HnswlibSettings) -> None:
+        super().__init__(persist_dir=str(persist_dir))
+        self._settings = settings
+        self._lock = threading.RLock()
+        persist_dir.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(
+            persist_dir / NODES_FILE_NAME, check_same_thread=False
+        )
+        self._connection.executescript(
+            f"""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA mmap_size={_MMAP_SIZE};
+            CREATE TABLE IF NOT EXISTS nodes (
+                label INTEGER PRIMARY KEY AUTOINCREMENT,
+                node_id TEXT NOT NULL UNIQUE,
+                doc_id TEXT,
+                file_name TEXT,
+                {PAGE_NUMBER_METADATA_KEY} INTEGER,
+                {INGESTED_AT_METADATA_KEY} REAL,
+                payload TEXT NOT NULL,
+                embedding BLOB
+            );
+            CREATE INDEX IF NOT EXISTS nodes_doc_id ON nodes (doc_id);
+            CREATE INDEX IF NOT EXISTS nodes_file_name ON nodes (file_name);
+            CREATE TABLE IF NOT EXISTS index_info (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            """
+        )
+        columns = [
+            row[1] for row in self._connection.execute("PRAGMA table_info(nodes)")
+        ]
+        if "embedding" not in columns:
+            # Stores written before the vectors were kept until the index is written
+            self._connection.execute("ALTER TABLE nodes ADD COLUMN embedding BLOB")
+        self._index = self._load_index()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "HnswlibVectorStore"
+
+    @property
+    def client(self) -> Any:
+        return self._index
+
+    @property
+    def _index_path(self) -> Path:
+        return Path(self.persist_dir) / INDEX_FILE_NAME
+
+    def _index_info(self, key: str) -> int | None:
+        row = self._connection.execute(
+            "SELECT value FROM index_info WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set_index_info(self, key: str, value: int) -> None:
+        self._connection.execute(
+            "INSERT OR REPLACE INTO index_info (key, value) VALUES (?, ?)",
+            (key, value),
+        )
+
+    def _load_index(self) -> Any:
+        persisted_label = self._index_info("persisted_label") or 0
+        # Nodes added after the last write of the index without their vector
+        self._connection.execute(
+            "DELETE FROM nodes WHERE label > ? AND embedding IS NULL",
+            (persisted_label,),
+        )
+        self._connection.commit()
+        dim = self._index_info("dim")
+        if dim is None:
+            return None
+        if self._index_path.exists():
+            index = hnswlib.Index(space="cosine", dim=dim)
+            index.load_index(str(self._index_path), allow_replace_deleted=True)
+            index.set_ef(self._settings.ef)
+            logger.info(
+                "Loaded the HNSW index of count=%s vectors from %s",
+                index.get_current_count(),
+                self._index_path,
+            )
+        else:
+            index = self._create_index(dim)
+
+        # Vectors of the nodes deleted after the last write of the index
+        labels = {
+            label for (label,) in self._connection.execute("SELECT label FROM nodes")
+        }
+        indexed_labels = set(index.get_ids_list())
+        for label in indexed_labels - labels:
+            try:
+                index.mark_deleted(label)
+            except RuntimeError:
+                pass  # Already deleted
+        # Vectors added after it
+        rows = [
+            (label, embedding)
+            for label, embedding in self._connection.execute(
+                "SELECT label, embedding FROM nodes "
+                "WHERE label > ? AND embedding IS NOT NULL",
+                (persisted_label,),
+            )
+            if label not in indexed_labels
+        ]
+        if rows:
+            logger.info(
+                "Adding back count=%s vectors to the HNSW index of %s",
+                len(rows),
+                self._index_path,
+            )
+            self._add_items(
+                index,
+                np.array([np.frombuffer(e, np.float32) for _, e in rows]),
+                [label for label, _ in rows],
+            )
+            self._changes = len(rows)
+        return index
+
+    def _create_index(self, dim: int) -> Any:
+        index = hnswlib.Index(space="cosine", dim=dim)
+        index.init_index(
+            max_elements=self._settings.initial_capacity,
+            ef_construction=self._settings.ef_construction,
+            M=self._settings.m,
+            allow_replace_deleted=True,
+        )
+        index.set_ef(self._settings.ef)
+        self._set_index_info("dim", dim)
+        return index
+
+    def _mark_deleted(self, labels: list[int]) -> None:
+        for label in labels:
+            self._index.mark_deleted(label)
+        self._changes += len(labels)
+
+    @staticmethod
+    def _add_items(index: Any, embeddings: np.ndarray, labels: list[int]) -> None:
+        # Deleted vectors are replaced first, the index grows only when full
+        needed = index.get_current_count() + len(labels)
+        if needed > index.get_max_elements():
+            new_capacity = max(needed, 2 * index.get_max_elements())
+            logger.info("Resizing the HNSW index to count=%s vectors", new_capacity)
+            index.resize_index(new_capacity)
+        index.add_items(embeddings, labels, replace_deleted=True)
+
+    def add(self, nodes: list[BaseNode], **add_kwargs: Any) -> list[str]:
+        if not nodes:
+            return []
+        embeddings = np.array([node.get_embedding() for node in nodes], np.float32)
+        with self._lock:
+            if self._index is None:
+                self._index = self._create_index(embeddings.shape[1])
+
+            # Nodes added again replace their previous version
+            node_ids = [node.node_id for node in nodes]
+            replaced = self._labels(
+                f"node_id IN ({', '.join('?' * len(node_ids))})", node_ids
+            )
+            if replaced:
+                self._mark_deleted(replaced)
+                self._connection.execute(
+                    "DELETE FROM nodes "
+                    f"WHERE label IN ({', '.join('?' * len(replaced))})",
+                    replaced,
+                )
+
+            labels = []
+            for node, embedding in zip(nodes, embeddings, strict=True):
+                metadata = node.metadata
+                cursor = self._connection.execute(
+                    "INSERT INTO nodes (node_id, doc_id, file_name, "
+                    f"{PAGE_NUMBER_METADATA_KEY}, {INGESTED_AT_METADATA_KEY}, payload, "
+                    "embedding) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        node.node_id,
+                        node.ref_doc_id,
+                        metadata.get("file_name"),
+                        metadata.get(PAGE_NUMBER_METADATA_KEY),
+                        metadata.get(INGESTED_AT_METADATA_KEY),
+                        json.dumps(
+                            node_to_metadata_dict(
+                                node, remove_text=False, flat_metadata=False
+                            )
+                        ),
+                        embedding.tobytes(),
+                    ),
+                )
+                labels.append(cursor.lastrowid)
+
+            self._add_items(self._index, embeddings, labels)
+            self._changes += len(labels)
+        return node_ids
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        with self._lock:
+            labels = self._labels("doc_id = ?", [ref_doc_id])
+            if self._index is not None:
+                self._mark_deleted(labels)
+            self._connection.execute(
+                "DELETE FROM nodes WHERE doc_id = ?", (ref_doc_id,)
+            )
+
+    def clear(self) -> None:
+        """Delete all the nodes and the index, persisted right away."""
+        with self._lock:
+            self._connection.execute("DELETE FROM nodes")
+            self._connection.execute("DELETE FROM index_info")
+            self._connection.commit()
+            self._index = None
+            self._changes = 0
+            self._index_path.unlink(missing_ok=True)
+
+    def _labels(self, where: str, params: list[Any]) -> list[int]:
+        return [
+            label
+            for (label,) in self._connection.execute(
+                f"SELECT label FROM nodes WHERE {where}", params
+            )
+        ]
+
+    def _exact_search(
+        self, query_embedding: np.ndarray, labels: list[int], k: int
+    ) -> tuple[list[int], list[float]]:
+        vectors = np.array(self._index.get_items(labels), np.float32)
+        similarities = vectors @ query_embedding / (
+            np.linalg.norm(vectors, axis=1) * np.linalg.norm(query_embedding) + 1e-12
+        )
+        top = np.argsort(-similarities)[:k]
+        return [labels[i] for i in top], [float(similarities[i]) for i in top]
+
+    def _graph_search(
+        self, query_embedding: np.ndarray, allowed: set[int] | None, k: int
+    ) -> tuple[list[int], list[float]]:
+        filter_function = allowed.__contains__ if allowed is not None else None
+        while k > 0:
+            try:
+                labels, distances = self._index.knn_query(
+                    query_embedding, k=k, filter=filter_function
+                )
+            except RuntimeError:
+                # Fewer than k matching vectors were reached in the graph
+                k -= 1
+                continue
+            return (
+                [int(label) for label in labels[0]],
+                [1.0 - float(distance) for distance in distances[0]],
+            )
+        return [], []
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        if query.query_embedding is None:
+            raise ValueError("The hnswlib vector store only supports dense queries")
+        query_embedding = np.array(query.query_embedding, np.float32)
+
+        where, params = "1", []
+        if query.filters is not None:
+            where, params = metadata_filters_to_sql(query.filters)
+        if query.doc_ids:
+            where += f" AND doc_id IN ({', '.join('?' * len(query.doc_ids))})"
+            params = [*params, *query.doc_ids]
+
+        with self._lock:
+            if self._index is None:
+                return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+            allowed = None
+            if where != "1":
+                allowed = self._labels(where, params)
+            if allowed is not None and (
+                len(allowed) <= self._settings.exact_search_max_candidates
+            ):
+                labels, similarities = (
+                    self._exact_search(query_embedding, allowed, query.similarity_top_k)
+                    if allowed
+                    else ([], [])
+                )
+            else:
+                # The count of the index includes the vectors marked deleted
+                live_count = (
+                    len(allowed)
+                    if allowed is not None
+                    else self._connection.execute(
+                        "SELECT COUNT(*) FROM nodes"
+                    ).fetchone()[0]
+                )
+                k = min(query.similarity_top_k, live_count)
+                labels, similarities = self._graph_search(
+                    query_embedding, set(allowed) if allowed is not None else None, k
+                )
+            payloads = dict(
+                self._connection.execute(
+                    "SELECT label, payload FROM nodes "
+                    f"WHERE label IN ({', '.join('?' * len(labels))})",
+                    labels,
+                ).fetchall()
+            )
+
+        nodes = []
+        node_similarities = []
+        for label, similarity in zip(labels, similarities, strict=True):
+            # Vectors persisted without their node are skipped
+            if label not in payloads:
+                continue
+            nodes.append(metadata_dict_to_node(json.loads(payloads[label])))
+            node_similarities.append(similarity)
+        return VectorStoreQueryResult(
+            nodes=nodes,
+            similarities=node_similarities,
+            ids=[node.node_id for node in nodes],
+        )
+
+    async def aquery(
+        self, query: VectorStoreQuery, **kwargs: Any
+    ) -> VectorStoreQueryResult:
+        # The search is CPU bound, do not block the event loop
+        return await asyncio.to_thread(self.query, query, **kwargs)
+
+    def persist(self, persist_path: str, fs: Any = None) -> None:
+        """Commit the changes, `persist_path` is ignored.
+
+        The index is written too once `snapshot_interval` vectors changed since it
+        was last written. Does nothing once closed: closing wrote the changes, and
+        the stores persisted along with this one must still be written.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._connection.commit()
+            if self._changes and self._changes >= self._settings.snapshot_interval:
+                self._write_index()
+
+    def _write_index(self) -> None:
+        """Write the index, and the last label in it once written.
+
+        After a crash in between, the vectors of the nodes added in the meantime
+        are added back on load.
+        """
+        if self._index is None:
+            return
+        tmp_path = self._index_path.with_suffix(".tmp")
+        self._index.save_index(str(tmp_path))
+        os.replace(tmp_path, self._index_path)
+        last_label = self._connection.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'nodes'"
+        ).fetchone()
+        persisted_label = last_label[0] if last_label else 0
+        self._set_index_info("persisted_label", persisted_label)
+        # The vectors are now read from the index
+        self._connection.execute(
+            "UPDATE nodes SET embedding = NULL "
+            "WHERE label <= ? AND embedding IS NOT NULL",
+            (persisted_label,),
+        )
+        self._connection.commit()
+        self._changes = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._connection.commit()
+            if self._changes:
+                self._write_index()
+            self._connection.close()
+            self._closed = True
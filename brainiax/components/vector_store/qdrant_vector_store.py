@@ -0,0 +1,341 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, cast
+
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.vector_stores.types import (
+    VectorStoreQuery,
+    VectorStoreQueryMode,
+    VectorStoreQueryResult,
+)
+from llama_index.vector_stores.qdrant import QdrantVectorStore  # type: ignore
+from qdrant_client import QdrantClient  # type: ignore
+from qdrant_client.http import models as rest  # type: ignore
+
+from brainiax.components.ingest.ingest_helper import (
+    INGESTED_AT_METADATA_KEY,
+    PAGE_NUMBER_METADATA_KEY,
+)
+from brainiax.open_ai.extensions.context_filter import ContextFilter
+from brainiax.settings.settings import QdrantSettings
+
+logger = logging.getLogger(__name__)
+
+# Payload fields filtered on by `ContextFilter`. With a payload index, Qdrant
+# filters while searching the HNSW graph (or plans a search of the few matching
+# points) instead of checking the payload of every candidate.
+PAYLOAD_INDEXES: dict[str, rest.PayloadSchemaType] = {
+    "doc_id": rest.PayloadSchemaType.KEYWORD,
+    "file_name": rest.PayloadSchemaType.KEYWORD,
+    PAGE_NUMBER_METADATA_KEY: rest.PayloadSchemaType.INTEGER,
+    INGESTED_AT_METADATA_KEY: rest.PayloadSchemaType.INTEGER,
+}
+
+
+def create_payload_indexes(client: QdrantClient, collection_name: str) -> None:
+    """Create the missing payload indexes of `PAYLOAD_INDEXES` on a collection."""
+    payload_schema = client.get_collection(collection_name).payload_schema
+    for field_name, field_schema in PAYLOAD_INDEXES.items():
+        if field_name in payload_schema:
+            continue
+        logger.info(
+            "Creating the payload index of field=%s on collection=%s",
+            field_name,
+            collection_name,
+        )
+        client.create_payload_index(
+            collection_name, field_name, field_schema=field_schema, wait=True
+        )
+
+
+def context_filter_to_qdrant_filter(
+    context_filter: ContextFilter | None,
+) -> rest.Filter | None:
+    """Translate a context filter into the conditions of a Qdrant search."""
+    if context_filter is None:
+        return None
+
+    must: list[rest.Condition] = []
+    if context_filter.docs_ids:
+        must.append(
+            rest.FieldCondition(
+                key="doc_id", match=rest.MatchAny(any=context_filter.docs_ids)
+            )
+        )
+    if context_filter.file_names:
+        must.append(
+            rest.FieldCondition(
+                key="file_name", match=rest.MatchAny(any=context_filter.file_names)
+            )
+        )
+    if context_filter.page_ranges:
+        must.append(
+            rest.Filter(
+                should=[
+                    rest.FieldCondition(
+                        key=PAGE_NUMBER_METADATA_KEY,
+                        range=rest.Range(gte=page_range.first, lte=page_range.last),
+                    )
+                    for page_range in context_filter.page_ranges
+                ]
+            )
+        )
+    if context_filter.ingested_after or context_filter.ingested_before:
+        must.append(
+            rest.FieldCondition(
+                key=INGESTED_AT_METADATA_KEY,
+                range=rest.Range(
+                    gte=(
+                        context_filter.ingested_after.timestamp()
+                        if context_filter.ingested_after
+                        else None
+                    ),
+                    lte=(
+                        context_filter.ingested_before.timestamp()
+                        if context_filter.ingested_before
+                        else None
+                    ),
+                ),
+            )
+        )
+    return rest.Filter(must=must) if must else None
+
+
+def _changed_fields(current: Any, desired: dict[str, Any]) -> dict[str, Any]:
+    """The fields of `desired` that differ from the attributes of `current`."""
+    changed = {}
+    for field, value in desired.items():
+        current_value = getattr(current, field, None)
+        if isinstance(value, bool):
+            # Qdrant reports the unset flags as None
+            current_value = bool(current_value)
+        if current_value != value:
+            changed[field] = value
+    return changed
+
+
+@dataclass
+class QdrantCollectionConfig:
+    """Parameters of a collection and of its searches, from `QdrantSettings`.
+
+    The fields set to None keep the Qdrant defaults.
+    """
+
+    quantization_config: rest.QuantizationConfig | None = None
+    hnsw_config: rest.HnswConfigDiff | None = None
+    optimizers_config: rest.OptimizersConfigDiff | None = None
+    on_disk_vectors: bool | None = None
+    on_disk_payload: bool | None = None
+    search_params: rest.SearchParams | None = None
+
+    @classmethod
+    def from_settings(cls, settings: QdrantSettings) -> "QdrantCollectionConfig":
+        quantization = settings.quantization
+        quantization_config: rest.QuantizationConfig | None = None
+        match quantization.mode:
+            case "scalar":
+                quantization_config = rest.ScalarQuantization(
+                    scalar=rest.ScalarQuantizationConfig(
+                        type=rest.ScalarType.INT8,
+                        quantile=quantization.quantile,
+                        always_ram=quantization.always_ram,
+                    )
+                )
+            case "binary":
+                quantization_config = rest.BinaryQuantization(
+                    binary=rest.BinaryQuantizationConfig(
+                        always_ram=quantization.always_ram
+                    )
+                )
+
+        hnsw = settings.hnsw.model_dump(exclude_none=True, exclude={"ef"})
+        optimizers = settings.optimizers.model_dump(exclude_none=True)
+
+        search_params = None
+        if quantization_config is not None or settings.hnsw.ef is not None:
+            search_params = rest.SearchParams(
+                hnsw_ef=settings.hnsw.ef,
+                quantization=(
+                    rest.QuantizationSearchParams(
+                        rescore=quantization.rescore,
+                        oversampling=quantization.oversampling,
+                    )
+                    if quantization_config is not None
+                    else None
+                ),
+            )
+        return cls(
+            quantization_config=quantization_config,
+            hnsw_config=rest.HnswConfigDiff(**hnsw) if hnsw else None,
+            optimizers_config=(
+                rest.OptimizersConfigDiff(**optimizers) if optimizers else None
+            ),
+            on_disk_vectors=settings.storage.on_disk_vectors,
+            on_disk_payload=settings.storage.on_disk_payload,
+            search_params=search_params,
+        )
+
+    def updates(self, collection: rest.CollectionInfo) -> dict[str, Any]:
+        """Arguments of `update_collection` applying this config to a collection.
+
+        Empty if the collection already has this config.
+        """
+        config = collection.config
+        updates: dict[str, Any] = {}
+        if config.quantization_config != self.quantization_config:
+            updates["quantization_config"] = (
+                self.quantization_config or rest.Disabled.DISABLED
+            )
+        if self.hnsw_config is not None:
+            hnsw = _changed_fields(
+                config.hnsw_config, self.hnsw_config.model_dump(exclude_none=True)
+            )
+            if hnsw:
+                updates["hnsw_config"] = rest.HnswConfigDiff(**hnsw)
+        if self.optimizers_config is not None:
+            optimizers = _changed_fields(
+                config.optimizer_config,
+                self.optimizers_config.model_dump(exclude_none=True),
+            )
+            if optimizers:
+                updates["optimizers_config"] = rest.OptimizersConfigDiff(**optimizers)
+        vectors = config.params.vectors
+        if (
+            self.on_disk_vectors is not None
+            # The collections of the store have a single unnamed vector
+            and isinstance(vectors, rest.VectorParams)
+            and bool(vectors.on_disk) != self.on_disk_vectors
+        ):
+            updates["vectors_config"] = {
+                "": rest.VectorParamsDiff(on_disk=self.on_disk_vectors)
+            }
+        if (
+            self.on_disk_payload is not None
+            and bool(config.params.on_disk_payload) != self.on_disk_payload
+        ):
+            updates["collection_params"] = rest.CollectionParamsDiff(
+                on_disk_payload=self.on_disk_payload
+            )
+        return updates
+
+
+def apply_collection_config(
+    client: QdrantClient, collection_name: str, config: QdrantCollectionConfig
+) -> list[str]:
+    """Update a collection to the given config, returns the names of the changes.
+
+    Qdrant rebuilds the changed structures (quantized vectors, HNSW graph, on disk
+    storage) of the existing points in the background, the collection stays
+    searchable meanwhile.
+    """
+    updates = config.updates(client.get_collection(collection_name))
+    if updates:
+        client.update_collection(collection_name, **updates)
+    return list(updates)
+
+
+class IndexedQdrantVectorStore(QdrantVectorStore):
+    """Qdrant vector store managing the configuration of its collection.
+
+    The payload indexes and `collection_config` are applied when the collection is
+    created. When the store is opened, the missing payload indexes are added to an
+    existing collection, and a warning is logged if its config is outdated.
+    """
+
+    _create_payload_indexes: bool = PrivateAttr()
+    _collection_config: QdrantCollectionConfig | None = PrivateAttr()
+
+    def __init__(
+        self,
+        *args: Any,
+        payload_indexes: bool = True,
+        collection_config: QdrantCollectionConfig | None = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self._create_payload_indexes = payload_indexes
+        self._collection_config = collection_config
+        if self._collection_initialized:
+            if payload_indexes:
+                create_payload_indexes(self.client, self.collection_name)
+            if collection_config is not None:
+                collection = self.client.get_collection(self.collection_name)
+                outdated = list(collection_config.updates(collection))
+                if outdated:
+                    logger.warning(
+                        "The config=%s of collection=%s differs from the settings, "
+                        "update it with `python -m brainiax.migrate_vector_store`",
+                        outdated,
+                        self.collection_name,
+                    )
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "IndexedQdrantVectorStore"
+
+    def _create_collection(self, collection_name: str, vector_size: int) -> None:
+        super()._create_collection(collection_name, vector_size)
+        if self._create_payload_indexes:
+            create_payload_indexes(self.client, collection_name)
+        if self._collection_config is not None:
+            apply_collection_config(
+                self.client, collection_name, self._collection_config
+            )
+
+    def _search_params(self, query: VectorStoreQuery) -> rest.SearchParams | None:
+        """Search params of a dense search, None for the other searches."""
+        if (
+            self._collection_config is None
+            or self.enable_hybrid
+            or query.mode != VectorStoreQueryMode.DEFAULT
+        ):
+            return None
+        return self._collection_config.search_params
+
+    def query(
+        self,
+        query: VectorStoreQuery,
+        **kwargs: Any,
+    ) -> VectorStoreQueryResult:
+        search_params = self._search_params(query)
+        if search_params is None:
+            return super().query(query, **kwargs)
+
+        # Same dense search as `QdrantVectorStore`, with the search params
+        query_filter = kwargs.get("qdrant_filters")
+        if query_filter is None:
+            query_filter = self._build_query_filter(query)
+        response = self.client.search(
+            collection_name=self.collection_name,
+            query_vector=cast(list[float], query.query_embedding),
+            limit=query.similarity_top_k,
+            query_filter=query_filter,
+            search_params=search_params,
+        )
+        return self.parse_to_query_result(response)
+
+    async def aquery(
+        self,
+        query: VectorStoreQuery,
+        **kwargs: Any,
+    ) -> VectorStoreQueryResult:
+        if self._aclient is None:
+            # The local Qdrant has no async client, do not block the event loop
+            return await asyncio.to_thread(self.query, query, **kwargs)
+
+        search_params = self._search_params(query)
+        if search_params is None:
+            return await super().aquery(query, **kwargs)
+
+        query_filter = kwargs.get("qdrant_filters")
+        if query_filter is None:
+            query_filter = self._build_query_filter(query)
+        response = await self._aclient.search(
+            collection_name=self.collection_name,
+            query_vector=cast(list[float], query.query_embedding),
+            limit=query.similarity_top_k,
+            query_filter=query_filter,
+            search_params=search_params,
+        )
+        return self.parse_to_query_result(response)
@@ -0,0 +1,68 @@
+"""Filters of the nodes stored in SQLite tables, by the hnswlib and BM25 indexes."""
+from typing import Any
+
+from llama_index.core.vector_stores.types import (
+    FilterCondition,
+    FilterOperator,
+    MetadataFilter,
+    MetadataFilters,
+)
+
+from brainiax.components.ingest.ingest_helper import (
+    INGESTED_AT_METADATA_KEY,
+    PAGE_NUMBER_METADATA_KEY,
+)
+
+# Metadata stored in their own indexed columns, the ones the filters can use
+FILTER_COLUMNS = (
+    "doc_id",
+    "file_name",
+    PAGE_NUMBER_METADATA_KEY,
+    INGESTED_AT_METADATA_KEY,
+)
+
+_SQL_OPERATORS = {
+    FilterOperator.EQ: "=",
+    FilterOperator.NE: "!=",
+    FilterOperator.GT: ">",
+    FilterOperator.GTE: ">=",
+    FilterOperator.LT: "<",
+    FilterOperator.LTE: "<=",
+    FilterOperator.IN: "IN",
+    FilterOperator.NIN: "NOT IN",
+}
+
+
+def _filter_to_sql(metadata_filter: MetadataFilter) -> tuple[str, list[Any]]:
+    if metadata_filter.key not in FILTER_COLUMNS:
+        raise ValueError(
+            f"Cannot filter on {metadata_filter.key}, "
+            f"only on {', '.join(FILTER_COLUMNS)}"
+        )
+    operator = _SQL_OPERATORS.get(metadata_filter.operator)
+    if operator is None:
+        raise ValueError(
+            f"The filter operator {metadata_filter.operator} is not supported"
+        )
+    if metadata_filter.operator in (FilterOperator.IN, FilterOperator.NIN):
+        values = list(metadata_filter.value)  # type: ignore[arg-type]
+        placeholders = ", ".join("?" * len(values))
+        return f"{metadata_filter.key} {operator} ({placeholders})", values
+    return f"{metadata_filter.key} {operator} ?", [metadata_filter.value]
+
+
+def metadata_filters_to_sql(filters: MetadataFilters) -> tuple[str, list[Any]]:
+    """Translate metadata filters into the WHERE clause of a query of the nodes."""
+    clauses: list[str] = []
+    params: list[Any] = []
+    for metadata_filter in filters.filters:
+        if isinstance(metadata_filter, MetadataFilters):
+            clause, clause_params = metadata_filters_to_sql(metadata_filter)
+        else:
+            clause, clause_params = _filter_to_sql(metadata_filter)
+        clauses.append(f"({clause})")
+        params.extend(clause_params)
+    if not clauses:
+        return "1", params
+    joiner = " OR " if filters.condition == FilterCondition.OR else " AND "
+    return joiner.join(clauses), params
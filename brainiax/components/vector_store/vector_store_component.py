@@ -1,35 +1,114 @@
 import logging
+import threading
+import time
 import typing
 
 from injector import inject, singleton
 from llama_index.core.indices.vector_store import VectorIndexRetriever, VectorStoreIndex
 from llama_index.core.vector_stores.types import (
    FilterCondition,
+   FilterOperator,
    MetadataFilter,
    MetadataFilters,
    VectorStore,
 )
 
+from brainiax.components.ingest.ingest_helper import (
+   INGESTED_AT_METADATA_KEY,
+   PAGE_NUMBER_METADATA_KEY,
+)
 from brainiax.open_ai.extensions.context_filter import ContextFilter
 from brainiax.paths import local_data_path
 from brainiax.settings.settings import Settings
 
 logger = logging.getLogger(__name__)
 
-def _doc_id_metadata_filter(
+# Settings of the Qdrant collection, not arguments of the Qdrant client
+_QDRANT_COLLECTION_SETTINGS = {
+   "connection_pool_size",
+   "quantization",
+   "hnsw",
+   "storage",
+   "optimizers",
+}
+
+
+def _is_local_qdrant(settings: Settings) -> bool:
+   return settings.qdrant is not None and (
+       settings.qdrant.path is not None or settings.qdrant.location == ":memory:"
+   )
+
+
+def context_metadata_filters(
    context_filter: ContextFilter | None,
-) -> MetadataFilters:
+) -> MetadataFilters | None:
    """
-   Creates metadata filters for restricting retrieval to specific document IDs.
+   Creates metadata filters restricting retrieval to the chunks matching a context
+   filter, for the vector stores without native filters.
    """
 
-   filters = MetadataFilters(filters=[], condition=FilterCondition.OR)
+   if context_filter is None:
+       return None
 
-   if context_filter and context_filter.docs_ids:
-       for doc_id in context_filter.docs_ids:
-           filters.filters.append(MetadataFilter(key="doc_id", value=doc_id))
+   filters: list[MetadataFilter | MetadataFilters] = []
+   if context_filter.docs_ids:
+       filters.append(
+           MetadataFilter(
+               key="doc_id", value=context_filter.docs_ids, operator=FilterOperator.IN
+           )
+       )
+   if context_filter.file_names:
+       filters.append(
+           MetadataFilter(
+               key="file_name",
+               value=context_filter.file_names,
+               operator=FilterOperator.IN,
+           )
+       )
+   if context_filter.page_ranges:
+       filters.append(
+           MetadataFilters(
+               filters=[
+                   MetadataFilters(
+                       filters=[
+                           MetadataFilter(
+                               key=PAGE_NUMBER_METADATA_KEY,
+                               value=page_range.first,
+                               operator=FilterOperator.GTE,
+                           ),
+                           MetadataFilter(
+                               key=PAGE_NUMBER_METADATA_KEY,
+                               value=page_range.last,
+                               operator=FilterOperator.LTE,
+                           ),
+                       ],
+                       condition=FilterCondition.AND,
+                   )
+                   for page_range in context_filter.page_ranges
+               ],
+               condition=FilterCondition.OR,
+           )
+       )
+   if context_filter.ingested_after:
+       filters.append(
+           MetadataFilter(
+               key=INGESTED_AT_METADATA_KEY,
+               value=context_filter.ingested_after.timestamp(),
+               operator=FilterOperator.GTE,
+           )
+       )
+   if context_filter.ingested_before:
+       filters.append(
+           MetadataFilter(
+               key=INGESTED_AT_METADATA_KEY,
+               value=context_filter.ingested_before.timestamp(),
+               operator=FilterOperator.LTE,
+           )
+       )
 
-   return filters
+   if not filters:
+       return None
+   return MetadataFilters(filters=filters, condition=FilterCondition.AND)
 
 
 @singleton
@@ -37,44 +116,165 @@ class VectorStoreComponent:
    """
    This class manages the connection and interaction with the vector store.
 
+   Every collection of documents has its own vector store, created on first use
+   and cached, and all of them share a single Qdrant client and its pool of
+   connections. A search only goes through the vectors of its collection. With
+   the `hnswlib` database, each collection has its own HNSW index in the local
+   data folder instead.
+
+   The client is connected on first use: a local Qdrant loads all its points
+   when opened, which would slow down the boot of the server.
+
    Attributes:
        settings (Settings): The application settings object.
-       vector_store (VectorStore): The loaded vector store instance.
+       vector_store (VectorStore): The vector store of the default collection.
    """
 
    settings: Settings
-   vector_store: VectorStore
 
    @inject
    def __init__(self, settings: Settings) -> None:
        """
-       Initializes the vector store based on the provided settings.
+       Initializes the vector store component, the connection is made on first use.
        """
 
        self.settings = settings
+       self._client: typing.Any = None
+       self._async_client: typing.Any = None
+       self._vector_stores: dict[str, VectorStore] = {}
+       self._lock = threading.Lock()
+
+   @property
+   def vector_store(self) -> VectorStore:
+       return self.get_vector_store()
+
+   def get_vector_store(self, collection: str | None = None) -> VectorStore:
+       """
+       Returns the vector store of a collection, the default one if not given.
+
+       The collection itself is created by the first ingestion into it.
+       """
+
+       collection = collection or self.settings.vectorstore.default_collection
+       vector_store = self._vector_stores.get(collection)
+       if vector_store is None:
+           with self._lock:
+               vector_store = self._vector_stores.get(collection)
+               if vector_store is None:
+                   vector_store = self._create_vector_store(collection)
+                   self._vector_stores[collection] = vector_store
+       return vector_store
+
+   def _client_kwargs(self) -> dict[str, typing.Any]:
+       """
+       Arguments of the sync and async Qdrant clients.
+       """
+
+       settings = self.settings
+       if settings.qdrant is None:
+           logger.info(
+               "Qdrant config not found. Using default settings. "
+               "Trying to connect to Qdrant at localhost:6333."
+           )
+           return {}
+
+       client_kwargs = settings.qdrant.model_dump(
+           exclude_none=True, exclude=_QDRANT_COLLECTION_SETTINGS
+       )
+       if settings.qdrant.connection_pool_size is not None and not _is_local_qdrant(
+           settings
+       ):
+           import httpx
+
+           client_kwargs["limits"] = httpx.Limits(
+               max_connections=settings.qdrant.connection_pool_size,
+               max_keepalive_connections=settings.qdrant.connection_pool_size,
+           )
+       return client_kwargs
+
+   def _get_client(self) -> typing.Any:
+       """
+       Connects the Qdrant client shared by all the collections.
+       """
+
+       if self._client is not None:
+           return self._client
 
        try:
-           from llama_index.vector_stores.qdrant import QdrantVectorStore  # type: ignore
            from qdrant_client import QdrantClient  # type: ignore
        except ImportError as e:
            raise ImportError(
                "Qdrant dependencies not found, install with `poetry install --extras vector-stores-qdrant`"
            ) from e
 
-       if settings.qdrant is None:
-           logger.info(
-               "Qdrant config not found. Using default settings. "
-               "Trying to connect to Qdrant at localhost:6333."
+       start = time.perf_counter()
+       self._client = QdrantClient(**self._client_kwargs())
+       logger.info(
+           "Connected to the vector store in %.2fs", time.perf_counter() - start
+       )
+       return self._client
+
+   def _get_async_client(self) -> typing.Any:
+       """
+       Creates the async Qdrant client shared by all the collections, used by the
+       async searches so that concurrent queries do not wait for one another.
+
+       None for the local Qdrant: a second client cannot open its storage, its
+       async searches run the sync client in a worker thread instead.
+       """
+
+       if self._async_client is None and not _is_local_qdrant(self.settings):
+           from qdrant_client import AsyncQdrantClient  # type: ignore
+
+           self._async_client = AsyncQdrantClient(**self._client_kwargs())
+       return self._async_client
+
+   def _create_vector_store(self, collection: str) -> VectorStore:
+       """
+       Creates the vector store of a collection based on the provided settings.
+       """
+
+       if self.settings.vectorstore.database == "hnswlib":
+           try:
+               from brainiax.components.vector_store.hnswlib_vector_store import (
+                   HnswlibVectorStore,
+               )
+           except ImportError as e:
+               raise ImportError(
+                   "hnswlib is required by the hnswlib vector store, install it with "
+                   "`poetry install --extras vector-stores-hnswlib`"
+               ) from e
+
+           logger.debug("Opening the HNSW index of collection=%s", collection)
+           return typing.cast(
+               VectorStore,
+               HnswlibVectorStore(
+                   local_data_path / "hnswlib" / collection,
+                   self.settings.hnswlib,
+               ),
            )
-           client = QdrantClient()
-       else:
-           client = QdrantClient(**settings.qdrant.model_dump(exclude_none=True))
 
-       self.vector_store = typing.cast(
+       from brainiax.components.vector_store.qdrant_vector_store import (
+           IndexedQdrantVectorStore,
+           QdrantCollectionConfig,
+       )
+
+       settings = self.settings
+       collection_config = None
+       if settings.qdrant is not None and not _is_local_qdrant(settings):
+           collection_config = QdrantCollectionConfig.from_settings(settings.qdrant)
+
+       logger.debug("Opening the vector store of collection=%s", collection)
+       return typing.cast(
            VectorStore,
-           QdrantVectorStore(
-               client=client,
-               collection_name="make_this_parameterizable_per_api_call",  # TODO
+           IndexedQdrantVectorStore(
+               client=self._get_client(),
+               aclient=self._get_async_client(),
+               collection_name=collection,
+               # Payload indexes and collection configs have no effect in the
+               # local Qdrant
+               payload_indexes=not _is_local_qdrant(settings),
+               collection_config=collection_config,
            ),
        )
 
@@ -88,21 +288,45 @@ class VectorStoreComponent:
        Creates a retriever for the given index, handling potential filtering for Qdrant and other vector stores.
        """
 
+       if self.settings.vectorstore.database == "qdrant":
+           from brainiax.components.vector_store.qdrant_vector_store import (
+               context_filter_to_qdrant_filter,
+           )
+
+           # Native Qdrant conditions, evaluated with the payload indexes during
+           # the search
+           qdrant_filter = context_filter_to_qdrant_filter(context_filter)
+           return VectorIndexRetriever(
+               index=index,
+               similarity_top_k=similarity_top_k,
+               vector_store_kwargs=(
+                   {"qdrant_filters": qdrant_filter} if qdrant_filter else {}
+               ),
+           )
+
        return VectorIndexRetriever(
            index=index,
            similarity_top_k=similarity_top_k,
-           doc_ids=context_filter.docs_ids if context_filter else None,
-           filters=(
-               _doc_id_metadata_filter(context_filter)
-               if self.settings.vectorstore.database != "qdrant"
-               else None
-           ),
+           filters=context_metadata_filters(context_filter),
        )
 
    def close(self) -> None:
        """
-       Closes the vector store client if it has a close method.
+       Closes the Qdrant clients shared by the vector stores, and the vector stores
+       holding files open (hnswlib), writing their pending changes.
+       """
+
+       if self._client is not None:
+           self._client.close()
+       for vector_store in self._vector_stores.values():
+           if hasattr(vector_store, "close"):
+               vector_store.close()
+
+   async def aclose(self) -> None:
+       """
+       Closes the Qdrant clients shared by the vector stores, from the event loop.
        """
 
-       if hasattr(self.vector_store.client, "close"):
-           self.vector_store.client.close()
+       if self._async_client is not None:
+           await self._async_client.close()
+       self.close()
@@ -1,3 +1,7 @@
 from pathlib import Path
 
 PROJECT_ROOT_PATH: Path = Path(__file__).parents[1]
+
+# Names of the collections of ingested documents, used as Qdrant collection and
+# directory names
+COLLECTION_NAME_PATTERN = r"^[A-Za-z0-9_-]{1,64}$"
@@ -1,6 +1,7 @@
 """This file should be imported only and only if you want to run the UI locally."""
 import itertools
 import logging
+import re
 import time
 from collections.abc import Iterable
 from pathlib import Path
@@ -13,7 +14,7 @@ from injector import inject, singleton
 from llama_index.core.llms import ChatMessage, ChatResponse, MessageRole
 from pydantic import BaseModel
 
-from brainiax.constants import PROJECT_ROOT_PATH
+from brainiax.constants import COLLECTION_NAME_PATTERN, PROJECT_ROOT_PATH
 from brainiax.di import global_injector
 from brainiax.open_ai.extensions.context_filter import ContextFilter
 from brainiax.server.chat.chat_service import ChatService, CompletionGen
@@ -77,13 +78,19 @@ class BrainiaxUi:
         # Cache the UI blocks
         self._ui_block = None
 
-        self._selected_filename = None
-
         # Initialize system prompt based on default mode
         self.mode = MODES[0]
         self._system_prompt = self._get_default_system_prompt(self.mode)
 
-    def _chat(self, message: str, history: list[list[str]], mode: str, *_: Any) -> Any:
+    def _chat(
+        self,
+        message: str,
+        history: list[list[str]],
+        mode: str,
+        collection: str | None,
+        selected_file: str | None,
+        *_: Any,
+    ) -> Any:
         def yield_deltas(completion_gen: CompletionGen) -> Iterable[str]:
             full_response: str = ""
             stream = completion_gen.response
@@ -146,20 +153,14 @@ class BrainiaxUi:
 
                 # Use only the selected file for the query
                 context_filter = None
-                if self._selected_filename is not None:
-                    docs_ids = []
-                    for ingested_document in self._ingest_service.list_ingested():
-                        if (
-                            ingested_document.doc_metadata["file_name"]
-                            == self._selected_filename
-                        ):
-                            docs_ids.append(ingested_document.doc_id)
-                    context_filter = ContextFilter(docs_ids=docs_ids)
+                if selected_file is not None:
+                    context_filter = ContextFilter(file_names=[selected_file])
 
                 query_stream = self._chat_service.stream_chat(
                     messages=all_messages,
                     use_context=True,
                     context_filter=context_filter,
+                    collection=collection,
                 )
                 yield from yield_deltas(query_stream)
             case "LLM Chat (no context from files)":
@@ -171,7 +172,10 @@ class BrainiaxUi:
 
             case "Search Files":
                 response = self._chunks_service.retrieve_relevant(
-                    text=message, limit=4, prev_next_chunks=0
+                    text=message,
+                    limit=4,
+                    prev_next_chunks=0,
+                    collection=collection,
                 )
 
                 sources = Source.curate_sources(response)
@@ -214,84 +218,110 @@ class BrainiaxUi:
         else:
             return gr.update(placeholder=self._system_prompt, interactive=False)
 
-    def _list_ingested_files(self) -> list[list[str]]:
-        files = set()
-        for ingested_document in self._ingest_service.list_ingested():
-            if ingested_document.doc_metadata is None:
-                # Skipping documents without metadata
-                continue
-            file_name = ingested_document.doc_metadata.get(
-                "file_name", "[FILE NAME MISSING]"
+    def _set_collection(self, collection_input: str, collection: str | None) -> Any:
+        new_collection = collection_input.strip() or None
+        if new_collection is not None and not re.match(
+            COLLECTION_NAME_PATTERN, new_collection
+        ):
+            gr.Warning(
+                f"Invalid collection name {new_collection!r}, only letters, digits, "
+                "'_' and '-' are allowed"
             )
-            files.add(file_name)
-        return [[row] for row in files]
+            new_collection = collection
+        logger.info("Setting collection to: %s", new_collection)
+        return [
+            new_collection,
+            None,
+            gr.List(self._list_ingested_files(new_collection)),
+            gr.components.Button(interactive=False),
+            gr.components.Button(interactive=False),
+            gr.components.Textbox("All files"),
+        ]
+
+    def _list_ingested_files(self, collection: str | None = None) -> list[list[str]]:
+        return [
+            [file_name]
+            for file_name in self._ingest_service.list_ingested_file_names(collection)
+        ]
 
-    def _upload_file(self, files: list[str]) -> None:
+    def _upload_file(self, files: list[str], collection: str | None) -> None:
         logger.debug("Loading count=%s files", len(files))
-        paths = [Path(file) for file in files]
+        paths = []
+        for path in [Path(file) for file in files]:
+            # Re-uploading an unchanged file is a no-op, avoid parsing and embedding it
+            if self._ingest_service.find_ingested(path.name, path, collection):
+                logger.info("File=%s is unchanged, skipping it", path.name)
+                continue
+            paths.append(path)
+        if not paths:
+            return
 
         # remove all existing Documents with name identical to a new file upload:
-        file_names = [path.name for path in paths]
-        doc_ids_to_delete = []
-        for ingested_document in self._ingest_service.list_ingested():
-            if (
-                ingested_document.doc_metadata
-                and ingested_document.doc_metadata["file_name"] in file_names
-            ):
-                doc_ids_to_delete.append(ingested_document.doc_id)
+        doc_ids_to_delete = [
+            ingested_document.doc_id
+            for path in paths
+            for ingested_document in self._ingest_service.find_ingested_by_file_name(
+                path.name, collection
+            )
+        ]
         if len(doc_ids_to_delete) > 0:
             logger.info(
                 "Uploading file(s) which were already ingested: %s document(s) will be replaced.",
                 len(doc_ids_to_delete),
             )
-            for doc_id in doc_ids_to_delete:
-                self._ingest_service.delete(doc_id)
+            self._ingest_service.bulk_delete(doc_ids_to_delete, collection)
 
-        self._ingest_service.bulk_ingest([(str(path.name), path) for path in paths])
+        self._ingest_service.bulk_ingest(
+            [(str(path.name), path) for path in paths], collection
+        )
 
-    def _delete_all_files(self) -> Any:
-        ingested_files = self._ingest_service.list_ingested()
-        logger.debug("Deleting count=%s files", len(ingested_files))
-        for ingested_document in ingested_files:
-            self._ingest_service.delete(ingested_document.doc_id)
+    def _delete_all_files(self, collection: str | None) -> Any:
+        logger.debug("Deleting all the files")
+        self._ingest_service.reset(collection)
         return [
-            gr.List(self._list_ingested_files()),
+            None,
+            gr.List(self._list_ingested_files(collection)),
             gr.components.Button(interactive=False),
             gr.components.Button(interactive=False),
             gr.components.Textbox("All files"),
         ]
 
-    def _delete_selected_file(self) -> Any:
-        logger.debug("Deleting selected %s", self._selected_filename)
-        # Note: keep looping for pdf's (each page became a Document)
-        for ingested_document in self._ingest_service.list_ingested():
-            if (
-                ingested_document.doc_metadata
-                and ingested_document.doc_metadata["file_name"]
-                == self._selected_filename
-            ):
-                self._ingest_service.delete(ingested_document.doc_id)
+    def _delete_selected_file(
+        self, collection: str | None, selected_file: str | None
+    ) -> Any:
+        logger.debug("Deleting selected %s", selected_file)
+        # Note: a pdf has many Documents (each page became a Document)
+        self._ingest_service.bulk_delete(
+            [
+                ingested_document.doc_id
+                for ingested_document in self._ingest_service.find_ingested_by_file_name(
+                    selected_file, collection
+                )
+            ],
+            collection,
+        )
         return [
-            gr.List(self._list_ingested_files()),
+            None,
+            gr.List(self._list_ingested_files(collection)),
             gr.components.Button(interactive=False),
             gr.components.Button(interactive=False),
             gr.components.Textbox("All files"),
         ]
 
     def _deselect_selected_file(self) -> Any:
-        self._selected_filename = None
         return [
+            None,
             gr.components.Button(interactive=False),
             gr.components.Button(interactive=False),
             gr.components.Textbox("All files"),
         ]
 
     def _selected_a_file(self, select_data: gr.SelectData) -> Any:
-        self._selected_filename = select_data.value
         return [
+            select_data.value,
             gr.components.Button(interactive=True),
             gr.components.Button(interactive=True),
-            gr.components.Textbox(self._selected_filename),
+            gr.components.Textbox(select_data.value),
         ]
 
     def _build_ui_blocks(self) -> gr.Blocks:
@@ -330,6 +360,18 @@ class BrainiaxUi:
                         label="Mode",
                         value="Query Files",
                     )
+                    # Collection of the uploaded files and of the queries of this
+                    # session, None for the default one
+                    collection = gr.State(None)
+                    # File of the collection the queries are restricted to, and
+                    # deleted by the delete button, None for all the files
+                    selected_file = gr.State(None)
+                    collection_input = gr.Textbox(
+                        placeholder=settings().vectorstore.default_collection,
+                        label="Collection",
+                        max_lines=1,
+                        interactive=True,
+                    )
                     upload_button = gr.components.UploadButton(
                         "Upload File(s)",
                         type="filepath",
@@ -346,11 +388,12 @@ class BrainiaxUi:
                     )
                     upload_button.upload(
                         self._upload_file,
-                        inputs=upload_button,
+                        inputs=[upload_button, collection],
                         outputs=ingested_dataset,
                     )
                     ingested_dataset.change(
                         self._list_ingested_files,
+                        inputs=collection,
                         outputs=ingested_dataset,
                     )
                     ingested_dataset.render()
@@ -374,6 +417,7 @@ class BrainiaxUi:
                     deselect_file_button.click(
                         self._deselect_selected_file,
                         outputs=[
+                            selected_file,
                             delete_file_button,
                             deselect_file_button,
                             selected_text,
@@ -382,6 +426,7 @@ class BrainiaxUi:
                     ingested_dataset.select(
                         fn=self._selected_a_file,
                         outputs=[
+                            selected_file,
                             delete_file_button,
                             deselect_file_button,
                             selected_text,
@@ -389,7 +434,9 @@ class BrainiaxUi:
                     )
                     delete_file_button.click(
                         self._delete_selected_file,
+                        inputs=[collection, selected_file],
                         outputs=[
+                            selected_file,
                             ingested_dataset,
                             delete_file_button,
                             deselect_file_button,
@@ -398,7 +445,22 @@ class BrainiaxUi:
                     )
                     delete_files_button.click(
                         self._delete_all_files,
+                        inputs=collection,
+                        outputs=[
+                            selected_file,
+                            ingested_dataset,
+                            delete_file_button,
+                            deselect_file_button,
+                            selected_text,
+                        ],
+                    )
+                    # On blur, switch the files and the queries to the collection
+                    collection_input.blur(
+                        self._set_collection,
+                        inputs=[collection_input, collection],
                         outputs=[
+                            collection,
+                            selected_file,
                             ingested_dataset,
                             delete_file_button,
                             deselect_file_button,
@@ -435,7 +497,13 @@ class BrainiaxUi:
                                 AVATAR_BOT,
                             ),
                         ),
-                        additional_inputs=[mode, upload_button, system_prompt_input],
+                        additional_inputs=[
+                            mode,
+                            collection,
+                            selected_file,
+                            upload_button,
+                            system_prompt_input,
+                        ],
                     )
         return blocks
 
@@ -0,0 +1,273 @@
+"""Ingest all the files of a folder, e.g. `python -m brainiax.ingest path/to/folder`.
+
+The ingested files are recorded in a checkpoint manifest: an interrupted run
+resumes where it stopped, and a later run (or the `--watch` mode) only ingests
+the files that are new or were modified since they were ingested.
+"""
+import argparse
+import fnmatch
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any
+
+from brainiax.components.node_store.node_store_component import NodeStoreComponent
+from brainiax.constants import COLLECTION_NAME_PATTERN
+from brainiax.di import global_injector
+from brainiax.server.ingest.ingest_service import IngestService
+from brainiax.settings.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+_MANIFEST_VERSION = 1
+
+
+class IngestManifest:
+    """Checkpoint of the files of a folder already ingested.
+
+    Each file is recorded by its path relative to the folder, with the size and
+    modification time it had when ingested and the ids of its documents, so that
+    a modified file can replace its previous documents.
+    """
+
+    def __init__(self, path: Path, folder: Path) -> None:
+        self.path = path
+        self.folder = str(folder)
+        self.files: dict[str, dict[str, Any]] = {}
+        if path.exists():
+            content = json.loads(path.read_text())
+            if content.get("folder") != self.folder:
+                raise ValueError(
+                    f"Manifest {path} was created for the folder "
+                    f"{content.get('folder')}, not {self.folder}"
+                )
+            self.files = content["files"]
+            logger.info(
+                "Resuming from manifest=%s with count=%s ingested files",
+                path,
+                len(self.files),
+            )
+
+    @staticmethod
+    def signature(file_path: Path) -> dict[str, int]:
+        stat = file_path.stat()
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def is_ingested(self, file_name: str, file_path: Path) -> bool:
+        entry = self.files.get(file_name)
+        return entry is not None and all(
+            entry[key] == value for key, value in self.signature(file_path).items()
+        )
+
+    def doc_ids(self, file_name: str) -> list[str]:
+        entry = self.files.get(file_name)
+        return entry["doc_ids"] if entry else []
+
+    def record(self, file_name: str, file_path: Path, doc_ids: list[str]) -> None:
+        self.files[file_name] = {**self.signature(file_path), "doc_ids": doc_ids}
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {
+                    "version": _MANIFEST_VERSION,
+                    "folder": self.folder,
+                    "files": self.files,
+                }
+            )
+        )
+        os.replace(tmp_path, self.path)
+
+
+class LocalIngestWorker:
+    def __init__(
+        self,
+        ingest_service: IngestService,
+        folder: Path,
+        manifest: IngestManifest,
+        batch_size: int,
+        ignored: list[str],
+        collection: str | None = None,
+    ) -> None:
+        self.ingest_service = ingest_service
+        self.folder = folder
+        self.manifest = manifest
+        self.batch_size = batch_size
+        self.ignored = ignored
+        self.collection = collection
+
+    def _is_ignored(self, file_name: str) -> bool:
+        return any(
+            fnmatch.fnmatch(part, pattern)
+            for part in Path(file_name).parts
+            for pattern in self.ignored
+        )
+
+    def _find_files_to_ingest(self) -> list[tuple[str, Path]]:
+        files_to_ingest = []
+        for file_path in sorted(self.folder.rglob("*")):
+            if not file_path.is_file():
+                continue
+            # The path relative to the folder tells apart files with the same name
+            file_name = file_path.relative_to(self.folder).as_posix()
+            if self._is_ignored(file_name):
+                continue
+            if not self.manifest.is_ingested(file_name, file_path):
+                files_to_ingest.append((file_name, file_path))
+        return files_to_ingest
+
+    def _ingest_batch(self, files: list[tuple[str, Path]]) -> None:
+        # The ingest service recognizes the files whose content did not change (e.g.
+        # only touched) by their hash, and returns their documents as they are
+        ingested_docs = self.ingest_service.bulk_ingest(files, self.collection)
+        doc_ids_by_file_name: dict[str, list[str]] = {}
+        for ingested_doc in ingested_docs:
+            file_name = (ingested_doc.doc_metadata or {}).get("file_name", "")
+            doc_ids_by_file_name.setdefault(file_name, []).append(ingested_doc.doc_id)
+
+        # Modified files replace the documents of their previous version, once the
+        # new version is ingested: a file that fails keeps its previous version
+        outdated_doc_ids = [
+            doc_id
+            for file_name, _ in files
+            if file_name in doc_ids_by_file_name
+            for doc_id in self.manifest.doc_ids(file_name)
+            if doc_id not in doc_ids_by_file_name[file_name]
+        ]
+        if outdated_doc_ids:
+            self.ingest_service.bulk_delete(outdated_doc_ids, self.collection)
+
+        # The index must be on disk before the manifest says the files are ingested
+        self.ingest_service.flush(self.collection)
+        for file_name, file_path in files:
+            doc_ids = doc_ids_by_file_name.get(file_name)
+            if not doc_ids:
+                logger.warning(
+                    "No document ingested from file_name=%s, retrying it next run",
+                    file_name,
+                )
+                continue
+            self.manifest.record(file_name, file_path, doc_ids)
+        self.manifest.save()
+
+    def ingest_folder(self) -> int:
+        """Ingest the new and modified files of the folder, returns their count."""
+        files = self._find_files_to_ingest()
+        if not files:
+            return 0
+        logger.info("Found count=%s new or modified files to ingest", len(files))
+        for start in range(0, len(files), self.batch_size):
+            batch = files[start : start + self.batch_size]
+            self._ingest_batch(batch)
+            logger.info(
+                "Ingested count=%s of %s files",
+                min(start + self.batch_size, len(files)),
+                len(files),
+            )
+        return len(files)
+
+    def watch(self, interval: float) -> None:
+        logger.info("Watching folder=%s for changes every %ss", self.folder, interval)
+        while True:
+            time.sleep(interval)
+            self.ingest_folder()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m brainiax.ingest")
+    parser.add_argument("folder", help="Folder to ingest, with its sub-folders")
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep watching the folder and ingest the new and modified files",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=10.0,
+        help="Seconds between two scans of the folder in watch mode",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=100,
+        help="Number of files ingested between two checkpoints",
+    )
+    parser.add_argument(
+        "--collection",
+        help="Collection to ingest the files into, by default the default collection",
+    )
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        help="Checkpoint manifest to use, by default one per folder in the local data",
+    )
+    parser.add_argument(
+        "--ignored",
+        nargs="*",
+        default=[".*", "__pycache__"],
+        help="Patterns of the file and folder names to skip",
+    )
+    parser.add_argument("--log-file", help="Also write the logs to this file")
+    args = parser.parse_args()
+
+    if args.log_file:
+        file_handler = logging.FileHandler(args.log_file, mode="a")
+        file_handler.setFormatter(
+            logging.Formatter(
+                "[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s",
+                datefmt="%Y-%m-%d %H:%M:%S",
+            )
+        )
+        logging.getLogger().addHandler(file_handler)
+
+    folder = Path(args.folder).resolve()
+    if not folder.is_dir():
+        raise ValueError(f"Path {folder} is not a folder")
+    if args.batch_size < 1:
+        raise ValueError("The batch size must be at least 1")
+    if args.collection and not re.match(COLLECTION_NAME_PATTERN, args.collection):
+        raise ValueError(f"Invalid collection name {args.collection}")
+    settings = global_injector.get(Settings)
+    if settings.embedding.ingest_mode == "simple":
+        # Whatever the mode of the server, parse the files in parallel, and skip the
+        # files that fail instead of aborting their batch
+        embedding = settings.embedding.model_copy(update={"ingest_mode": "parallel"})
+        global_injector.binder.bind(
+            Settings, to=settings.model_copy(update={"embedding": embedding})
+        )
+    folder_hash = hashlib.sha256(str(folder).encode()).hexdigest()[:16]
+    # The manifests are kept with the stores of the collection they describe
+    persist_dir = global_injector.get(NodeStoreComponent).persist_dir(args.collection)
+    manifest_path = args.manifest or (
+        persist_dir / "ingest_manifests" / f"{folder.name}-{folder_hash}.json"
+    )
+
+    ingest_service = global_injector.get(IngestService)
+    worker = LocalIngestWorker(
+        ingest_service,
+        folder,
+        IngestManifest(manifest_path, folder),
+        batch_size=args.batch_size,
+        ignored=args.ignored,
+        collection=args.collection,
+    )
+    try:
+        count = worker.ingest_folder()
+        logger.info("Ingested count=%s files from folder=%s", count, folder)
+        if args.watch:
+            worker.watch(args.watch_interval)
+    except KeyboardInterrupt:
+        logger.info("Interrupted, the next run resumes from the last checkpoint")
+    finally:
+        ingest_service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 """FastAPI app creation, logger configuration and main API routes."""
 import logging
+import time
+from collections.abc import Callable
+from typing import TypeVar
 
 from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -8,14 +11,50 @@ from llama_index.core.callbacks import CallbackManager
 from llama_index.core.callbacks.global_handlers import create_global_handler
 from llama_index.core.settings import Settings as LlamaIndexSettings
 
+from brainiax import BOOT_START_TIME
+from brainiax.components.embedding.embedding_component import EmbeddingComponent
+from brainiax.components.llm.llm_component import LLMComponent
+from brainiax.components.vector_store.vector_store_component import (
+    VectorStoreComponent,
+)
+from brainiax.server.cache.cache_router import cache_router
 from brainiax.server.chat.chat_router import chat_router
 from brainiax.server.embeddings.embeddings_router import embeddings_router
+from brainiax.server.ingest.ingest_job_service import IngestJobService
 from brainiax.server.ingest.ingest_router import ingest_router
+from brainiax.server.ingest.ingest_service import IngestService
 from brainiax.settings.settings import Settings
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+class BootTimer:
+    """Time the steps of the boot, to log where the boot time goes."""
+
+    def __init__(self) -> None:
+        self.steps: dict[str, float] = {
+            "imports": time.perf_counter() - BOOT_START_TIME
+        }
+
+    def time(self, step: str, func: Callable[[], T]) -> T:
+        start = time.perf_counter()
+        try:
+            return func()
+        finally:
+            self.steps[step] = time.perf_counter() - start
+
+    def log(self) -> None:
+        logger.info(
+            "Boot time breakdown: %s total=%.2fs",
+            " ".join(f"{step}={duration:.2f}s" for step, duration in self.steps.items()),
+            time.perf_counter() - BOOT_START_TIME,
+        )
+
+
 def create_app(root_injector: Injector) -> FastAPI:
+    boot_timer = BootTimer()
 
     # Start the API
     async def bind_injector_to_request(request: Request) -> None:
@@ -26,12 +65,26 @@ def create_app(root_injector: Injector) -> FastAPI:
     app.include_router(chat_router)
     app.include_router(ingest_router)
     app.include_router(embeddings_router)
+    app.include_router(cache_router)
+
+    # Resume the ingestion jobs interrupted by the last shutdown
+    app.add_event_handler("startup", lambda: root_injector.get(IngestJobService))
+    # Persist the pending ingestions and deletions, before the vector stores are
+    # closed: the persist writes them too
+    app.add_event_handler("shutdown", lambda: root_injector.get(IngestService).close())
+    # Close the connections of the Qdrant clients, opened on first use
+    app.add_event_handler("shutdown", root_injector.get(VectorStoreComponent).aclose)
 
     # Add LlamaIndex simple observability
     global_handler = create_global_handler("simple")
     LlamaIndexSettings.callback_manager = CallbackManager([global_handler])
 
     settings = root_injector.get(Settings)
+
+    # The models are loaded at boot, the stores and the index on first use
+    boot_timer.time("llm", lambda: root_injector.get(LLMComponent))
+    boot_timer.time("embedding", lambda: root_injector.get(EmbeddingComponent))
+
     if settings.server.cors.enabled:
         logger.debug("Setting up CORS middleware")
         app.add_middleware(
@@ -45,9 +98,12 @@ def create_app(root_injector: Injector) -> FastAPI:
 
     if settings.ui.enabled:
         logger.debug("Importing the UI module")
+        ui_module_start = time.perf_counter()
         from brainiax.frontend.ui import BrainiaxUi
 
-        ui = root_injector.get(BrainiaxUi)
-        ui.mount_in_app(app, settings.ui.path)
+        boot_timer.steps["ui_imports"] = time.perf_counter() - ui_module_start
+        ui = boot_timer.time("ui", lambda: root_injector.get(BrainiaxUi))
+        boot_timer.time("ui_mount", lambda: ui.mount_in_app(app, settings.ui.path))
 
+    boot_timer.log()
     return app
@@ -0,0 +1,82 @@
+"""Copy the JSON doc and index stores to the SQLite node store.
+
+Run `python -m brainiax.migrate_node_store` with the server stopped, then set
+`nodestore.database: sqlite` in the settings. The stores of every collection are
+migrated, unless `--collection` selects one. The JSON files are left untouched.
+"""
+import argparse
+import logging
+import re
+
+from brainiax.components.node_store.node_store_component import (
+    SQLITE_NODE_STORE_FILE_NAME,
+    NodeStoreComponent,
+)
+from brainiax.components.node_store.sqlite_store import (
+    SQLiteKVStore,
+    migrate_json_stores_to_sqlite,
+)
+from brainiax.constants import COLLECTION_NAME_PATTERN
+from brainiax.di import global_injector
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m brainiax.migrate_node_store")
+    parser.add_argument(
+        "--collection",
+        help="Only migrate the stores of this collection, by default all of them",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Migrate even if the SQLite node store already has content",
+    )
+    args = parser.parse_args()
+    if args.collection and not re.match(COLLECTION_NAME_PATTERN, args.collection):
+        raise ValueError(f"Invalid collection name {args.collection}")
+
+    node_store_component = global_injector.get(NodeStoreComponent)
+    if args.collection:
+        collections = [args.collection]
+    else:
+        collections = node_store_component.list_collections()
+    db_paths = {
+        collection: node_store_component.persist_dir(collection)
+        / SQLITE_NODE_STORE_FILE_NAME
+        for collection in collections
+    }
+    if not args.force:
+        # Check all the collections first, not to stop in the middle of a migration
+        already_migrated = []
+        for collection, db_path in db_paths.items():
+            kvstore = SQLiteKVStore(db_path)
+            try:
+                if kvstore.count("index_store/data") > 0:
+                    already_migrated.append(str(db_path))
+            finally:
+                kvstore.close()
+        if already_migrated:
+            raise SystemExit(
+                f"The node stores {', '.join(already_migrated)} already have an "
+                "index, use --force to migrate anyway"
+            )
+
+    for collection, db_path in db_paths.items():
+        kvstore = SQLiteKVStore(db_path)
+        try:
+            count = migrate_json_stores_to_sqlite(db_path.parent, kvstore)
+        finally:
+            kvstore.close()
+        logger.info(
+            "Migrated count=%s entries of collection=%s to %s",
+            count,
+            collection,
+            db_path,
+        )
+    logger.info("Set `nodestore.database: sqlite` to use the migrated node stores")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Apply the collection settings of `qdrant` to the existing Qdrant collection.
+
+New collections are created with the settings, run
+`python -m brainiax.migrate_vector_store` after changing them (e.g.
+`qdrant.quantization`) to update a collection created before. Qdrant rebuilds
+the changed structures in the background, the collection stays searchable.
+"""
+import argparse
+import logging
+
+from brainiax.components.vector_store.qdrant_vector_store import (
+    QdrantCollectionConfig,
+    apply_collection_config,
+)
+from brainiax.components.vector_store.vector_store_component import (
+    VectorStoreComponent,
+)
+from brainiax.di import global_injector
+from brainiax.settings.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m brainiax.migrate_vector_store")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only list the changes to apply to the collection",
+    )
+    parser.add_argument(
+        "--collection",
+        help="Collection of documents to use, by default the default collection",
+    )
+    args = parser.parse_args()
+
+    settings = global_injector.get(Settings)
+    if settings.vectorstore.database != "qdrant":
+        raise SystemExit("The collection settings only apply to Qdrant")
+    qdrant_settings = settings.qdrant
+    if qdrant_settings is None or (
+        qdrant_settings.path is not None or qdrant_settings.location == ":memory:"
+    ):
+        raise SystemExit(
+            "The collection settings only apply to a Qdrant server, "
+            "the local Qdrant has nothing to migrate"
+        )
+
+    vector_store = global_injector.get(VectorStoreComponent).get_vector_store(
+        args.collection
+    )
+    client = vector_store.client
+    collection_name = vector_store.collection_name
+    if not client.collection_exists(collection_name):
+        raise SystemExit(
+            f"The collection {collection_name} does not exist yet, it will be "
+            "created with the settings"
+        )
+
+    config = QdrantCollectionConfig.from_settings(qdrant_settings)
+    if args.dry_run:
+        changes = list(config.updates(client.get_collection(collection_name)))
+    else:
+        changes = apply_collection_config(client, collection_name, config)
+    logger.info(
+        "%s changes=%s of collection=%s",
+        "Would apply" if args.dry_run else "Applied",
+        changes,
+        collection_name,
+    )
+
+
+if __name__ == "__main__":
+    main()
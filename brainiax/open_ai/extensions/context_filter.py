@@ -1,7 +1,39 @@
-from pydantic import BaseModel, Field
+from datetime import datetime
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class PageRange(BaseModel):
+    first: int = Field(ge=1, examples=[1], description="First page, 1 based.")
+    last: int = Field(ge=1, examples=[10], description="Last page, included.")
+
+    @model_validator(mode="after")
+    def _check_order(self) -> "PageRange":
+        if self.last < self.first:
+            raise ValueError("The last page of a page range is before its first page")
+        return self
 
 
 class ContextFilter(BaseModel):
+    """Restrict the context to the chunks matching all the given criteria."""
+
     docs_ids: list[str] | None = Field(
-        examples=[["c202d5e6-7b69-4869-81cc-dd574ee8ee11"]]
+        None, examples=[["c202d5e6-7b69-4869-81cc-dd574ee8ee11"]]
+    )
+    file_names: list[str] | None = Field(
+        None,
+        examples=[["Generative AI.pdf"]],
+        description="Names of the ingested files.",
+    )
+    page_ranges: list[PageRange] | None = Field(
+        None,
+        description="Pages of paginated files (PDF), in any of the ranges.",
+    )
+    ingested_after: datetime | None = Field(
+        None,
+        examples=["2024-05-01T00:00:00Z"],
+        description="Ingested at or after this time.",
+    )
+    ingested_before: datetime | None = Field(
+        None, description="Ingested at or before this time."
     )
@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, Request
+from pydantic import BaseModel, Field
+
+from brainiax.components.embedding.embedding_component import EmbeddingComponent
+from brainiax.components.index.index_component import IndexComponent
+from brainiax.server.chat.chat_service import ChatService
+from brainiax.server.utils.auth import authenticated
+
+cache_router = APIRouter(prefix="/v1", dependencies=[Depends(authenticated)])
+
+
+class CacheStats(BaseModel):
+    entries: int
+    max_entries: int
+    hits: int
+    misses: int
+    hit_rate: float
+    saved_seconds: float | None = Field(
+        default=None,
+        description=(
+            "Sum of the latencies of the work answered from the cache, None if the "
+            "cache does not measure it."
+        ),
+    )
+
+
+class CacheStatsResponse(BaseModel):
+    embeddings: CacheStats | None = Field(
+        description="None if `embedding.cache_max_entries` is 0."
+    )
+    retrieval: CacheStats
+    responses: CacheStats | None = Field(
+        description="None if `llm.response_cache` is not enabled."
+    )
+
+
+@cache_router.get("/cache/stats", tags=["Cache"])
+def cache_stats(request: Request) -> CacheStatsResponse:
+    """Hit rate and latency saved by the caches since the server started.
+
+    `embeddings` caches on disk the embeddings of the ingested chunks and of the
+    queries, across restarts. `retrieval` caches the chunks retrieved for a query
+    by the chat and chunks APIs, until documents are ingested or deleted.
+    `responses` caches the chat responses, reused for the paraphrases of the
+    questions.
+    """
+    embedding_cache = request.state.injector.get(EmbeddingComponent).embedding_cache
+    index_component = request.state.injector.get(IndexComponent)
+    response_cache = request.state.injector.get(ChatService).response_cache
+    return CacheStatsResponse(
+        embeddings=(
+            CacheStats(**embedding_cache.stats())
+            if embedding_cache is not None
+            else None
+        ),
+        retrieval=CacheStats(**index_component.retrieval_cache.stats()),
+        responses=(
+            CacheStats(**response_cache.stats()) if response_cache is not None else None
+        ),
+    )
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, Request
 from llama_index.core.llms import ChatMessage, MessageRole
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from starlette.responses import StreamingResponse
 
+from brainiax.constants import COLLECTION_NAME_PATTERN
 from brainiax.open_ai.extensions.context_filter import ContextFilter
 from brainiax.open_ai.openai_models import (
     OpenAICompletion,
@@ -20,6 +21,11 @@ class ChatBody(BaseModel):
     messages: list[OpenAIMessage]
     use_context: bool = False
     context_filter: ContextFilter | None = None
+    collection: str | None = Field(
+        None,
+        pattern=COLLECTION_NAME_PATTERN,
+        description="Collection of the context documents, the default one if unset.",
+    )
     include_sources: bool = True
     stream: bool = False
 
@@ -62,7 +68,7 @@ class ChatBody(BaseModel):
         }
     },
 )
-def chat_completion(
+async def chat_completion(
     request: Request, body: ChatBody
 ) -> OpenAICompletion | StreamingResponse:
 
@@ -71,10 +77,11 @@ def chat_completion(
         ChatMessage(content=m.content, role=MessageRole(m.role)) for m in body.messages
     ]
     if body.stream:
-        completion_gen = service.stream_chat(
+        completion_gen = await service.astream_chat(
             messages=all_messages,
             use_context=body.use_context,
             context_filter=body.context_filter,
+            collection=body.collection,
         )
         return StreamingResponse(
             to_openai_sse_stream(
@@ -84,10 +91,11 @@ def chat_completion(
             media_type="text/event-stream",
         )
     else:
-        completion = service.chat(
+        completion = await service.achat(
             messages=all_messages,
             use_context=body.use_context,
             context_filter=body.context_filter,
+            collection=body.collection,
         )
         return to_openai_response(
             completion.response, completion.sources if body.include_sources else None
@@ -1,3 +1,6 @@
+import asyncio
+import time
+from collections.abc import Callable
 from dataclasses import dataclass
 
 from injector import inject, singleton
@@ -5,23 +8,24 @@ from llama_index.core.chat_engine import ContextChatEngine, SimpleChatEngine
 from llama_index.core.chat_engine.types import (
     BaseChatEngine,
 )
-from llama_index.core.indices import VectorStoreIndex
-from llama_index.core.indices.postprocessor import MetadataReplacementPostProcessor
 from llama_index.core.llms import ChatMessage, MessageRole
 from llama_index.core.postprocessor import (
     SimilarityPostprocessor,
 )
-from llama_index.core.storage import StorageContext
+from llama_index.core.postprocessor.types import BaseNodePostprocessor
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle
 from llama_index.core.types import TokenGen
 from pydantic import BaseModel
 
 from brainiax.components.embedding.embedding_component import EmbeddingComponent
+from brainiax.components.index.index_component import IndexComponent
+from brainiax.components.ingest.sentence_window import SentenceWindowPostprocessor
 from brainiax.components.llm.llm_component import LLMComponent
-from brainiax.components.node_store.node_store_component import NodeStoreComponent
 from brainiax.components.vector_store.vector_store_component import (
     VectorStoreComponent,
 )
-
+from brainiax.server.chat.response_cache import ResponseCache, ResponseCacheQuery
 from brainiax.server.chunks.chunks_service import Chunk
 from brainiax.open_ai.extensions.context_filter import ContextFilter
 from brainiax.settings.settings import Settings
@@ -70,6 +74,33 @@ class ChatEngineInput:
         )
 
 
+def _replay(response: str) -> TokenGen:
+    yield response
+
+
+def _on_completed(response_gen: TokenGen, callback: Callable[[str], None]) -> TokenGen:
+    """Stream the deltas, then pass the whole response to `callback`.
+
+    The callback is not called if the stream is interrupted.
+    """
+    deltas = []
+    for delta in response_gen:
+        deltas.append(delta)
+        yield delta
+    callback("".join(deltas))
+
+
+class _RetrievedNodesRetriever(BaseRetriever):
+    """Returns the context nodes already retrieved for the message."""
+
+    def __init__(self, nodes: list[NodeWithScore]) -> None:
+        super().__init__()
+        self._nodes = nodes
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        return self._nodes
+
+
 @singleton
 class ChatService:
     settings: Settings
@@ -80,49 +111,139 @@ class ChatService:
         settings: Settings,
         llm_component: LLMComponent,
         vector_store_component: VectorStoreComponent,
+        index_component: IndexComponent,
         embedding_component: EmbeddingComponent,
-        node_store_component: NodeStoreComponent,
     ) -> None:
         self.settings = settings
         self.llm_component = llm_component
-        self.embedding_component = embedding_component
         self.vector_store_component = vector_store_component
-        self.storage_context = StorageContext.from_defaults(
-            vector_store=vector_store_component.vector_store,
-            docstore=node_store_component.doc_store,
-            index_store=node_store_component.index_store,
+        self.index_component = index_component
+        self.embedding_component = embedding_component
+        self.response_cache: ResponseCache | None = None
+        response_cache_settings = settings.llm.response_cache
+        if response_cache_settings.enabled:
+            self.response_cache = ResponseCache(
+                max_entries=response_cache_settings.max_entries,
+                ttl=response_cache_settings.ttl,
+                similarity_threshold=response_cache_settings.similarity_threshold,
+            )
+
+    def _retriever(
+        self,
+        context_filter: ContextFilter | None = None,
+        collection: str | None = None,
+    ) -> BaseRetriever:
+        return self.index_component.get_retriever(
+            collection,
+            context_filter=context_filter,
+            similarity_top_k=self.settings.rag.similarity_top_k,
+            similarity_cutoff=self.settings.rag.similarity_value,
+        )
+
+    async def _aretrieve_context(
+        self,
+        messages: list[ChatMessage],
+        use_context: bool,
+        context_filter: ContextFilter | None = None,
+        collection: str | None = None,
+    ) -> tuple[list[NodeWithScore] | None, list[float] | None]:
+        """Context nodes and embedding of the last message, async searched.
+
+        The message is embedded up front only for the response cache, which shares
+        the embedding with the retrieval. Either may be None when not needed.
+        """
+        last_message = ChatEngineInput.from_messages(list(messages)).last_message
+        message = (last_message.content if last_message else None) or ""
+        query_embedding = None
+        if self.response_cache is not None:
+            query_embedding = await self.embedding_component.aembed_query(message)
+        if not use_context:
+            return None, query_embedding
+        # The first retrieval of a collection loads its stores
+        retriever = await asyncio.to_thread(
+            self._retriever, context_filter, collection
+        )
+        context_nodes = await retriever.aretrieve(
+            QueryBundle(message, embedding=query_embedding)
         )
-        self.index = VectorStoreIndex.from_vector_store(
-            vector_store_component.vector_store,
-            storage_context=self.storage_context,
-            llm=llm_component.llm,
-            embed_model=embedding_component.embedding_model,
-            show_progress=True,
+        return context_nodes, query_embedding
+
+    def _response_cache_query(
+        self,
+        message: str,
+        system_prompt: str | None,
+        chat_history: list[ChatMessage] | None,
+        use_context: bool,
+        context_filter: ContextFilter | None,
+        collection: str | None,
+        context_nodes: list[NodeWithScore] | None,
+        query_embedding: list[float] | None,
+    ) -> tuple[ResponseCacheQuery, list[NodeWithScore] | None]:
+        """Query of the response cache for a message, with its context nodes.
+
+        The context is retrieved first if it is not given, as the ids of its chunks
+        are part of the key. The message is embedded once, for both.
+        """
+        embedding = query_embedding
+        if embedding is None:
+            embedding_model = self.embedding_component.embedding_model
+            embedding = embedding_model.get_query_embedding(message)
+        key: tuple[object, ...] = (
+            system_prompt,
+            tuple((m.role.value, m.content) for m in chat_history or []),
+        )
+        if not use_context:
+            return ResponseCacheQuery(key, embedding), None
+
+        collection = collection or self.settings.vectorstore.default_collection
+        # Read before retrieving, a response using an outdated context is not cached
+        generation = self.index_component.get_generation(collection).value
+        if context_nodes is None:
+            retriever = self._retriever(context_filter, collection)
+            context_nodes = retriever.retrieve(
+                QueryBundle(message, embedding=embedding)
+            )
+        key += (
+            collection,
+            context_filter.model_dump_json() if context_filter else None,
+            tuple(sorted(node.node_id for node in context_nodes)),
         )
+        return ResponseCacheQuery(key, embedding, collection, generation), context_nodes
 
     def _chat_engine(
         self,
         system_prompt: str | None = None,
         use_context: bool = False,
         context_filter: ContextFilter | None = None,
+        collection: str | None = None,
+        context_nodes: list[NodeWithScore] | None = None,
     ) -> BaseChatEngine:
         settings = self.settings
         if use_context:
-            vector_index_retriever = self.vector_store_component.get_retriever(
-                index=self.index,
-                context_filter=context_filter,
-                similarity_top_k=self.settings.rag.similarity_top_k,
+            retriever: BaseRetriever = (
+                _RetrievedNodesRetriever(context_nodes)
+                if context_nodes is not None
+                else self._retriever(context_filter, collection)
             )
+            node_postprocessors: list[BaseNodePostprocessor] = [
+                SentenceWindowPostprocessor(
+                    docstore=self.index_component.get_storage_context(
+                        collection
+                    ).docstore
+                ),
+            ]
+            # The hybrid retriever applies the cutoff before fusing the scores
+            if not settings.rag.hybrid.enabled:
+                node_postprocessors.append(
+                    SimilarityPostprocessor(
+                        similarity_cutoff=settings.rag.similarity_value
+                    )
+                )
             return ContextChatEngine.from_defaults(
                 system_prompt=system_prompt,
-                retriever=vector_index_retriever,
+                retriever=retriever,
                 llm=self.llm_component.llm,  # Takes no effect at the moment
-                node_postprocessors=[
-                    MetadataReplacementPostProcessor(target_metadata_key="window"),
-                    SimilarityPostprocessor(
-                        similarity_cutoff=settings.rag.similarity_value
-                    ),
-                ],
+                node_postprocessors=node_postprocessors,
             )
         else:
             return SimpleChatEngine.from_defaults(
@@ -135,6 +256,9 @@ class ChatService:
         messages: list[ChatMessage],
         use_context: bool = False,
         context_filter: ContextFilter | None = None,
+        collection: str | None = None,
+        context_nodes: list[NodeWithScore] | None = None,
+        query_embedding: list[float] | None = None,
     ) -> CompletionGen:
         chat_engine_input = ChatEngineInput.from_messages(messages)
         last_message = (
@@ -150,20 +274,50 @@ class ChatService:
         chat_history = (
             chat_engine_input.chat_history if chat_engine_input.chat_history else None
         )
+        message = last_message if last_message is not None else ""
+
+        cache_query = None
+        if self.response_cache is not None:
+            cache_query, context_nodes = self._response_cache_query(
+                message,
+                system_prompt,
+                chat_history,
+                use_context,
+                context_filter,
+                collection,
+                context_nodes,
+                query_embedding,
+            )
+            cached = self.response_cache.get(cache_query)
+            if cached is not None:
+                # Replayed as a stream of a single delta
+                return CompletionGen(
+                    response=_replay(cached.response), sources=cached.sources
+                )
 
+        start = time.perf_counter()
         chat_engine = self._chat_engine(
             system_prompt=system_prompt,
             use_context=use_context,
             context_filter=context_filter,
+            collection=collection,
+            context_nodes=context_nodes,
         )
         streaming_response = chat_engine.stream_chat(
-            message=last_message if last_message is not None else "",
+            message=message,
             chat_history=chat_history,
         )
         sources = [Chunk.from_node(node) for node in streaming_response.source_nodes]
-        completion_gen = CompletionGen(
-            response=streaming_response.response_gen, sources=sources
-        )
+        response_gen = streaming_response.response_gen
+        if cache_query is not None:
+            response_cache, query = self.response_cache, cache_query
+            response_gen = _on_completed(
+                response_gen,
+                lambda response: response_cache.put(
+                    query, response, sources, time.perf_counter() - start
+                ),
+            )
+        completion_gen = CompletionGen(response=response_gen, sources=sources)
         return completion_gen
 
     def chat(
@@ -171,6 +325,9 @@ class ChatService:
         messages: list[ChatMessage],
         use_context: bool = False,
         context_filter: ContextFilter | None = None,
+        collection: str | None = None,
+        context_nodes: list[NodeWithScore] | None = None,
+        query_embedding: list[float] | None = None,
     ) -> Completion:
         chat_engine_input = ChatEngineInput.from_messages(messages)
         last_message = (
@@ -186,16 +343,86 @@ class ChatService:
         chat_history = (
             chat_engine_input.chat_history if chat_engine_input.chat_history else None
         )
+        message = last_message if last_message is not None else ""
+
+        cache_query = None
+        if self.response_cache is not None:
+            cache_query, context_nodes = self._response_cache_query(
+                message,
+                system_prompt,
+                chat_history,
+                use_context,
+                context_filter,
+                collection,
+                context_nodes,
+                query_embedding,
+            )
+            cached = self.response_cache.get(cache_query)
+            if cached is not None:
+                return Completion(response=cached.response, sources=cached.sources)
 
+        start = time.perf_counter()
         chat_engine = self._chat_engine(
             system_prompt=system_prompt,
             use_context=use_context,
             context_filter=context_filter,
+            collection=collection,
+            context_nodes=context_nodes,
         )
         wrapped_response = chat_engine.chat(
-            message=last_message if last_message is not None else "",
+            message=message,
             chat_history=chat_history,
         )
         sources = [Chunk.from_node(node) for node in wrapped_response.source_nodes]
         completion = Completion(response=wrapped_response.response, sources=sources)
+        if self.response_cache is not None and cache_query is not None:
+            self.response_cache.put(
+                cache_query, completion.response, sources, time.perf_counter() - start
+            )
         return completion
+
+    async def astream_chat(
+        self,
+        messages: list[ChatMessage],
+        use_context: bool = False,
+        context_filter: ContextFilter | None = None,
+        collection: str | None = None,
+    ) -> CompletionGen:
+        """Like `stream_chat`, retrieving the context with the async Qdrant client.
+
+        Concurrent requests do not hold a worker thread while searching the
+        vector store, only the generation runs in a worker thread.
+        """
+        context_nodes, query_embedding = await self._aretrieve_context(
+            messages, use_context, context_filter, collection
+        )
+        return await asyncio.to_thread(
+            self.stream_chat,
+            messages,
+            use_context,
+            context_filter,
+            collection,
+            context_nodes,
+            query_embedding,
+        )
+
+    async def achat(
+        self,
+        messages: list[ChatMessage],
+        use_context: bool = False,
+        context_filter: ContextFilter | None = None,
+        collection: str | None = None,
+    ) -> Completion:
+        """Like `chat`, retrieving the context with the async Qdrant client."""
+        context_nodes, query_embedding = await self._aretrieve_context(
+            messages, use_context, context_filter, collection
+        )
+        return await asyncio.to_thread(
+            self.chat,
+            messages,
+            use_context,
+            context_filter,
+            collection,
+            context_nodes,
+            query_embedding,
+        )
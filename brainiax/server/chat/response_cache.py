@@ -0,0 +1,169 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from brainiax.server.chunks.chunks_service import Chunk
+
+
+@dataclass
+class ResponseCacheQuery:
+    """A chat message looked up in the cache.
+
+    `key` must be equal for a cached response to be reused (system prompt, chat
+    history, filter, ids of the context chunks...), and `embedding`, the embedding
+    of the message, close enough. `collection` and `generation` are the ones of
+    the context, None and 0 for a chat without context.
+    """
+
+    key: Hashable
+    embedding: list[float]
+    collection: str | None = None
+    generation: int = 0
+
+
+@dataclass
+class CachedResponse:
+    response: str
+    sources: list[Chunk] | None
+
+
+@dataclass
+class _Entry:
+    query: ResponseCacheQuery
+    embedding: np.ndarray
+    response: CachedResponse
+    created_at: float
+    # Seconds taken to generate the response, saved by each hit
+    latency: float
+
+
+def _normalized(embedding: list[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    return vector / (np.linalg.norm(vector) + 1e-12)
+
+
+class ResponseCache:
+    """In-memory semantic cache of the chat responses.
+
+    A response is reused for a message with the same key whose embedding has a
+    cosine similarity of at least `similarity_threshold` with the cached one, so
+    paraphrases of a question get the same answer without calling the LLM. The
+    entries of a collection are evicted when its generation changes (documents
+    ingested or deleted), the least recently used ones once more than
+    `max_entries` are stored, and the ones older than `ttl` seconds (0 for no
+    limit). Entries are grouped by key, a lookup only compares the embeddings of
+    its key. This class is thread-safe.
+    """
+
+    def __init__(
+        self, max_entries: int, ttl: float, similarity_threshold: float
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        # In least recently used order
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        # In creation order, the oldest ones expire first
+        self._created: OrderedDict[int, _Entry] = OrderedDict()
+        self._by_key: dict[Hashable, dict[int, _Entry]] = {}
+        self._by_collection: dict[str, set[int]] = {}
+        self._generations: dict[str, int] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        del self._created[entry_id]
+        bucket = self._by_key[entry.query.key]
+        del bucket[entry_id]
+        if not bucket:
+            del self._by_key[entry.query.key]
+        if entry.query.collection is not None:
+            self._by_collection[entry.query.collection].discard(entry_id)
+
+    def _evict_outdated(self, query: ResponseCacheQuery) -> None:
+        """Evict the expired entries, and the ones of an outdated generation."""
+        if query.collection is not None:
+            generation = self._generations.get(query.collection, 0)
+            if query.generation > generation:
+                self._generations[query.collection] = query.generation
+                # The entries of a collection are all of its last generation
+                for entry_id in list(self._by_collection.get(query.collection, ())):
+                    self._remove(entry_id)
+        if self.ttl:
+            expired_before = time.monotonic() - self.ttl
+            while self._created:
+                entry_id, entry = next(iter(self._created.items()))
+                if entry.created_at >= expired_before:
+                    break
+                self._remove(entry_id)
+
+    def get(self, query: ResponseCacheQuery) -> CachedResponse | None:
+        embedding = _normalized(query.embedding)
+        with self._lock:
+            self._evict_outdated(query)
+            best_id, best_similarity = None, self.similarity_threshold
+            for entry_id, entry in self._by_key.get(query.key, {}).items():
+                similarity = float(entry.embedding @ embedding)
+                if similarity >= best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+            if best_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            entry = self._entries[best_id]
+            self.hits += 1
+            self.saved_seconds += entry.latency
+            return entry.response
+
+    def put(
+        self,
+        query: ResponseCacheQuery,
+        response: str,
+        sources: list[Chunk] | None,
+        latency: float,
+    ) -> None:
+        with self._lock:
+            self._evict_outdated(query)
+            if (
+                query.collection is not None
+                and query.generation < self._generations.get(query.collection, 0)
+            ):
+                # The context changed while the response was generated
+                return
+            entry_id = self._next_id
+            self._next_id += 1
+            entry = _Entry(
+                query=query,
+                embedding=_normalized(query.embedding),
+                response=CachedResponse(response, sources),
+                created_at=time.monotonic(),
+                latency=latency,
+            )
+            self._entries[entry_id] = entry
+            self._created[entry_id] = entry
+            self._by_key.setdefault(query.key, {})[entry_id] = entry
+            if query.collection is not None:
+                self._by_collection.setdefault(query.collection, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_seconds": self.saved_seconds,
+            }
@@ -1,14 +1,10 @@
 from typing import TYPE_CHECKING, Literal
 
 from injector import inject, singleton
-from llama_index.core.indices import VectorStoreIndex
 from llama_index.core.schema import NodeWithScore
-from llama_index.core.storage import StorageContext
 from pydantic import BaseModel, Field
 
-from brainiax.components.embedding.embedding_component import EmbeddingComponent
-from brainiax.components.llm.llm_component import LLMComponent
-from brainiax.components.node_store.node_store_component import NodeStoreComponent
+from brainiax.components.index.index_component import IndexComponent
 from brainiax.components.vector_store.vector_store_component import (
     VectorStoreComponent,
 )
@@ -59,23 +55,20 @@ class ChunksService:
     @inject
     def __init__(
         self,
-        llm_component: LLMComponent,
         vector_store_component: VectorStoreComponent,
-        embedding_component: EmbeddingComponent,
-        node_store_component: NodeStoreComponent,
+        index_component: IndexComponent,
     ) -> None:
         self.vector_store_component = vector_store_component
-        self.llm_component = llm_component
-        self.embedding_component = embedding_component
-        self.storage_context = StorageContext.from_defaults(
-            vector_store=vector_store_component.vector_store,
-            docstore=node_store_component.doc_store,
-            index_store=node_store_component.index_store,
-        )
+        self.index_component = index_component
 
     def _get_sibling_nodes_text(
-        self, node_with_score: NodeWithScore, related_number: int, forward: bool = True
+        self,
+        node_with_score: NodeWithScore,
+        related_number: int,
+        forward: bool = True,
+        collection: str | None = None,
     ) -> list[str]:
+        docstore = self.index_component.get_storage_context(collection).docstore
         explored_nodes_texts = []
         current_node = node_with_score.node
         for _ in range(related_number):
@@ -85,9 +78,7 @@ class ChunksService:
             if explored_node_info is None:
                 break
 
-            explored_node = self.storage_context.docstore.get_node(
-                explored_node_info.node_id
-            )
+            explored_node = docstore.get_node(explored_node_info.node_id)
 
             explored_nodes_texts.append(explored_node.get_content())
             current_node = explored_node
@@ -100,27 +91,23 @@ class ChunksService:
         context_filter: ContextFilter | None = None,
         limit: int = 10,
         prev_next_chunks: int = 0,
+        collection: str | None = None,
     ) -> list[Chunk]:
-        index = VectorStoreIndex.from_vector_store(
-            self.vector_store_component.vector_store,
-            storage_context=self.storage_context,
-            llm=self.llm_component.llm,
-            embed_model=self.embedding_component.embedding_model,
-            show_progress=True,
+        retriever = self.index_component.get_retriever(
+            collection, context_filter=context_filter, similarity_top_k=limit
         )
-        vector_index_retriever = self.vector_store_component.get_retriever(
-            index=index, context_filter=context_filter, similarity_top_k=limit
-        )
-        nodes = vector_index_retriever.retrieve(text)
+        nodes = retriever.retrieve(text)
         nodes.sort(key=lambda n: n.score or 0.0, reverse=True)
 
         retrieved_nodes = []
         for node in nodes:
             chunk = Chunk.from_node(node)
             chunk.previous_texts = self._get_sibling_nodes_text(
-                node, prev_next_chunks, False
+                node, prev_next_chunks, False, collection
+            )
+            chunk.next_texts = self._get_sibling_nodes_text(
+                node, prev_next_chunks, True, collection
             )
-            chunk.next_texts = self._get_sibling_nodes_text(node, prev_next_chunks)
             retrieved_nodes.append(chunk)
 
         return retrieved_nodes
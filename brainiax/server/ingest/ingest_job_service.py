@@ -0,0 +1,299 @@
+import logging
+import queue
+import shutil
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import BinaryIO, Literal
+
+from injector import inject, singleton
+from pydantic import BaseModel, Field
+
+from brainiax.components.ingest.ingest_component import IngestStep
+from brainiax.paths import local_data_path
+from brainiax.server.ingest.ingest_service import IngestService
+from brainiax.server.ingest.model import IngestedDoc
+from brainiax.settings.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+IngestJobStatus = Literal["queued", "running", "indexed", "completed", "failed"]
+
+# Finished jobs are kept this long to let clients poll their result
+_FINISHED_JOB_RETENTION_SECONDS = 24 * 60 * 60
+
+_UPLOAD_COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class IngestJobEvent(BaseModel):
+    object: Literal["ingest.job.event"]
+    job_id: str
+    event: Literal["queued", "started", IngestStep, "completed", "failed"]
+    count: int | None = Field(
+        default=None,
+        description="Number of documents or nodes concerned by the event, if any.",
+    )
+    created: int = Field(..., examples=[1623340000])
+
+
+class IngestJob(BaseModel):
+    object: Literal["ingest.job"]
+    job_id: str = Field(examples=["0b4c7a5e-39c4-4bd6-9c0e-3b1b9e3c6f7a"])
+    file_name: str = Field(examples=["Generative AI.pdf"])
+    collection: str | None = Field(
+        default=None, description="Collection ingested into, the default one if None."
+    )
+    status: IngestJobStatus = Field(examples=["running"])
+    created: int = Field(..., examples=[1623340000])
+    documents_parsed: int = 0
+    nodes_embedded: int = 0
+    data: list[IngestedDoc] | None = None
+    error: str | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+
+class _JobState:
+    """In-memory state of a job: the job itself and the events sent so far."""
+
+    def __init__(self, job: IngestJob) -> None:
+        self.job = job
+        self.events: list[IngestJobEvent] = []
+        # Documents indexed but not persisted yet, a file can be indexed in parts
+        self.unpersisted_documents = 0
+        self.persist_failed = False
+
+
+@singleton
+class IngestJobService:
+    """Ingest files in the background, reporting the progress of each ingestion.
+
+    Submitted files are copied to `local_data_path/ingest_jobs` together with the
+    state of their job, and processed by a bounded pool of worker threads. Jobs
+    that were queued or running when the server stopped are re-queued on startup.
+    """
+
+    @inject
+    def __init__(self, settings: Settings, ingest_service: IngestService) -> None:
+        self._ingest_service = ingest_service
+        self._jobs_path = local_data_path / "ingest_jobs"
+        self._jobs_path.mkdir(parents=True, exist_ok=True)
+        self._jobs: dict[str, _JobState] = {}
+        self._condition = threading.Condition()
+        self._queue: queue.Queue[str] = queue.Queue()
+
+        self._load_jobs()
+        # Daemon threads: a job interrupted by a shutdown is re-queued on restart
+        for i in range(settings.embedding.job_workers):
+            threading.Thread(
+                target=self._work, name=f"ingest-job-worker-{i}", daemon=True
+            ).start()
+
+    def _job_path(self, job_id: str) -> Path:
+        return self._jobs_path / f"{job_id}.json"
+
+    def _payload_path(self, job_id: str) -> Path:
+        return self._jobs_path / f"{job_id}.data"
+
+    def _load_jobs(self) -> None:
+        now = time.time()
+        for job_path in sorted(
+            self._jobs_path.glob("*.json"), key=lambda p: p.stat().st_mtime
+        ):
+            try:
+                job = IngestJob.model_validate_json(job_path.read_text())
+            except ValueError:
+                logger.warning("Ignoring unreadable ingest job=%s", job_path.name)
+                continue
+            if job.finished:
+                if now - job.created > _FINISHED_JOB_RETENTION_SECONDS:
+                    job_path.unlink(missing_ok=True)
+                else:
+                    self._jobs[job.job_id] = _JobState(job)
+                continue
+            if not self._payload_path(job.job_id).exists():
+                job.status = "failed"
+                job.error = "The uploaded file was lost"
+                self._jobs[job.job_id] = _JobState(job)
+                self._save_job(job)
+                continue
+
+            logger.info("Re-queuing interrupted ingest job=%s", job.job_id)
+            job.status = "queued"
+            job.documents_parsed = 0
+            job.nodes_embedded = 0
+            self._jobs[job.job_id] = _JobState(job)
+            self._save_job(job)
+            self._queue.put(job.job_id)
+
+    def _save_job(self, job: IngestJob) -> None:
+        tmp_path = self._job_path(job.job_id).with_suffix(".tmp")
+        tmp_path.write_text(job.model_dump_json())
+        tmp_path.replace(self._job_path(job.job_id))
+
+    def _submit(
+        self,
+        file_name: str,
+        write_payload: Callable[[BinaryIO], object],
+        collection: str | None = None,
+    ) -> IngestJob:
+        job_id = str(uuid.uuid4())
+        with self._payload_path(job_id).open("wb") as payload:
+            write_payload(payload)
+        job = IngestJob(
+            object="ingest.job",
+            job_id=job_id,
+            file_name=file_name,
+            collection=collection,
+            status="queued",
+            created=int(time.time()),
+        )
+        with self._condition:
+            self._jobs[job_id] = _JobState(job)
+            self._save_job(job)
+            self._add_event(job_id, "queued")
+        self._queue.put(job_id)
+        logger.info("Queued ingest job=%s for file_name=%s", job_id, file_name)
+        return job.model_copy()
+
+    def submit_bin_data(
+        self, file_name: str, raw_file_data: BinaryIO, collection: str | None = None
+    ) -> IngestJob:
+        return self._submit(
+            file_name,
+            lambda payload: shutil.copyfileobj(
+                raw_file_data, payload, _UPLOAD_COPY_BUFFER_SIZE
+            ),
+            collection,
+        )
+
+    def submit_text(
+        self, file_name: str, text: str, collection: str | None = None
+    ) -> IngestJob:
+        return self._submit(
+            file_name, lambda payload: payload.write(text.encode()), collection
+        )
+
+    def get_job(self, job_id: str) -> IngestJob:
+        """Get the current state of a job.
+
+        :raises KeyError: if the job does not exist
+        """
+        with self._condition:
+            return self._jobs[job_id].job.model_copy()
+
+    def list_jobs(self) -> list[IngestJob]:
+        with self._condition:
+            return [state.job.model_copy() for state in self._jobs.values()]
+
+    def stream_events(self, job_id: str) -> Iterator[IngestJobEvent]:
+        """Yield the events of a job, from the first one until the job is finished.
+
+        :raises KeyError: if the job does not exist
+        """
+        state = self._jobs[job_id]
+        sent = 0
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: len(state.events) > sent or state.job.finished,
+                    timeout=30,
+                )
+                events = state.events[sent:]
+                finished = state.job.finished
+            sent += len(events)
+            yield from events
+            if finished and not events:
+                return
+
+    def _add_event(self, job_id: str, event: str, count: int | None = None) -> None:
+        """Record an event of the job, must be called holding the condition."""
+        self._jobs[job_id].events.append(
+            IngestJobEvent(
+                object="ingest.job.event",
+                job_id=job_id,
+                event=event,  # type: ignore[arg-type]
+                count=count,
+                created=int(time.time()),
+            )
+        )
+        self._condition.notify_all()
+
+    def _on_progress(self, job_id: str, step: IngestStep, count: int) -> None:
+        with self._condition:
+            state = self._jobs[job_id]
+            job = state.job
+            if step == "parsed":
+                job.documents_parsed += count
+            elif step == "embedded":
+                job.nodes_embedded += count
+            elif step == "indexed":
+                job.status = "indexed"
+                state.unpersisted_documents += count
+            elif step == "persisted":
+                state.unpersisted_documents -= count
+            elif step == "persist_failed":
+                state.persist_failed = True
+            self._add_event(job_id, step, count)
+            # Until the ingestion returns, the worker finishes the job
+            if job.data is None or job.finished:
+                return
+            if state.persist_failed:
+                self._fail_persist(job_id)
+            elif state.unpersisted_documents == 0:
+                self._finish(job_id, "completed")
+
+    def _fail_persist(self, job_id: str) -> None:
+        """Mark the job as failed to persist, must be called holding the condition."""
+        self._jobs[job_id].job.error = (
+            "The documents were indexed but the index could not be persisted, "
+            "see the server logs"
+        )
+        self._finish(job_id, "failed")
+
+    def _finish(self, job_id: str, status: IngestJobStatus) -> None:
+        """Mark the job as finished, must be called holding the condition."""
+        job = self._jobs[job_id].job
+        job.status = status
+        self._save_job(job)
+        self._add_event(job_id, status)
+        self._payload_path(job_id).unlink(missing_ok=True)
+
+    def _work(self) -> None:
+        while True:
+            job_id = self._queue.get()
+            with self._condition:
+                state = self._jobs[job_id]
+                state.job.status = "running"
+                self._save_job(state.job)
+                self._add_event(job_id, "started")
+            file_name = state.job.file_name
+            try:
+                ingested_docs = self._ingest_service.ingest_file(
+                    file_name,
+                    self._payload_path(job_id),
+                    progress=lambda step, count: self._on_progress(job_id, step, count),
+                    collection=state.job.collection,
+                )
+            except Exception as e:
+                logger.exception("Ingest job=%s failed", job_id)
+                with self._condition:
+                    state.job.error = f"{type(e).__name__}: {e}"
+                    self._finish(job_id, "failed")
+                continue
+
+            with self._condition:
+                state.job.data = ingested_docs
+                # Wait for the grouped persists of the index before completing the
+                # job, unless nothing was indexed (e.g. unchanged file) or they
+                # already happened
+                if state.persist_failed:
+                    self._fail_persist(job_id)
+                elif state.unpersisted_documents == 0:
+                    self._finish(job_id, "completed")
+                else:
+                    self._save_job(state.job)
@@ -1,14 +1,28 @@
+from collections.abc import Iterator
 from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile
+from fastapi import APIRouter, Depends, Form, HTTPException, Query, Request, UploadFile
 from pydantic import BaseModel, Field
+from starlette.responses import StreamingResponse
 
+from brainiax.constants import COLLECTION_NAME_PATTERN
+
+from brainiax.server.ingest.ingest_job_service import (
+    IngestJob,
+    IngestJobEvent,
+    IngestJobService,
+)
 from brainiax.server.ingest.ingest_service import IngestService
 from brainiax.server.ingest.model import IngestedDoc
 from brainiax.server.utils.auth import authenticated
 
 ingest_router = APIRouter(prefix="/v1", dependencies=[Depends(authenticated)])
 
+_COLLECTION_DESCRIPTION = (
+    "Collection of documents to use, each one has its own storage. "
+    "The default collection if not given."
+)
+
 
 class IngestTextBody(BaseModel):
     file_name: str = Field(examples=["How LLMs Can Improve Educational landscpae"])
@@ -17,6 +31,25 @@ class IngestTextBody(BaseModel):
             "LLMs can generate customized learning materials such as practice problems, quizzes, and interactive exercises based on a student's progress and understanding."
         ]
     )
+    collection: str | None = Field(
+        None,
+        pattern=COLLECTION_NAME_PATTERN,
+        examples=["team_a"],
+        description=_COLLECTION_DESCRIPTION,
+    )
+
+
+class IngestDeleteBody(BaseModel):
+    doc_ids: list[str] = Field(examples=[["c202d5e6-7b69-4869-81cc-dd574ee8ee11"]])
+    collection: str | None = Field(
+        None, pattern=COLLECTION_NAME_PATTERN, description=_COLLECTION_DESCRIPTION
+    )
+
+
+class IngestDeleteResponse(BaseModel):
+    object: Literal["list"]
+    model: Literal["brainiax"]
+    data: list[str] = Field(description="The IDs of the deleted Documents.")
 
 
 class IngestResponse(BaseModel):
@@ -25,17 +58,29 @@ class IngestResponse(BaseModel):
     data: list[IngestedDoc]
 
 
+class IngestJobsResponse(BaseModel):
+    object: Literal["list"]
+    model: Literal["brainiax"]
+    data: list[IngestJob]
+
+
 @ingest_router.post("/ingest", tags=["Ingestion"], deprecated=True)
 def ingest(request: Request, file: UploadFile) -> IngestResponse:
     """Ingests and processes a file.
 
     Deprecated. Use ingest/file instead.
     """
-    return ingest_file(request, file)
+    return ingest_file(request, file, None)
 
 
 @ingest_router.post("/ingest/file", tags=["Ingestion"])
-def ingest_file(request: Request, file: UploadFile) -> IngestResponse:
+def ingest_file(
+    request: Request,
+    file: UploadFile,
+    collection: str | None = Form(
+        None, pattern=COLLECTION_NAME_PATTERN, description=_COLLECTION_DESCRIPTION
+    ),
+) -> IngestResponse:
     """Ingests and processes a file, storing its chunks to be used as context.
 
     The context obtained from files is later used in
@@ -54,7 +99,9 @@ def ingest_file(request: Request, file: UploadFile) -> IngestResponse:
     service = request.state.injector.get(IngestService)
     if file.filename is None:
         raise HTTPException(400, "No file name provided")
-    ingested_documents = service.ingest_bin_data(file.filename, file.file)
+    ingested_documents = service.ingest_bin_data(
+        file.filename, file.file, collection=collection
+    )
     return IngestResponse(object="list", model="brainiax", data=ingested_documents)
 
 
@@ -74,28 +121,150 @@ def ingest_text(request: Request, body: IngestTextBody) -> IngestResponse:
     service = request.state.injector.get(IngestService)
     if len(body.file_name) == 0:
         raise HTTPException(400, "No file name provided")
-    ingested_documents = service.ingest_text(body.file_name, body.text)
+    ingested_documents = service.ingest_text(
+        body.file_name, body.text, collection=body.collection
+    )
     return IngestResponse(object="list", model="brainiax", data=ingested_documents)
 
 
+@ingest_router.post("/ingest/jobs/file", tags=["Ingestion"])
+def submit_ingest_file_job(
+    request: Request,
+    file: UploadFile,
+    collection: str | None = Form(
+        None, pattern=COLLECTION_NAME_PATTERN, description=_COLLECTION_DESCRIPTION
+    ),
+) -> IngestJob:
+    """Queues the ingestion of a file and returns its job right away.
+
+    Unlike `/ingest/file`, the request does not wait for the file to be parsed,
+    embedded and persisted, so large files are not subject to request timeouts.
+    The progress of the job can be polled with `GET /ingest/jobs/{job_id}` or
+    followed with the server-sent events of `GET /ingest/jobs/{job_id}/events`.
+    Once the job is `completed`, its `data` holds the ingested Documents.
+
+    Jobs are kept across server restarts: a job that was queued or running when
+    the server stopped is queued again when it starts.
+    """
+    service = request.state.injector.get(IngestJobService)
+    if file.filename is None:
+        raise HTTPException(400, "No file name provided")
+    return service.submit_bin_data(file.filename, file.file, collection)
+
+
+@ingest_router.post("/ingest/jobs/text", tags=["Ingestion"])
+def submit_ingest_text_job(request: Request, body: IngestTextBody) -> IngestJob:
+    """Queues the ingestion of a text and returns its job right away.
+
+    See `/ingest/jobs/file` for how to follow the job.
+    """
+    service = request.state.injector.get(IngestJobService)
+    if len(body.file_name) == 0:
+        raise HTTPException(400, "No file name provided")
+    return service.submit_text(body.file_name, body.text, body.collection)
+
+
+@ingest_router.get("/ingest/jobs", tags=["Ingestion"])
+def list_ingest_jobs(request: Request) -> IngestJobsResponse:
+    """Lists the ingestion jobs, including the ones finished in the last day."""
+    service = request.state.injector.get(IngestJobService)
+    return IngestJobsResponse(object="list", model="brainiax", data=service.list_jobs())
+
+
+@ingest_router.get("/ingest/jobs/{job_id}", tags=["Ingestion"])
+def get_ingest_job(request: Request, job_id: str) -> IngestJob:
+    """Gets the status and progress of an ingestion job."""
+    service = request.state.injector.get(IngestJobService)
+    try:
+        return service.get_job(job_id)
+    except KeyError:
+        raise HTTPException(404, f"Ingest job {job_id} not found") from None
+
+
+@ingest_router.get(
+    "/ingest/jobs/{job_id}/events",
+    response_model=None,
+    responses={200: {"model": IngestJobEvent}},
+    tags=["Ingestion"],
+)
+def stream_ingest_job_events(request: Request, job_id: str) -> StreamingResponse:
+    """Streams the progress events of an ingestion job as server-sent events.
+
+    All the events since the job was queued are sent (`queued`, `started`,
+    `parsed`, `embedded`, `indexed`, `persisted`), and the stream ends with
+    `data: [DONE]` after the `completed` or `failed` event.
+    """
+    service = request.state.injector.get(IngestJobService)
+    get_ingest_job(request, job_id)
+
+    def to_sse_stream() -> Iterator[str]:
+        for event in service.stream_events(job_id):
+            yield f"data: {event.model_dump_json()}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(to_sse_stream(), media_type="text/event-stream")
+
+
 @ingest_router.get("/ingest/list", tags=["Ingestion"])
-def list_ingested(request: Request) -> IngestResponse:
+def list_ingested(
+    request: Request,
+    collection: str | None = Query(
+        None, pattern=COLLECTION_NAME_PATTERN, description=_COLLECTION_DESCRIPTION
+    ),
+) -> IngestResponse:
     """Lists already ingested Documents including their Document ID and metadata.
 
     Those IDs can be used to filter the context used to create responses
     in `/chat/completions`, `/completions`, and `/chunks` APIs.
     """
     service = request.state.injector.get(IngestService)
-    ingested_documents = service.list_ingested()
+    ingested_documents = service.list_ingested(collection)
     return IngestResponse(object="list", model="brainiax", data=ingested_documents)
 
 
 @ingest_router.delete("/ingest/{doc_id}", tags=["Ingestion"])
-def delete_ingested(request: Request, doc_id: str) -> None:
+def delete_ingested(
+    request: Request,
+    doc_id: str,
+    collection: str | None = Query(
+        None, pattern=COLLECTION_NAME_PATTERN, description=_COLLECTION_DESCRIPTION
+    ),
+) -> None:
     """Delete the specified ingested Document.
 
     The `doc_id` can be obtained from the `GET /ingest/list` endpoint.
     The document will be effectively deleted from your storage context.
     """
     service = request.state.injector.get(IngestService)
-    service.delete(doc_id)
+    service.delete(doc_id, collection)
+
+
+@ingest_router.post("/ingest/delete", tags=["Ingestion"])
+def bulk_delete_ingested(
+    request: Request, body: IngestDeleteBody
+) -> IngestDeleteResponse:
+    """Delete the specified ingested Documents at once.
+
+    Much faster than calling `DELETE /ingest/{doc_id}` for each Document, for
+    example to delete all the pages of a PDF: the storage is saved only once.
+    Unknown IDs are ignored, the IDs of the deleted Documents are returned.
+    """
+    service = request.state.injector.get(IngestService)
+    deleted_doc_ids = service.bulk_delete(body.doc_ids, body.collection)
+    return IngestDeleteResponse(object="list", model="brainiax", data=deleted_doc_ids)
+
+
+@ingest_router.delete("/ingest", tags=["Ingestion"])
+def delete_all_ingested(
+    request: Request,
+    collection: str | None = Query(
+        None, pattern=COLLECTION_NAME_PATTERN, description=_COLLECTION_DESCRIPTION
+    ),
+) -> None:
+    """Delete all the ingested Documents of a collection.
+
+    The vector store collection and the document store are dropped and recreated
+    empty, which is much faster than deleting the Documents one by one.
+    """
+    service = request.state.injector.get(IngestService)
+    service.reset(collection)
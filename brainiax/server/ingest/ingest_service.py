@@ -1,19 +1,26 @@
 import logging
+import shutil
 import tempfile
+import threading
 from pathlib import Path
 from typing import TYPE_CHECKING, AnyStr, BinaryIO
 
 from injector import inject, singleton
-from llama_index.core.node_parser import SentenceWindowNodeParser
 from llama_index.core.storage import StorageContext
 
 from brainiax.components.embedding.embedding_component import EmbeddingComponent
-from brainiax.components.ingest.ingest_component import get_ingestion_component
-from brainiax.components.llm.llm_component import LLMComponent
-from brainiax.components.node_store.node_store_component import NodeStoreComponent
-from brainiax.components.vector_store.vector_store_component import (
-    VectorStoreComponent,
+from brainiax.components.index.index_component import IndexComponent
+from brainiax.components.ingest.ingest_component import (
+    BaseIngestComponent,
+    IngestProgressCallback,
+    get_ingestion_component,
+)
+from brainiax.components.ingest.ingest_helper import IngestionHelper
+from brainiax.components.ingest.sentence_window import (
+    CompactSentenceWindowNodeParser,
 )
+from brainiax.components.llm.llm_component import LLMComponent
+from brainiax.server.ingest.ingested_doc_index import IngestedDocIndex
 from brainiax.server.ingest.model import IngestedDoc
 from brainiax.settings.settings import settings
 
@@ -22,34 +29,86 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+_COPY_BUFFER_SIZE = 1024 * 1024
+
 
 @singleton
 class IngestService:
+    """Ingestion into the collections, each one with its own stores and index.
+
+    The methods work on the default collection when no collection is given.
+    """
+
     @inject
     def __init__(
         self,
         llm_component: LLMComponent,
-        vector_store_component: VectorStoreComponent,
         embedding_component: EmbeddingComponent,
-        node_store_component: NodeStoreComponent,
+        index_component: IndexComponent,
     ) -> None:
         self.llm_service = llm_component
-        self.storage_context = StorageContext.from_defaults(
-            vector_store=vector_store_component.vector_store,
-            docstore=node_store_component.doc_store,
-            index_store=node_store_component.index_store,
-        )
-        node_parser = SentenceWindowNodeParser.from_defaults()
+        self.embedding_component = embedding_component
+        self.index_component = index_component
+        self._ingest_components: dict[str, BaseIngestComponent] = {}
+        # Lookups of the documents of a file, maintained on ingestion and deletion
+        self._doc_indexes: dict[str, IngestedDocIndex] = {}
+        self._lock = threading.Lock()
 
-        self.ingest_component = get_ingestion_component(
-            self.storage_context,
-            embed_model=embedding_component.embedding_model,
-            transformations=[node_parser, embedding_component.embedding_model],
-            settings=settings(),
-        )
+    @property
+    def storage_context(self) -> StorageContext:
+        return self.index_component.storage_context
+
+    @property
+    def ingest_component(self) -> BaseIngestComponent:
+        return self.get_ingest_component()
+
+    def _collection(self, collection: str | None) -> str:
+        return collection or settings().vectorstore.default_collection
+
+    def get_ingest_component(
+        self, collection: str | None = None
+    ) -> BaseIngestComponent:
+        """Created on first use, loading the stores and the index it ingests into."""
+        collection = self._collection(collection)
+        ingest_component = self._ingest_components.get(collection)
+        if ingest_component is None:
+            with self._lock:
+                ingest_component = self._ingest_components.get(collection)
+                if ingest_component is None:
+                    node_store_component = self.index_component.node_store_component
+                    sparse_index_component = self.index_component.sparse_index_component
+                    embedding_model = self.embedding_component.embedding_model
+                    node_parser = CompactSentenceWindowNodeParser.from_defaults()
+                    ingest_component = get_ingestion_component(
+                        self.index_component.get_storage_context(collection),
+                        embed_model=embedding_model,
+                        transformations=[node_parser, embedding_model],
+                        settings=settings(),
+                        persist_dir=node_store_component.persist_dir(collection),
+                        sparse_index=sparse_index_component.get_index(collection),
+                        generation=self.index_component.get_generation(collection),
+                    )
+                    self._ingest_components[collection] = ingest_component
+        return ingest_component
+
+    def _get_doc_index(self, collection: str | None) -> IngestedDocIndex:
+        collection = self._collection(collection)
+        doc_index = self._doc_indexes.get(collection)
+        if doc_index is None:
+            with self._lock:
+                doc_index = self._doc_indexes.setdefault(
+                    collection,
+                    IngestedDocIndex(lambda: self.list_ingested(collection)),
+                )
+        return doc_index
 
-    def _ingest_data(self, file_name: str, file_data: AnyStr) -> list[IngestedDoc]:
-        logger.debug("Got file data of size=%s to ingest", len(file_data))
+    def _ingest_data(
+        self,
+        file_name: str,
+        file_data: AnyStr | BinaryIO,
+        progress: IngestProgressCallback | None = None,
+        collection: str | None = None,
+    ) -> list[IngestedDoc]:
         # llama-index mainly supports reading from files, so
         # we have to create a tmp file to read for it to work
         # delete=False to avoid a Windows 11 permission error.
@@ -58,40 +117,143 @@ class IngestService:
                 path_to_tmp = Path(tmp.name)
                 if isinstance(file_data, bytes):
                     path_to_tmp.write_bytes(file_data)
+                elif isinstance(file_data, str):
+                    path_to_tmp.write_text(file_data)
                 else:
-                    path_to_tmp.write_text(str(file_data))
-                return self.ingest_file(file_name, path_to_tmp)
+                    # Stream the data in bounded chunks instead of reading it whole,
+                    # the memory used does not grow with the size of the file. An
+                    # upload spooled to disk (above 1 MiB) is an unnamed file the
+                    # readers cannot open, so it is still written to disk twice
+                    shutil.copyfileobj(file_data, tmp, _COPY_BUFFER_SIZE)
+                    tmp.close()
+                logger.debug(
+                    "Got file data of size=%s to ingest", path_to_tmp.stat().st_size
+                )
+                return self.ingest_file(file_name, path_to_tmp, progress, collection)
             finally:
                 tmp.close()
                 path_to_tmp.unlink()
 
-    def ingest_file(self, file_name: str, file_data: Path) -> list[IngestedDoc]:
-        logger.info("Ingesting file_name=%s", file_name)
-        documents = self.ingest_component.ingest(file_name, file_data)
+    def ingest_file(
+        self,
+        file_name: str,
+        file_data: Path,
+        progress: IngestProgressCallback | None = None,
+        collection: str | None = None,
+    ) -> list[IngestedDoc]:
+        logger.info(
+            "Ingesting file_name=%s collection=%s",
+            file_name,
+            self._collection(collection),
+        )
+        already_ingested = self.find_ingested(file_name, file_data, collection)
+        if already_ingested:
+            logger.info(
+                "Skipping file_name=%s, its content is already ingested", file_name
+            )
+            return already_ingested
+        doc_index = self._get_doc_index(collection)
+        try:
+            documents = self.get_ingest_component(collection).ingest(
+                file_name, file_data, progress
+            )
+        except Exception:
+            # Some documents may have been ingested before the failure
+            doc_index.invalidate()
+            raise
         logger.info("Finished ingestion file_name=%s", file_name)
-        return [IngestedDoc.from_document(document) for document in documents]
+        ingested_docs = [IngestedDoc.from_document(document) for document in documents]
+        doc_index.add(ingested_docs)
+        return ingested_docs
 
-    def ingest_text(self, file_name: str, text: str) -> list[IngestedDoc]:
+    def ingest_text(
+        self,
+        file_name: str,
+        text: str,
+        progress: IngestProgressCallback | None = None,
+        collection: str | None = None,
+    ) -> list[IngestedDoc]:
         logger.debug("Ingesting text data with file_name=%s", file_name)
-        return self._ingest_data(file_name, text)
+        return self._ingest_data(file_name, text, progress, collection)
 
     def ingest_bin_data(
-        self, file_name: str, raw_file_data: BinaryIO
+        self,
+        file_name: str,
+        raw_file_data: BinaryIO,
+        progress: IngestProgressCallback | None = None,
+        collection: str | None = None,
     ) -> list[IngestedDoc]:
         logger.debug("Ingesting binary data with file_name=%s", file_name)
-        file_data = raw_file_data.read()
-        return self._ingest_data(file_name, file_data)
+        return self._ingest_data(file_name, raw_file_data, progress, collection)
 
-    def bulk_ingest(self, files: list[tuple[str, Path]]) -> list[IngestedDoc]:
-        logger.info("Ingesting file_names=%s", [f[0] for f in files])
-        documents = self.ingest_component.bulk_ingest(files)
+    def bulk_ingest(
+        self, files: list[tuple[str, Path]], collection: str | None = None
+    ) -> list[IngestedDoc]:
+        logger.info(
+            "Ingesting file_names=%s collection=%s",
+            [f[0] for f in files],
+            self._collection(collection),
+        )
+        already_ingested: list[IngestedDoc] = []
+        files_to_ingest: list[tuple[str, Path]] = []
+        for file_name, file_data in files:
+            ingested_docs = self.find_ingested(file_name, file_data, collection)
+            if ingested_docs:
+                logger.info(
+                    "Skipping file_name=%s, its content is already ingested", file_name
+                )
+                already_ingested.extend(ingested_docs)
+            else:
+                files_to_ingest.append((file_name, file_data))
+
+        doc_index = self._get_doc_index(collection)
+        try:
+            documents = (
+                self.get_ingest_component(collection).bulk_ingest(files_to_ingest)
+                if files_to_ingest
+                else []
+            )
+        except Exception:
+            doc_index.invalidate()
+            raise
         logger.info("Finished ingestion file_name=%s", [f[0] for f in files])
-        return [IngestedDoc.from_document(document) for document in documents]
+        ingested_docs = [IngestedDoc.from_document(document) for document in documents]
+        doc_index.add(ingested_docs)
+        return already_ingested + ingested_docs
+
+    def flush(self, collection: str | None = None) -> None:
+        """Persist the ingested documents now, instead of with the next grouped persist."""
+        self.get_ingest_component(collection).flush()
+
+    def close(self) -> None:
+        """Persist the pending documents of all the collections and stop ingesting."""
+        for ingest_component in list(self._ingest_components.values()):
+            ingest_component.close()
+
+    def find_ingested(
+        self, file_name: str, file_data: Path, collection: str | None = None
+    ) -> list[IngestedDoc]:
+        """Find the documents already ingested from a file with the same name and content.
+
+        Returns an empty list if the file was never ingested, or if its content changed.
+        """
+        return self._get_doc_index(collection).find(
+            file_name=file_name, file_hash=IngestionHelper.file_hash(file_data)
+        )
+
+    def find_ingested_by_file_name(
+        self, file_name: str, collection: str | None = None
+    ) -> list[IngestedDoc]:
+        """Find the documents ingested from a file, e.g. the pages of a PDF."""
+        return self._get_doc_index(collection).find(file_name=file_name)
+
+    def list_ingested_file_names(self, collection: str | None = None) -> list[str]:
+        return self._get_doc_index(collection).values("file_name")
 
-    def list_ingested(self) -> list[IngestedDoc]:
+    def list_ingested(self, collection: str | None = None) -> list[IngestedDoc]:
         ingested_docs: list[IngestedDoc] = []
         try:
-            docstore = self.storage_context.docstore
+            docstore = self.index_component.get_storage_context(collection).docstore
             ref_docs: dict[str, RefDocInfo] | None = docstore.get_all_ref_doc_info()
 
             if not ref_docs:
@@ -114,7 +276,7 @@ class IngestService:
         logger.debug("Found count=%s ingested documents", len(ingested_docs))
         return ingested_docs
 
-    def delete(self, doc_id: str) -> None:
+    def delete(self, doc_id: str, collection: str | None = None) -> None:
         """Delete an ingested document.
 
         :raises ValueError: if the document does not exist
@@ -122,4 +284,44 @@ class IngestService:
         logger.info(
             "Deleting the ingested document=%s in the doc and index store", doc_id
         )
-        self.ingest_component.delete(doc_id)
+        doc_index = self._get_doc_index(collection)
+        try:
+            self.get_ingest_component(collection).delete(doc_id)
+        except Exception:
+            doc_index.invalidate()
+            raise
+        doc_index.remove([doc_id])
+
+    def bulk_delete(
+        self, doc_ids: list[str], collection: str | None = None
+    ) -> list[str]:
+        """Delete many ingested documents at once, persisting the stores only once.
+
+        Returns the ids of the deleted documents, unknown ids are ignored.
+        """
+        logger.info(
+            "Deleting count=%s ingested documents in the doc and index store",
+            len(doc_ids),
+        )
+        doc_index = self._get_doc_index(collection)
+        try:
+            deleted_doc_ids = self.get_ingest_component(collection).bulk_delete(doc_ids)
+        except Exception:
+            doc_index.invalidate()
+            raise
+        doc_index.remove(deleted_doc_ids)
+        return deleted_doc_ids
+
+    def reset(self, collection: str | None = None) -> None:
+        """Delete all the documents of a collection, recreating empty stores."""
+        logger.info(
+            "Deleting all the ingested documents of collection=%s",
+            self._collection(collection),
+        )
+        doc_index = self._get_doc_index(collection)
+        try:
+            self.get_ingest_component(collection).reset()
+        except Exception:
+            doc_index.invalidate()
+            raise
+        doc_index.clear()
@@ -0,0 +1,111 @@
+import logging
+import threading
+from collections.abc import Callable, Iterable
+
+from brainiax.server.ingest.model import IngestedDoc
+
+logger = logging.getLogger(__name__)
+
+# Metadata of the documents that can be looked up without scanning them all
+INDEXED_METADATA_KEYS = ("file_name", "file_hash")
+
+
+class IngestedDocIndex:
+    """Ingested documents by id and by value of their indexed metadata.
+
+    Built from the doc store on first use, then kept up to date by the ingest
+    service on every ingestion and deletion, so finding the documents of a file
+    does not go through all the ref docs of the doc store. This class is
+    thread-safe.
+    """
+
+    def __init__(self, load: Callable[[], list[IngestedDoc]]) -> None:
+        self._load = load
+        self._lock = threading.RLock()
+        self._docs: dict[str, IngestedDoc] | None = None
+        # metadata key -> metadata value -> doc ids, as dict keys to keep their order
+        self._doc_ids: dict[str, dict[str, dict[str, None]]] = {}
+
+    def _ensure_loaded(self) -> dict[str, IngestedDoc]:
+        with self._lock:
+            if self._docs is None:
+                self._docs = {}
+                self._doc_ids = {key: {} for key in INDEXED_METADATA_KEYS}
+                self._add(self._load())
+                logger.debug("Indexed count=%s ingested documents", len(self._docs))
+            return self._docs
+
+    def _add(self, docs: Iterable[IngestedDoc]) -> None:
+        assert self._docs is not None
+        for doc in docs:
+            self._remove([doc.doc_id])
+            self._docs[doc.doc_id] = doc
+            for key, doc_ids_by_value in self._doc_ids.items():
+                value = (doc.doc_metadata or {}).get(key)
+                if value is not None:
+                    doc_ids_by_value.setdefault(str(value), {})[doc.doc_id] = None
+
+    def _remove(self, doc_ids: Iterable[str]) -> None:
+        assert self._docs is not None
+        for doc_id in doc_ids:
+            doc = self._docs.pop(doc_id, None)
+            if doc is None:
+                continue
+            for key, doc_ids_by_value in self._doc_ids.items():
+                value = (doc.doc_metadata or {}).get(key)
+                if value is None:
+                    continue
+                doc_ids = doc_ids_by_value.get(str(value))
+                if doc_ids is not None:
+                    doc_ids.pop(doc_id, None)
+                    if not doc_ids:
+                        del doc_ids_by_value[str(value)]
+
+    def add(self, docs: Iterable[IngestedDoc]) -> None:
+        with self._lock:
+            if self._docs is not None:
+                self._add(docs)
+
+    def remove(self, doc_ids: Iterable[str]) -> None:
+        with self._lock:
+            if self._docs is not None:
+                self._remove(doc_ids)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._docs = {}
+            self._doc_ids = {key: {} for key in INDEXED_METADATA_KEYS}
+
+    def invalidate(self) -> None:
+        """Rebuild the index from the doc store on next use, after a failed change."""
+        with self._lock:
+            self._docs = None
+
+    def get(self, doc_ids: Iterable[str]) -> list[IngestedDoc]:
+        with self._lock:
+            docs = self._ensure_loaded()
+            return [docs[doc_id] for doc_id in doc_ids if doc_id in docs]
+
+    def find(self, **metadata: str) -> list[IngestedDoc]:
+        """Find the documents having all the given values of indexed metadata."""
+        with self._lock:
+            self._ensure_loaded()
+            candidates = []
+            for key, value in metadata.items():
+                if key not in self._doc_ids:
+                    raise ValueError(f"Metadata key={key} is not indexed")
+                candidates.append(self._doc_ids[key].get(str(value), {}))
+            if not candidates:
+                return []
+            candidates.sort(key=len)
+            return self.get(
+                doc_id
+                for doc_id in candidates[0]
+                if all(doc_id in doc_ids for doc_ids in candidates[1:])
+            )
+
+    def values(self, key: str) -> list[str]:
+        """List the values of an indexed metadata, e.g. the ingested file names."""
+        with self._lock:
+            self._ensure_loaded()
+            return sorted(self._doc_ids[key])
@@ -19,7 +19,14 @@ class IngestedDoc(BaseModel):
     @staticmethod
     def curate_metadata(metadata: dict[str, Any]) -> dict[str, Any]:
         """Remove unwanted metadata keys."""
-        for key in ["doc_id", "window", "original_text"]:
+        for key in [
+            "doc_id",
+            "window",
+            "original_text",
+            "sentence_index",
+            "window_start",
+            "window_end",
+        ]:
             metadata.pop(key, None)
         return metadata
 
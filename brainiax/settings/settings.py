@@ -2,6 +2,7 @@ from typing import Literal
 
 from pydantic import BaseModel, Field
 
+from brainiax.constants import COLLECTION_NAME_PATTERN
 from brainiax.settings.settings_loader import load_active_settings
 
 
@@ -78,6 +79,64 @@ class DataSettings(BaseModel):
         description="Path to local storage."
         "It will be treated as an absolute path if it starts with /"
     )
+    persist_interval: float = Field(
+        5.0,
+        description=(
+            "Maximum number of seconds the changes to the index can wait before being "
+            "persisted to the local storage. Changes made in that window are persisted "
+            "together. Set to 0 to only rely on `persist_max_pending_operations`, "
+            "the changes of the ingest jobs are then persisted right away."
+        ),
+        ge=0,
+    )
+    persist_max_pending_operations: int = Field(
+        50,
+        description=(
+            "Number of ingestions or deletions after which the index is persisted, "
+            "without waiting for `persist_interval`. Set to 1 to persist after every "
+            "operation."
+        ),
+        ge=1,
+    )
+
+
+class ResponseCacheSettings(BaseModel):
+    enabled: bool = Field(
+        False,
+        description=(
+            "Reuse the chat responses for the messages close to an already answered "
+            "one, instead of calling the LLM. A response is only reused for the "
+            "same system prompt, chat history, context filter and context chunks."
+        ),
+    )
+    similarity_threshold: float = Field(
+        0.95,
+        description=(
+            "The minimum cosine similarity between the embeddings of a message and "
+            "of a cached one for its response to be reused. Lower values reuse the "
+            "responses of more paraphrases, at the risk of answering a different "
+            "question."
+        ),
+        ge=0.0,
+        le=1.0,
+    )
+    max_entries: int = Field(
+        1000,
+        description=(
+            "The maximum number of responses kept in memory, the least recently "
+            "used ones are evicted first."
+        ),
+        gt=0,
+    )
+    ttl: float = Field(
+        86400.0,
+        description=(
+            "Seconds after which a cached response is evicted, 0 keeps it until it "
+            "is evicted otherwise. The responses using the documents of a "
+            "collection are evicted when documents are ingested or deleted in it."
+        ),
+        ge=0.0,
+    )
 
 
 class LLMSettings(BaseModel):
@@ -104,9 +163,46 @@ class LLMSettings(BaseModel):
         0.1,
         description="The temperature of the model. Increasing the temperature will make the model answer more creatively. A value of 0.1 would be more factual.",
     )
+    response_cache: ResponseCacheSettings = Field(
+        ResponseCacheSettings(),
+        description="Semantic cache of the chat responses.",
+    )
 
 class VectorstoreSettings(BaseModel):
-    database: Literal["qdrant"]
+    database: Literal["qdrant", "hnswlib"] = Field(
+        "qdrant",
+        description=(
+            "The vector store to use.\n"
+            "If `qdrant`, a local Qdrant in the data folder or a Qdrant server, "
+            "see `qdrant`.\n"
+            "If `hnswlib`, an HNSW index in the server process, persisted in the "
+            "data folder, see `hnswlib`. Requires `pip install hnswlib`."
+        ),
+    )
+    default_collection: str = Field(
+        "make_this_parameterizable_per_api_call",
+        description=(
+            "The collection of the requests that do not select one. Each collection "
+            "has its own vector store collection and doc and index stores, created "
+            "on first use. The documents ingested before collections were "
+            "selectable are in the collection named "
+            "`make_this_parameterizable_per_api_call`."
+        ),
+        pattern=COLLECTION_NAME_PATTERN,
+    )
+
+class NodeStoreSettings(BaseModel):
+    database: Literal["simple", "sqlite"] = Field(
+        "simple",
+        description=(
+            "The backend of the document and index stores.\n"
+            "`simple` keeps them in memory, loaded from and saved to JSON files.\n"
+            "`sqlite` keeps them in a SQLite database in the local data folder, "
+            "nodes are read on demand and changes are written incrementally. "
+            "Existing JSON stores can be copied to it with "
+            "`python -m brainiax.migrate_node_store`."
+        ),
+    )
 
 class OllamaSettings(BaseModel):
     api_base: str = Field(
@@ -158,6 +254,77 @@ class HuggingFaceSettings(BaseModel):
 
 class EmbeddingSettings(BaseModel):
     mode: Literal["local"]
+    ingest_mode: Literal["simple", "parallel", "batch", "pipeline"] = Field(
+        "simple",
+        description=(
+            "The ingest mode to use when ingesting files.\n"
+            "`simple` parses and saves the files one after another.\n"
+            "`parallel` parses the files of a bulk ingestion in a pool of "
+            "`count_workers` processes, only the index insert and persist "
+            "steps stay serialized.\n"
+            "`batch` parses like `parallel`, then splits every document into nodes "
+            "and embeds them in batches of `embed_batch_size` across document "
+            "boundaries, before adding them to the vector and doc stores in bulk.\n"
+            "`pipeline` runs the parsing, splitting, embedding and writing of the "
+            "files of a bulk ingestion as concurrent stages connected by queues of "
+            "`pipeline_queue_size` files."
+        ),
+    )
+    count_workers: int = Field(
+        2,
+        description=(
+            "The number of worker processes used to parse files in the `parallel`, "
+            "`batch` and `pipeline` ingest modes. A value close to the number of "
+            "CPU cores is usually a good fit."
+        ),
+        ge=1,
+    )
+    embed_batch_size: int = Field(
+        64,
+        description=(
+            "The number of nodes sent to the embedding model in a single call. "
+            "Larger batches amortize the per-request overhead of the model server."
+        ),
+        ge=1,
+        le=2048,
+    )
+    cache_max_entries: int = Field(
+        100000,
+        description=(
+            "The maximum number of embeddings kept in the on-disk embedding cache, "
+            "the least recently used ones are evicted first. Re-ingested texts and "
+            "repeated queries are answered from the cache instead of the model. "
+            "Set to 0 to disable the cache."
+        ),
+        ge=0,
+    )
+    pdf_window_size: int = Field(
+        0,
+        description=(
+            "If set, PDFs are ingested by windows of this many pages: each window is "
+            "parsed, split, embedded and saved before the next one is parsed. The "
+            "memory used stays flat whatever the number of pages, and the first pages "
+            "are searchable while the rest of the file is ingested. Set to 0 to parse "
+            "whole PDFs at once."
+        ),
+        ge=0,
+    )
+    pipeline_queue_size: int = Field(
+        4,
+        description=(
+            "The number of files waiting between two stages of the `pipeline` "
+            "ingest mode. Bounds the memory used by files ahead of the slowest stage."
+        ),
+        ge=1,
+    )
+    job_workers: int = Field(
+        1,
+        description=(
+            "The number of ingestion jobs submitted to `/v1/ingest/jobs` processed "
+            "at the same time. Other jobs wait in the queue."
+        ),
+        ge=1,
+    )
 
 class UISettings(BaseModel):
     enabled: bool
@@ -176,6 +343,49 @@ class UISettings(BaseModel):
         False, description="If the button to delete all files is enabled or not."
     )
 
+class HybridSearchSettings(BaseModel):
+    enabled: bool = Field(
+        False,
+        description=(
+            "Fuse the results of the vector search with a BM25 keyword search, so "
+            "the chunks containing the exact terms of the question (course codes, "
+            "formula names...) are retrieved even when their embedding is not the "
+            "closest. The BM25 index is maintained during ingestion either way."
+        ),
+    )
+    alpha: float = Field(
+        0.5,
+        description=(
+            "Weight of the vector search in the fused score, the BM25 search has a "
+            "weight of 1 - alpha. The scores of each search are normalized between "
+            "0 and 1 before being fused, `similarity_value` applies to the vector "
+            "similarity before the fusion."
+        ),
+        ge=0.0,
+        le=1.0,
+    )
+    candidates: int = Field(
+        10,
+        description=(
+            "Results of each search that are fused, at least `similarity_top_k`. "
+            "More candidates let a chunk ranked low by one search but high by the "
+            "other one be retrieved."
+        ),
+        gt=0,
+    )
+    k1: float = Field(
+        1.2,
+        description="BM25 saturation of the frequency of a term in a chunk.",
+        ge=0.0,
+    )
+    b: float = Field(
+        0.75,
+        description="BM25 normalization of the frequencies by the chunk length.",
+        ge=0.0,
+        le=1.0,
+    )
+
+
 class RagSettings(BaseModel):
     similarity_top_k: int = Field(
         2,
@@ -183,7 +393,204 @@ class RagSettings(BaseModel):
     )
     similarity_value: float = Field(
         None,
-        description="If set, any documents retrieved from the RAG must meet a certain match score. Acceptable values are between 0 and 1.",
+        description="If set, any documents retrieved from the RAG must meet a certain match score. Acceptable values are between 0 and 1. With the hybrid search, it applies to the vector similarity before the fusion, the chunks found by the keyword search only are kept.",
+    )
+    hybrid: HybridSearchSettings = Field(
+        HybridSearchSettings(),
+        description="Keyword (BM25) search fused with the vector search.",
+    )
+    cache_max_entries: int = Field(
+        1000,
+        description=(
+            "The maximum number of retrievals kept in the in-memory retrieval cache, "
+            "the least recently used ones are evicted first. The same query, with "
+            "the same filter, is answered from the cache without embedding it nor "
+            "searching, until documents are ingested or deleted. Set to 0 to "
+            "disable the cache."
+        ),
+        ge=0,
+    )
+
+
+class QdrantQuantizationSettings(BaseModel):
+    mode: Literal["none", "scalar", "binary"] = Field(
+        "none",
+        description=(
+            "The quantization of the vectors of the collection, applied when it is "
+            "created. Existing collections are updated with "
+            "`python -m brainiax.migrate_vector_store`.\n"
+            "`none` keeps only the float32 vectors.\n"
+            "`scalar` adds int8 vectors, 4 times smaller, with a small loss of "
+            "accuracy.\n"
+            "`binary` adds 1 bit vectors, 32 times smaller, for models with "
+            "centered values of high dimension. Use it with `rescore` and an "
+            "`oversampling` of 2 to 3."
+        ),
+    )
+    quantile: float | None = Field(
+        None,
+        description=(
+            "For `scalar` quantization, the quantile of the values used to compute "
+            "the quantization bounds, excluding the outliers. "
+            "If not set, the whole range of values is used."
+        ),
+        ge=0.5,
+        le=1.0,
+    )
+    always_ram: bool = Field(
+        True,
+        description=(
+            "Keep the quantized vectors in RAM, even when the original vectors are "
+            "stored on disk."
+        ),
+    )
+    rescore: bool = Field(
+        True,
+        description=(
+            "Re-rank the candidates found with the quantized vectors with the "
+            "original vectors."
+        ),
+    )
+    oversampling: float | None = Field(
+        None,
+        description=(
+            "Fetch `oversampling * limit` candidates with the quantized vectors "
+            "before rescoring them, to compensate the loss of accuracy."
+        ),
+        ge=1.0,
+    )
+
+
+class QdrantHnswSettings(BaseModel):
+    m: int | None = Field(
+        None,
+        description=(
+            "Number of edges per node of the HNSW graph. Higher values improve the "
+            "recall at the cost of memory and build time. Qdrant default: 16."
+        ),
+        ge=0,
+    )
+    ef_construct: int | None = Field(
+        None,
+        description=(
+            "Number of neighbours considered while building the HNSW graph. Higher "
+            "values improve the recall at the cost of build time. Qdrant default: 100."
+        ),
+        ge=4,
+    )
+    ef: int | None = Field(
+        None,
+        description=(
+            "Number of candidates explored by a search (`hnsw_ef`). Higher values "
+            "improve the recall at the cost of latency. "
+            "If not set, Qdrant uses `ef_construct`."
+        ),
+        ge=1,
+    )
+    on_disk: bool | None = Field(
+        None,
+        description="Store the HNSW graph on disk instead of in RAM.",
+    )
+
+
+class QdrantStorageSettings(BaseModel):
+    on_disk_vectors: bool | None = Field(
+        None,
+        description=(
+            "Store the original vectors in memory-mapped files instead of RAM. "
+            "Combined with a quantization kept in RAM, searches only read the disk "
+            "to rescore the candidates."
+        ),
+    )
+    on_disk_payload: bool | None = Field(
+        None,
+        description=(
+            "Store the payloads (metadata and text of the chunks) on disk instead "
+            "of in RAM. The indexed payload fields stay in RAM."
+        ),
+    )
+
+
+class QdrantOptimizersSettings(BaseModel):
+    indexing_threshold: int | None = Field(
+        None,
+        description=(
+            "Size in KB of vectors above which a segment is indexed with HNSW, "
+            "smaller segments are searched by full scan. 0 disables the indexing, "
+            "e.g. during a bulk ingestion. Qdrant default: 20000."
+        ),
+        ge=0,
+    )
+    memmap_threshold: int | None = Field(
+        None,
+        description=(
+            "Size in KB of vectors above which a segment is stored in memory-mapped "
+            "files. If not set, Qdrant keeps the segments in RAM."
+        ),
+        ge=0,
+    )
+    default_segment_number: int | None = Field(
+        None,
+        description=(
+            "Target number of segments. More segments allow more parallel searches, "
+            "fewer segments lower the latency of a single search."
+        ),
+        ge=0,
+    )
+    max_segment_size: int | None = Field(
+        None, description="Maximum size in KB of a segment.", ge=1
+    )
+
+
+class HnswlibSettings(BaseModel):
+    m: int = Field(
+        16,
+        description=(
+            "Number of edges per node of the HNSW graph. Higher values improve the "
+            "recall at the cost of memory and build time."
+        ),
+        ge=2,
+    )
+    ef_construction: int = Field(
+        200,
+        description=(
+            "Number of neighbours considered while building the HNSW graph. Higher "
+            "values improve the recall at the cost of ingestion time."
+        ),
+        ge=1,
+    )
+    ef: int = Field(
+        64,
+        description=(
+            "Number of candidates explored by a search, at least the number of "
+            "results. Higher values improve the recall at the cost of latency."
+        ),
+        ge=1,
+    )
+    initial_capacity: int = Field(
+        10000,
+        description=(
+            "Number of vectors the index is allocated for, doubled when it is full."
+        ),
+        ge=1,
+    )
+    exact_search_max_candidates: int = Field(
+        1000,
+        description=(
+            "Filtered searches matching at most this many chunks compare the query "
+            "with all of them instead of searching the graph."
+        ),
+        ge=0,
+    )
+    snapshot_interval: int = Field(
+        10000,
+        description=(
+            "Number of vectors added or deleted after which a persist also writes "
+            "the HNSW index to disk, 0 to write it at every persist. In between, "
+            "the new vectors are kept in the nodes database and added back to the "
+            "index on load. The index is always written on shutdown."
+        ),
+        ge=0,
     )
 
 
@@ -239,6 +646,36 @@ class QdrantSettings(BaseModel):
             "Only use this if you can guarantee that you can resolve the thread safety outside QdrantClient."
         ),
     )
+    connection_pool_size: int | None = Field(
+        None,
+        description=(
+            "Maximum number of connections to a Qdrant server, shared by the "
+            "searches of all the collections. If not set, connections are unbounded."
+        ),
+        ge=1,
+    )
+    quantization: QdrantQuantizationSettings = Field(
+        QdrantQuantizationSettings(),
+        description=(
+            "Quantization of the vectors, only supported by a Qdrant server, not "
+            "by the local `path` or `:memory:` modes."
+        ),
+    )
+    hnsw: QdrantHnswSettings = Field(
+        QdrantHnswSettings(),
+        description=(
+            "HNSW index of the collection and search parameters. Like the "
+            "quantization, only supported by a Qdrant server."
+        ),
+    )
+    storage: QdrantStorageSettings = Field(
+        QdrantStorageSettings(),
+        description="Storage of the vectors and payloads, Qdrant server only.",
+    )
+    optimizers: QdrantOptimizersSettings = Field(
+        QdrantOptimizersSettings(),
+        description="Thresholds of the Qdrant optimizers, Qdrant server only.",
+    )
 
 
 class Settings(BaseModel):
@@ -250,8 +687,10 @@ class Settings(BaseModel):
     huggingface: HuggingFaceSettings
     ollama: OllamaSettings
     vectorstore: VectorstoreSettings
+    nodestore: NodeStoreSettings = NodeStoreSettings()
     rag: RagSettings
     qdrant: QdrantSettings | None = None
+    hnswlib: HnswlibSettings = HnswlibSettings()
     
 unsafe_settings = load_active_settings()
 
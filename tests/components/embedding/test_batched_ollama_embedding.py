@@ -0,0 +1,81 @@
+import math
+from typing import Any
+
+import pytest
+import requests
+
+from brainiax.components.embedding import batched_ollama_embedding
+from brainiax.components.embedding.batched_ollama_embedding import (
+    BatchedOllamaEmbedding,
+)
+
+
+class _Response(requests.Response):
+    def __init__(self, status_code: int, body: str) -> None:
+        super().__init__()
+        self.status_code = status_code
+        self._content = body.encode()
+
+
+class _FakeOllama:
+    """Answers the requests of the embedding model, recording their endpoints."""
+
+    def __init__(self, embed_response: _Response | None = None) -> None:
+        self.embed_response = embed_response
+        self.endpoints: list[str] = []
+
+    def post(self, url: str, json: dict[str, Any], **_: Any) -> _Response:
+        endpoint = url.rsplit("/", 1)[-1]
+        self.endpoints.append(endpoint)
+        if endpoint == "embed":
+            if self.embed_response is not None:
+                return self.embed_response
+            vectors = [[0.6, 0.8] for _ in json["input"]]
+            return _Response(200, f'{{"embeddings": {vectors}}}')
+        return _Response(200, '{"embedding": [3.0, 4.0]}')
+
+
+@pytest.fixture()
+def ollama(monkeypatch: pytest.MonkeyPatch) -> _FakeOllama:
+    fake = _FakeOllama()
+    monkeypatch.setattr(batched_ollama_embedding.requests, "post", fake.post)
+    return fake
+
+
+def _model() -> BatchedOllamaEmbedding:
+    return BatchedOllamaEmbedding(model_name="nomic-embed-text", base_url="http://o")
+
+
+def test_queries_and_texts_use_the_batch_endpoint(ollama: _FakeOllama) -> None:
+    model = _model()
+
+    assert model.get_query_embedding("query") == [0.6, 0.8]
+    assert model.get_text_embedding_batch(["a", "b"]) == [[0.6, 0.8]] * 2
+    assert ollama.endpoints == ["embed", "embed"]
+
+
+def test_falls_back_to_normalized_single_requests(ollama: _FakeOllama) -> None:
+    ollama.embed_response = _Response(404, "404 page not found")
+    model = _model()
+
+    embeddings = model.get_text_embedding_batch(["a", "b"])
+    query_embedding = model.get_query_embedding("query")
+
+    for embedding in [*embeddings, query_embedding]:
+        assert embedding == pytest.approx([0.6, 0.8])
+        assert math.hypot(*embedding) == pytest.approx(1.0)
+    assert ollama.endpoints == ["embed", "embeddings", "embeddings", "embeddings"]
+
+
+def test_a_missing_model_does_not_disable_batching(ollama: _FakeOllama) -> None:
+    ollama.embed_response = _Response(
+        404, '{"error": "model \\"nomic-embed-txt\\" not found, try pulling it first"}'
+    )
+    model = _model()
+
+    with pytest.raises(ValueError, match="not found"):
+        model.get_text_embedding_batch(["a", "b"])
+
+    ollama.embed_response = None
+    assert model.get_text_embedding_batch(["a", "b"]) == [[0.6, 0.8]] * 2
+    assert ollama.endpoints == ["embed", "embed"]
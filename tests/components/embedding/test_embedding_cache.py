@@ -0,0 +1,59 @@
+from pathlib import Path
+
+from llama_index.core.embeddings import MockEmbedding
+
+from brainiax.components.embedding.embedding_cache import (
+    CachedEmbedding,
+    EmbeddingCache,
+)
+
+
+class _CountingEmbedding(MockEmbedding):
+    """Mock embedding model counting the texts it embeds."""
+
+    embedded: int = 0
+
+    def _get_text_embeddings(self, texts: list[str]) -> list[list[float]]:
+        self.embedded += len(texts)
+        return super()._get_text_embeddings(texts)
+
+
+def test_cached_texts_are_not_embedded_again(tmp_path: Path) -> None:
+    model = _CountingEmbedding(embed_dim=4)
+    cached_model = CachedEmbedding(model, EmbeddingCache(tmp_path / "c", 100))
+
+    first = cached_model.get_text_embedding_batch(["a", "b", "a"])
+    second = cached_model.get_text_embedding_batch(["a", "b", "c"])
+
+    assert model.embedded == 3
+    assert second[:2] == first[:2]
+    stats = cached_model.cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (3, 2, 4)
+
+
+def test_the_cache_is_kept_across_restarts(tmp_path: Path) -> None:
+    model = _CountingEmbedding(embed_dim=4)
+    cache = EmbeddingCache(tmp_path / "c", 100)
+    CachedEmbedding(model, cache).get_text_embedding_batch(["a", "b"])
+    cache.close()
+
+    reopened = CachedEmbedding(model, EmbeddingCache(tmp_path / "c", 100))
+    reopened.get_text_embedding_batch(["a", "b"])
+
+    assert model.embedded == 2
+    assert reopened.cache.stats()["entries"] == 2
+
+
+def test_the_least_recently_used_embeddings_are_evicted(tmp_path: Path) -> None:
+    model = _CountingEmbedding(embed_dim=4)
+    cached_model = CachedEmbedding(model, EmbeddingCache(tmp_path / "c", 2))
+    cached_model.get_text_embedding_batch(["a"])
+    cached_model.get_text_embedding_batch(["b"])
+    cached_model.get_text_embedding_batch(["a"])
+
+    cached_model.get_text_embedding_batch(["c"])
+    cached_model.get_text_embedding_batch(["a", "b"])
+
+    assert cached_model.cache.stats()["entries"] == 2
+    # "b" was evicted by "c", "a" was used more recently
+    assert model.embedded == 4
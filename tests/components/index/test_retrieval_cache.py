@@ -0,0 +1,166 @@
+import asyncio
+from pathlib import Path
+
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle, TextNode
+from llama_index.core.storage import StorageContext
+from llama_index.core.storage.docstore import SimpleDocumentStore
+
+from brainiax.components.index.retrieval_cache import (
+    CachedRetriever,
+    IndexGeneration,
+    RetrievalCache,
+)
+from brainiax.components.ingest.ingest_component import SimpleIngestComponent
+
+
+class _Retriever(BaseRetriever):
+    def __init__(self) -> None:
+        super().__init__()
+        self.bundles: list[QueryBundle] = []
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        self.bundles.append(query_bundle)
+        return [NodeWithScore(node=TextNode(id_="n1", text="entropy"), score=0.8)]
+
+
+class _Embedder:
+    def __init__(self) -> None:
+        self.queries: list[str] = []
+
+    async def __call__(self, query: str) -> list[float]:
+        self.queries.append(query)
+        return [1.0, 0.0]
+
+
+def _cached_retriever(
+    cache: RetrievalCache, generation: IndexGeneration | None = None
+) -> tuple[CachedRetriever, _Retriever, _Embedder, SimpleDocumentStore]:
+    retriever, embedder = _Retriever(), _Embedder()
+    docstore = SimpleDocumentStore()
+    docstore.add_documents([TextNode(id_="n1", text="entropy")])
+    cached_retriever = CachedRetriever(
+        retriever,
+        cache=cache,
+        key=("collection", None, 2),
+        generation=generation or IndexGeneration(),
+        docstore=docstore,
+        aembed_query=embedder,
+    )
+    return cached_retriever, retriever, embedder, docstore
+
+
+def test_a_repeated_query_is_answered_from_the_cache() -> None:
+    cache = RetrievalCache(10)
+    cached_retriever, retriever, _, _ = _cached_retriever(cache)
+
+    first = cached_retriever.retrieve("entropy")
+    second = cached_retriever.retrieve("entropy")
+
+    assert len(retriever.bundles) == 1
+    assert [(n.node_id, n.score) for n in second] == [
+        (n.node_id, n.score) for n in first
+    ]
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+
+def test_a_new_generation_invalidates_the_cached_retrievals() -> None:
+    generation = IndexGeneration()
+    cached_retriever, retriever, _, _ = _cached_retriever(
+        RetrievalCache(10), generation
+    )
+
+    cached_retriever.retrieve("entropy")
+    generation.bump()
+    cached_retriever.retrieve("entropy")
+
+    assert len(retriever.bundles) == 2
+
+
+def test_a_node_missing_from_the_doc_store_is_retrieved_again() -> None:
+    cached_retriever, retriever, _, docstore = _cached_retriever(RetrievalCache(10))
+
+    cached_retriever.retrieve("entropy")
+    docstore.delete_document("n1")
+    cached_retriever.retrieve("entropy")
+
+    assert len(retriever.bundles) == 2
+
+
+def test_the_least_recently_used_retrievals_are_evicted() -> None:
+    cache = RetrievalCache(1)
+    cached_retriever, retriever, _, _ = _cached_retriever(cache)
+
+    cached_retriever.retrieve("entropy")
+    cached_retriever.retrieve("enthalpy")
+    cached_retriever.retrieve("entropy")
+
+    assert len(retriever.bundles) == 3
+    assert cache.stats()["entries"] == 1
+
+
+def test_a_cache_of_0_entries_is_disabled() -> None:
+    cache = RetrievalCache(0)
+    cached_retriever, retriever, _, _ = _cached_retriever(cache)
+
+    cached_retriever.retrieve("entropy")
+    cached_retriever.retrieve("entropy")
+
+    assert len(retriever.bundles) == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_an_async_retrieval_embeds_the_query_on_a_miss_only() -> None:
+    cached_retriever, retriever, embedder, _ = _cached_retriever(RetrievalCache(10))
+
+    asyncio.run(cached_retriever.aretrieve("entropy"))
+    asyncio.run(cached_retriever.aretrieve("entropy"))
+
+    assert embedder.queries == ["entropy"]
+    assert [bundle.embedding for bundle in retriever.bundles] == [[1.0, 0.0]]
+
+
+class _IndexRetriever(BaseRetriever):
+    """Searches the current index of the component, as a retriever per request."""
+
+    def __init__(self, component: SimpleIngestComponent) -> None:
+        super().__init__()
+        self._component = component
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        index = self._component._index
+        return index.as_retriever(similarity_top_k=10).retrieve(query_bundle)
+
+
+def test_ingesting_and_deleting_invalidate_the_cached_retrievals(
+    tmp_path: Path,
+) -> None:
+    embed_model = MockEmbedding(embed_dim=4)
+    storage_context = StorageContext.from_defaults()
+    generation = IndexGeneration()
+    component = SimpleIngestComponent(
+        storage_context,
+        embed_model=embed_model,
+        transformations=[SentenceSplitter(), embed_model],
+        persist_dir=tmp_path / "stores",
+        generation=generation,
+    )
+    cached_retriever = CachedRetriever(
+        _IndexRetriever(component),
+        cache=RetrievalCache(10),
+        key=None,
+        generation=generation,
+        docstore=storage_context.docstore,
+        aembed_query=_Embedder(),
+    )
+    path = tmp_path / "entropy.txt"
+    path.write_text("Entropy measures the disorder of a system.")
+
+    assert cached_retriever.retrieve("entropy") == []
+    documents = component.ingest(path.name, path)
+    assert len(cached_retriever.retrieve("entropy")) == 1
+    component.delete(documents[0].doc_id)
+    assert cached_retriever.retrieve("entropy") == []
+    component.close()
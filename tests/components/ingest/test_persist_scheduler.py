@@ -0,0 +1,190 @@
+import threading
+from pathlib import Path
+
+import pytest
+from llama_index.core.data_structs import IndexDict
+from llama_index.core.schema import TextNode
+from llama_index.core.storage import StorageContext
+from llama_index.core.storage.docstore import SimpleDocumentStore
+from llama_index.core.storage.index_store import SimpleIndexStore
+
+from brainiax.components.ingest import persist_scheduler
+from brainiax.components.ingest.persist_scheduler import (
+    STORES_POINTER_FILE_NAME,
+    PersistScheduler,
+    persist_storage_context_atomically,
+    stores_dir,
+)
+
+
+def _add_node(storage_context: StorageContext, text: str) -> None:
+    """Add a node to the doc store and to the index listing the nodes."""
+    node = TextNode(text=text, id_=text)
+    storage_context.docstore.add_documents([node])
+    index_structs = storage_context.index_store.index_structs()
+    index_struct = index_structs[0] if index_structs else IndexDict()
+    index_struct.add_node(node, text_id=node.node_id)
+    storage_context.index_store.add_index_struct(index_struct)
+
+
+def _load(persist_dir: Path) -> tuple[set[str], set[str]]:
+    """Ids of the nodes of the doc store, and of the ones listed by the index."""
+    json_dir = str(stores_dir(persist_dir))
+    docstore = SimpleDocumentStore.from_persist_dir(json_dir)
+    index_struct = SimpleIndexStore.from_persist_dir(json_dir).get_index_struct()
+    assert isinstance(index_struct, IndexDict)
+    return set(docstore.docs), set(index_struct.nodes_dict.values())
+
+
+def test_persist_is_read_back(tmp_path: Path) -> None:
+    storage_context = StorageContext.from_defaults()
+    _add_node(storage_context, "a")
+    persist_storage_context_atomically(storage_context, tmp_path)
+    _add_node(storage_context, "b")
+    persist_storage_context_atomically(storage_context, tmp_path)
+
+    assert _load(tmp_path) == ({"a", "b"}, {"a", "b"})
+    # Only the folder of the last persist is kept
+    assert [path.name for path in tmp_path.glob(".stores-*")] == [
+        stores_dir(tmp_path).name
+    ]
+
+
+def test_a_crash_while_writing_keeps_the_previous_persist(tmp_path: Path) -> None:
+    storage_context = StorageContext.from_defaults()
+    _add_node(storage_context, "a")
+    persist_storage_context_atomically(storage_context, tmp_path)
+
+    _add_node(storage_context, "b")
+    index_store = storage_context.index_store
+
+    def crash(*args: object, **kwargs: object) -> None:
+        raise OSError("disk full")
+
+    # The doc store is written, not the index store
+    index_store.persist = crash  # type: ignore[method-assign]
+    with pytest.raises(OSError):
+        persist_storage_context_atomically(storage_context, tmp_path)
+
+    assert _load(tmp_path) == ({"a"}, {"a"})
+
+
+def test_a_crash_before_switching_keeps_the_previous_persist(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    storage_context = StorageContext.from_defaults()
+    _add_node(storage_context, "a")
+    persist_storage_context_atomically(storage_context, tmp_path)
+
+    _add_node(storage_context, "b")
+
+    def crash(*args: object) -> None:
+        raise OSError("power cut")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(persist_scheduler.os, "replace", crash)
+        with pytest.raises(OSError):
+            persist_storage_context_atomically(storage_context, tmp_path)
+    assert _load(tmp_path) == ({"a"}, {"a"})
+
+    persist_storage_context_atomically(storage_context, tmp_path)
+    assert _load(tmp_path) == ({"a", "b"}, {"a", "b"})
+
+
+def test_stores_persisted_in_the_folder_itself_are_read_then_replaced(
+    tmp_path: Path,
+) -> None:
+    storage_context = StorageContext.from_defaults()
+    _add_node(storage_context, "a")
+    storage_context.persist(persist_dir=str(tmp_path))
+    assert stores_dir(tmp_path) == tmp_path
+    assert _load(tmp_path) == ({"a"}, {"a"})
+
+    persist_storage_context_atomically(storage_context, tmp_path)
+
+    assert (tmp_path / STORES_POINTER_FILE_NAME).exists()
+    assert not (tmp_path / "docstore.json").exists()
+    assert _load(tmp_path) == ({"a"}, {"a"})
+
+
+class _Persist:
+    def __init__(self) -> None:
+        self.count = 0
+        self.error: Exception | None = None
+
+    def __call__(self) -> None:
+        if self.error is not None:
+            raise self.error
+        self.count += 1
+
+
+def _scheduler(persist: _Persist, max_pending_operations: int) -> PersistScheduler:
+    return PersistScheduler(
+        persist,
+        threading.RLock(),
+        interval=60,
+        max_pending_operations=max_pending_operations,
+    )
+
+
+def test_changes_are_persisted_together() -> None:
+    persist = _Persist()
+    scheduler = _scheduler(persist, max_pending_operations=3)
+    notified: list[Exception | None] = []
+
+    scheduler.mark_dirty(on_persisted=notified.append)
+    scheduler.mark_dirty(on_persisted=notified.append)
+    assert persist.count == 0
+    scheduler.mark_dirty()
+
+    assert persist.count == 1
+    assert notified == [None, None]
+    assert scheduler.pending_operations == 0
+    scheduler.close()
+
+
+def test_a_failed_persist_notifies_the_waiting_callers() -> None:
+    persist = _Persist()
+    scheduler = _scheduler(persist, max_pending_operations=10)
+    notified: list[Exception | None] = []
+    scheduler.mark_dirty(on_persisted=notified.append)
+
+    persist.error = OSError("disk full")
+    with pytest.raises(OSError):
+        scheduler.flush()
+    assert notified == [persist.error]
+    # The changes are still to persist
+    assert scheduler.pending_operations == 1
+
+    persist.error = None
+    scheduler.mark_dirty(on_persisted=notified.append)
+    scheduler.flush()
+    assert persist.count == 1
+    assert notified[1:] == [None]
+    scheduler.close()
+
+
+def test_without_periodic_persist_waited_changes_are_persisted_right_away() -> None:
+    persist = _Persist()
+    scheduler = PersistScheduler(
+        persist, threading.RLock(), interval=0, max_pending_operations=10
+    )
+    notified: list[Exception | None] = []
+
+    scheduler.mark_dirty()
+    assert persist.count == 0
+    scheduler.mark_dirty(on_persisted=notified.append)
+
+    assert persist.count == 1
+    assert notified == [None]
+    scheduler.close()
+
+
+def test_the_pending_changes_are_persisted_on_close() -> None:
+    persist = _Persist()
+    scheduler = _scheduler(persist, max_pending_operations=10)
+    scheduler.mark_dirty()
+
+    scheduler.close()
+
+    assert persist.count == 1
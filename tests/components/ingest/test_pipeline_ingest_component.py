@@ -0,0 +1,126 @@
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.schema import BaseNode
+from llama_index.core.storage import StorageContext
+
+from brainiax.components.ingest.ingest_component import PipelineIngestComponent
+
+
+class _FailingSparseIndex:
+    """Sparse index failing to add the nodes of the `fail_at`-th written file."""
+
+    def __init__(self, fail_at: int) -> None:
+        self.fail_at = fail_at
+        self.calls = 0
+
+    def add(self, nodes: list[BaseNode]) -> None:
+        self.calls += 1
+        if self.calls == self.fail_at:
+            raise OSError("disk full")
+
+    def persist(self) -> None:
+        pass
+
+
+@pytest.fixture()
+def files(tmp_path: Path) -> list[tuple[str, Path]]:
+    files = []
+    for i in range(12):
+        path = tmp_path / f"file-{i}.txt"
+        path.write_text(f"Content of the file number {i}.")
+        files.append((path.name, path))
+    return files
+
+
+def _component(tmp_path: Path, sparse_index: Any = None) -> PipelineIngestComponent:
+    embed_model = MockEmbedding(embed_dim=4)
+    return PipelineIngestComponent(
+        StorageContext.from_defaults(),
+        embed_model=embed_model,
+        transformations=[SentenceSplitter(), embed_model],
+        count_workers=1,
+        # The smallest queues, so that the stages are blocked on them
+        queue_size=1,
+        persist_dir=tmp_path / "stores",
+        persist_max_pending_operations=1000,
+        sparse_index=sparse_index,
+    )
+
+
+@pytest.fixture()
+def component(tmp_path: Path) -> Iterator[PipelineIngestComponent]:
+    component = _component(tmp_path, _FailingSparseIndex(fail_at=2))
+    yield component
+    component.close()
+
+
+def _bulk_ingest(
+    component: PipelineIngestComponent, files: list[tuple[str, Path]]
+) -> list[Any]:
+    """Run the bulk ingestion in a thread, to fail instead of hanging on deadlock."""
+    result: list[Any] = []
+
+    def run() -> None:
+        try:
+            result.append(component.bulk_ingest(files))
+        except BaseException as e:
+            result.append(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=60)
+    assert not thread.is_alive(), "The ingestion pipeline is deadlocked"
+    return result
+
+
+def _running_stages() -> list[str]:
+    return [
+        thread.name
+        for thread in threading.enumerate()
+        if thread.name.startswith("ingest-pipeline-")
+    ]
+
+
+def test_all_the_files_are_ingested(
+    tmp_path: Path, files: list[tuple[str, Path]]
+) -> None:
+    component = _component(tmp_path)
+    try:
+        [documents] = _bulk_ingest(component, files)
+    finally:
+        component.close()
+
+    assert len(documents) == len(files)
+    assert [stats.files for stats in component.last_pipeline_stats] == [12] * 4
+
+
+def test_a_failed_write_cancels_the_pipeline(
+    component: PipelineIngestComponent, files: list[tuple[str, Path]]
+) -> None:
+    [error] = _bulk_ingest(component, files)
+
+    assert isinstance(error, OSError)
+    assert _running_stages() == []
+
+
+def test_a_failed_stage_cancels_the_pipeline(
+    component: PipelineIngestComponent,
+    files: list[tuple[str, Path]],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def fail() -> None:
+        raise OSError("cannot start the workers")
+
+    monkeypatch.setattr(component, "_get_work_pool", fail)
+
+    [error] = _bulk_ingest(component, files)
+
+    assert isinstance(error, RuntimeError)
+    assert isinstance(error.__cause__, OSError)
+    assert _running_stages() == []
@@ -0,0 +1,80 @@
+from pathlib import Path
+
+from llama_index.core.data_structs import IndexDict
+from llama_index.core.schema import TextNode
+
+from brainiax.components.node_store.sqlite_store import (
+    SQLiteDocumentStore,
+    SQLiteIndexStore,
+    SQLiteKVStore,
+)
+
+
+class _Stores:
+    """Doc and index stores sharing a SQLite database, like the node store's."""
+
+    def __init__(self, path: Path) -> None:
+        self.kvstore = SQLiteKVStore(path)
+        self.docstore = SQLiteDocumentStore(self.kvstore)
+        self.index_store = SQLiteIndexStore(self.kvstore)
+
+    def add_node(self, text: str) -> None:
+        node = TextNode(text=text, id_=text)
+        self.docstore.add_documents([node])
+        index_structs = self.index_store.index_structs()
+        index_struct = index_structs[0] if index_structs else IndexDict()
+        index_struct.add_node(node, text_id=node.node_id)
+        self.index_store.add_index_struct(index_struct)
+
+    def node_ids(self) -> tuple[set[str], set[str]]:
+        """Ids of the nodes of the doc store, and of the ones listed by the index."""
+        index_structs = self.index_store.index_structs()
+        index_node_ids = (
+            set(index_structs[0].nodes_dict.values())  # type: ignore[attr-defined]
+            if index_structs
+            else set()
+        )
+        return set(self.docstore.docs), index_node_ids
+
+
+def test_persisted_changes_are_read_after_a_restart(tmp_path: Path) -> None:
+    stores = _Stores(tmp_path / "node_store.sqlite")
+    stores.add_node("a")
+    stores.docstore.persist()
+    stores.index_store.persist()
+    stores.kvstore.close()
+
+    assert _Stores(tmp_path / "node_store.sqlite").node_ids() == ({"a"}, {"a"})
+
+
+def test_a_crash_loses_the_changes_not_persisted(tmp_path: Path) -> None:
+    stores = _Stores(tmp_path / "node_store.sqlite")
+    stores.add_node("a")
+    stores.docstore.persist()
+    stores.index_store.persist()
+    stores.add_node("b")
+
+    # Another connection sees what a restart after a crash would see
+    assert _Stores(tmp_path / "node_store.sqlite").node_ids() == ({"a"}, {"a"})
+
+
+def test_the_doc_store_persist_commits_the_index_struct_too(tmp_path: Path) -> None:
+    stores = _Stores(tmp_path / "node_store.sqlite")
+    stores.add_node("a")
+
+    # A crash between the persists of the doc store and of the index store
+    stores.docstore.persist()
+
+    assert _Stores(tmp_path / "node_store.sqlite").node_ids() == ({"a"}, {"a"})
+
+
+def test_deleted_nodes_stay_deleted_after_a_restart(tmp_path: Path) -> None:
+    stores = _Stores(tmp_path / "node_store.sqlite")
+    stores.add_node("a")
+    stores.add_node("b")
+    stores.docstore.delete_document("a")
+    stores.docstore.persist()
+    stores.kvstore.close()
+
+    docstore = _Stores(tmp_path / "node_store.sqlite").docstore
+    assert set(docstore.docs) == {"b"}
@@ -0,0 +1,81 @@
+from pathlib import Path
+
+from llama_index.core.schema import NodeRelationship, RelatedNodeInfo, TextNode
+from llama_index.core.vector_stores.types import MetadataFilter, MetadataFilters
+
+from brainiax.components.sparse_index.bm25_index import BM25Index, tokenize
+
+
+def _node(node_id: str, doc_id: str, text: str, file_name: str = "a.pdf") -> TextNode:
+    return TextNode(
+        id_=node_id,
+        text=text,
+        metadata={"file_name": file_name},
+        relationships={NodeRelationship.SOURCE: RelatedNodeInfo(node_id=doc_id)},
+    )
+
+
+def _ids(results: list[tuple[str, float]]) -> list[str]:
+    return [node_id for node_id, _ in results]
+
+
+def test_a_course_code_matches_any_of_its_spellings() -> None:
+    assert tokenize("CS-101") == tokenize("cs_101") == ["cs101", "cs", "101"]
+    assert "cs101" in tokenize("The CS101 course")
+
+
+def test_the_best_matching_chunks_come_first(tmp_path: Path) -> None:
+    index = BM25Index(tmp_path / "bm25.sqlite")
+    index.add(
+        [
+            _node("n1", "doc1", "Navier-Stokes equations describe viscous fluids"),
+            _node("n2", "doc2", "Fluids and gases are studied in CS-4120"),
+            _node("n3", "doc3", "Linear algebra"),
+        ]
+    )
+
+    assert _ids(index.search("Navier-Stokes", 10)) == ["n1"]
+    assert _ids(index.search("cs4120 fluids", 10)) == ["n2", "n1"]
+    assert index.search("the", 10) == []
+
+
+def test_the_committed_chunks_are_searched_after_a_restart(tmp_path: Path) -> None:
+    index = BM25Index(tmp_path / "bm25.sqlite")
+    index.add([_node("n1", "doc1", "thermodynamics")])
+    index.persist()
+    # Not committed before the restart
+    index.add([_node("n2", "doc2", "thermodynamics entropy")])
+
+    index = BM25Index(tmp_path / "bm25.sqlite")
+
+    assert _ids(index.search("thermodynamics entropy", 10)) == ["n1"]
+
+
+def test_deleted_and_replaced_chunks_are_not_found(tmp_path: Path) -> None:
+    index = BM25Index(tmp_path / "bm25.sqlite")
+    index.add([_node("n1", "doc1", "entropy"), _node("n2", "doc2", "entropy")])
+    index.add([_node("n2", "doc2", "enthalpy")])
+    index.delete(["doc1"])
+    index.persist()
+
+    assert index.search("entropy", 10) == []
+    assert _ids(index.search("enthalpy", 10)) == ["n2"]
+    # The statistics of the scores are the ones of the remaining chunk
+    assert BM25Index(tmp_path / "bm25.sqlite").search("enthalpy", 10) == (
+        index.search("enthalpy", 10)
+    )
+
+
+def test_the_filters_restrict_the_searched_chunks(tmp_path: Path) -> None:
+    index = BM25Index(tmp_path / "bm25.sqlite")
+    index.add(
+        [
+            _node("n1", "doc1", "entropy", file_name="a.pdf"),
+            _node("n2", "doc2", "entropy", file_name="b.pdf"),
+        ]
+    )
+    filters = MetadataFilters(
+        filters=[MetadataFilter(key="file_name", value="b.pdf")]
+    )
+
+    assert _ids(index.search("entropy", 10, filters)) == ["n2"]
@@ -0,0 +1,96 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle, TextNode
+from llama_index.core.storage.docstore import SimpleDocumentStore
+
+from brainiax.components.sparse_index.bm25_index import BM25Index
+from brainiax.components.sparse_index.hybrid_retriever import HybridRetriever
+
+_NODES = {
+    "exact": TextNode(id_="exact", text="The Navier-Stokes equations"),
+    "close": TextNode(id_="close", text="Equations of the motion of fluids"),
+    "far": TextNode(id_="far", text="Fluid dynamics history"),
+}
+
+
+class _VectorRetriever(BaseRetriever):
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        return [
+            NodeWithScore(node=_NODES["close"], score=0.9),
+            NodeWithScore(node=_NODES["exact"], score=0.6),
+            NodeWithScore(node=_NODES["far"], score=0.5),
+        ]
+
+
+def _retriever(
+    tmp_path: Path,
+    alpha: float = 0.5,
+    similarity_cutoff: float | None = None,
+    similarity_top_k: int = 2,
+) -> HybridRetriever:
+    bm25_index = BM25Index(tmp_path / "bm25.sqlite")
+    bm25_index.add(_NODES.values())
+    bm25_index.persist()
+    docstore = SimpleDocumentStore()
+    docstore.add_documents(list(_NODES.values()))
+    return HybridRetriever(
+        vector_retriever=_VectorRetriever(),
+        bm25_index=bm25_index,
+        docstore=docstore,
+        executor=ThreadPoolExecutor(1),
+        similarity_top_k=similarity_top_k,
+        candidates=10,
+        alpha=alpha,
+        similarity_cutoff=similarity_cutoff,
+    )
+
+
+def _ids(nodes: list[NodeWithScore]) -> list[str]:
+    return [node.node_id for node in nodes]
+
+
+def test_the_exact_terms_come_first(tmp_path: Path) -> None:
+    retriever = _retriever(tmp_path)
+
+    assert _ids(retriever.retrieve("Navier-Stokes")) == ["exact", "close"]
+    assert _ids(asyncio.run(retriever.aretrieve("Navier-Stokes"))) == [
+        "exact",
+        "close",
+    ]
+
+
+def test_alpha_weighs_the_vector_search(tmp_path: Path) -> None:
+    assert _ids(_retriever(tmp_path, alpha=1.0).retrieve("Navier-Stokes")) == [
+        "close",
+        "exact",
+    ]
+
+
+def test_a_query_without_indexed_terms_returns_the_vector_results(
+    tmp_path: Path,
+) -> None:
+    results = _retriever(tmp_path).retrieve("the")
+
+    assert [(n.node_id, n.score) for n in results] == [
+        ("close", 0.9),
+        ("exact", 0.6),
+    ]
+
+
+def test_the_cutoff_applies_to_the_vector_similarity(tmp_path: Path) -> None:
+    retriever = _retriever(
+        tmp_path, alpha=0.6, similarity_cutoff=0.7, similarity_top_k=3
+    )
+
+    results = retriever.retrieve("Navier-Stokes")
+
+    # "far" is dropped, "exact" is kept as a keyword result only
+    assert _ids(results) == ["close", "exact"]
+    assert results[1].score == pytest.approx(0.4)
+    without_cutoff = _retriever(tmp_path, alpha=0.6, similarity_top_k=3)
+    assert len(without_cutoff.retrieve("Navier-Stokes")) == 3
@@ -0,0 +1,145 @@
+from pathlib import Path
+
+import pytest
+from llama_index.core.schema import NodeRelationship, RelatedNodeInfo, TextNode
+from llama_index.core.storage import StorageContext
+from llama_index.core.storage.docstore import SimpleDocumentStore
+from llama_index.core.vector_stores.types import VectorStoreQuery
+
+from brainiax.components.ingest.persist_scheduler import (
+    persist_storage_context_atomically,
+    stores_dir,
+)
+from brainiax.settings.settings import HnswlibSettings
+
+pytest.importorskip("hnswlib")
+
+from brainiax.components.vector_store.hnswlib_vector_store import (  # noqa: E402
+    INDEX_FILE_NAME,
+    HnswlibVectorStore,
+)
+
+
+def _node(node_id: str, doc_id: str, embedding: list[float]) -> TextNode:
+    return TextNode(
+        id_=node_id,
+        text=node_id,
+        embedding=embedding,
+        relationships={NodeRelationship.SOURCE: RelatedNodeInfo(node_id=doc_id)},
+    )
+
+
+def _store(path: Path, snapshot_interval: int = 100) -> HnswlibVectorStore:
+    return HnswlibVectorStore(
+        path, HnswlibSettings(initial_capacity=2, snapshot_interval=snapshot_interval)
+    )
+
+
+def _crash(store: HnswlibVectorStore) -> None:
+    # The committed database is kept, the index in memory is lost
+    store._connection.close()
+
+
+def _search(store: HnswlibVectorStore, embedding: list[float]) -> list[str]:
+    result = store.query(
+        VectorStoreQuery(query_embedding=embedding, similarity_top_k=3)
+    )
+    return result.ids or []
+
+
+def test_a_persist_does_not_write_the_index_before_the_interval(
+    tmp_path: Path,
+) -> None:
+    store = _store(tmp_path)
+    store.add([_node("a", "doc1", [1.0, 0.0]), _node("b", "doc2", [0.0, 1.0])])
+    store.persist(str(tmp_path))
+
+    assert not (tmp_path / INDEX_FILE_NAME).exists()
+    store.close()
+    assert (tmp_path / INDEX_FILE_NAME).exists()
+
+
+def test_the_vectors_persisted_without_the_index_are_added_back(
+    tmp_path: Path,
+) -> None:
+    store = _store(tmp_path, snapshot_interval=2)
+    store.add([_node("a", "doc1", [1.0, 0.0]), _node("b", "doc2", [0.0, 1.0])])
+    store.persist(str(tmp_path))
+    # Added after the index was written, and grows it
+    store.add([_node("c", "doc3", [1.0, 1.0])])
+    store.persist(str(tmp_path))
+    _crash(store)
+
+    store = _store(tmp_path, snapshot_interval=2)
+
+    assert _search(store, [1.0, 1.0])[0] == "c"
+    assert sorted(_search(store, [1.0, 0.0])) == ["a", "b", "c"]
+    store.close()
+
+
+def test_the_nodes_deleted_after_the_index_was_written_stay_deleted(
+    tmp_path: Path,
+) -> None:
+    store = _store(tmp_path, snapshot_interval=0)
+    store.add([_node("a", "doc1", [1.0, 0.0]), _node("b", "doc2", [0.0, 1.0])])
+    store.persist(str(tmp_path))
+    store._settings.snapshot_interval = 100
+    store.delete("doc1")
+    store.persist(str(tmp_path))
+    _crash(store)
+
+    store = _store(tmp_path)
+
+    assert _search(store, [1.0, 0.0]) == ["b"]
+    store.close()
+
+
+def test_the_uncommitted_nodes_are_lost_on_a_crash(tmp_path: Path) -> None:
+    store = _store(tmp_path)
+    store.add([_node("a", "doc1", [1.0, 0.0])])
+    store.persist(str(tmp_path))
+    store.add([_node("b", "doc2", [0.0, 1.0])])
+    _crash(store)
+
+    store = _store(tmp_path)
+
+    assert _search(store, [0.0, 1.0]) == ["a"]
+    store.close()
+
+
+def test_the_stores_persisted_after_closing_the_vector_store_are_written(
+    tmp_path: Path,
+) -> None:
+    store = _store(tmp_path / "hnswlib")
+    storage_context = StorageContext.from_defaults(vector_store=store)
+    store.add([_node("a", "doc1", [1.0, 0.0])])
+    storage_context.docstore.add_documents([TextNode(id_="a", text="a")])
+    store.close()
+
+    # As the pending ingestions persisted at interpreter exit
+    persist_storage_context_atomically(storage_context, tmp_path / "stores")
+    store.close()
+
+    docstore = SimpleDocumentStore.from_persist_dir(
+        str(stores_dir(tmp_path / "stores"))
+    )
+    assert docstore.get_document("a", raise_error=False) is not None
+    store = _store(tmp_path / "hnswlib")
+    assert _search(store, [1.0, 0.0]) == ["a"]
+    store.close()
+
+
+def test_a_search_returns_all_the_remaining_nodes_after_deletions(
+    tmp_path: Path,
+) -> None:
+    store = _store(tmp_path)
+    store.add([_node(f"n{i}", f"doc{i}", [1.0, float(i)]) for i in range(8)])
+    for i in range(5):
+        store.delete(f"doc{i}")
+
+    result = store.query(
+        VectorStoreQuery(query_embedding=[1.0, 0.0], similarity_top_k=10)
+    )
+
+    assert sorted(result.ids or []) == ["n5", "n6", "n7"]
+    store.close()
@@ -0,0 +1,51 @@
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+from injector import Injector
+from llama_index.core.embeddings import BaseEmbedding, MockEmbedding
+
+from brainiax.components.embedding.embedding_cache import (
+    CachedEmbedding,
+    EmbeddingCache,
+)
+from brainiax.components.embedding.embedding_component import EmbeddingComponent
+from brainiax.components.index.index_component import IndexComponent
+from brainiax.components.index.retrieval_cache import RetrievalCache
+from brainiax.server.cache.cache_router import cache_stats
+from brainiax.server.chat.chat_service import ChatService
+
+
+def _request(embedding_model: BaseEmbedding) -> Any:
+    # Components holding the caches only, without loading any model or store
+    embedding_component = EmbeddingComponent.__new__(EmbeddingComponent)
+    embedding_component.embedding_model = embedding_model
+    injector = Injector()
+    injector.binder.bind(EmbeddingComponent, to=embedding_component)
+    injector.binder.bind(
+        IndexComponent, to=SimpleNamespace(retrieval_cache=RetrievalCache(10))
+    )
+    injector.binder.bind(ChatService, to=SimpleNamespace(response_cache=None))
+    return SimpleNamespace(state=SimpleNamespace(injector=injector))
+
+
+def test_the_embedding_cache_is_reported(tmp_path: Path) -> None:
+    model = CachedEmbedding(
+        MockEmbedding(embed_dim=4), EmbeddingCache(tmp_path / "cache", 10)
+    )
+    model.get_text_embedding_batch(["a", "b"])
+    model.get_text_embedding_batch(["a"])
+
+    stats = cache_stats(_request(model))
+
+    assert stats.embeddings is not None
+    assert (stats.embeddings.entries, stats.embeddings.hits) == (2, 1)
+    assert stats.embeddings.saved_seconds is None
+    assert stats.retrieval.entries == 0
+    assert stats.responses is None
+
+
+def test_a_disabled_embedding_cache_is_not_reported() -> None:
+    stats = cache_stats(_request(MockEmbedding(embed_dim=4)))
+
+    assert stats.embeddings is None
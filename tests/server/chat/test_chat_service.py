@@ -0,0 +1,93 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+
+from llama_index.core.llms import ChatMessage, MessageRole, MockLLM
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle, TextNode
+from llama_index.core.storage.docstore import SimpleDocumentStore
+
+from brainiax.components.index.retrieval_cache import IndexGeneration
+from brainiax.server.chat.chat_service import ChatService
+
+
+class _Retriever(BaseRetriever):
+    def __init__(self, bundles: list[QueryBundle]) -> None:
+        super().__init__()
+        self._bundles = bundles
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        self._bundles.append(query_bundle)
+        return [NodeWithScore(node=TextNode(id_="n1", text="Brainiax"), score=0.9)]
+
+
+class _EmbeddingComponent:
+    def __init__(self) -> None:
+        self.embedded: list[str] = []
+        self.embedding_model = SimpleNamespace(get_query_embedding=self._embed)
+
+    def _embed(self, query: str) -> list[float]:
+        self.embedded.append(query)
+        return [1.0, float(len(query))]
+
+    async def aembed_query(self, query: str) -> list[float]:
+        return self._embed(query)
+
+
+def _chat_service() -> tuple[ChatService, _EmbeddingComponent, list[QueryBundle]]:
+    settings: Any = SimpleNamespace(
+        llm=SimpleNamespace(
+            response_cache=SimpleNamespace(
+                enabled=True, max_entries=10, ttl=0, similarity_threshold=0.99
+            )
+        ),
+        rag=SimpleNamespace(
+            similarity_top_k=2,
+            similarity_value=None,
+            hybrid=SimpleNamespace(enabled=False),
+        ),
+        vectorstore=SimpleNamespace(default_collection="default"),
+    )
+    bundles: list[QueryBundle] = []
+    index_component: Any = SimpleNamespace(
+        get_retriever=lambda *args, **kwargs: _Retriever(bundles),
+        get_generation=lambda collection: IndexGeneration(),
+        get_storage_context=lambda collection: SimpleNamespace(
+            docstore=SimpleDocumentStore()
+        ),
+    )
+    embedding_component = _EmbeddingComponent()
+    service = ChatService(
+        settings,
+        SimpleNamespace(llm=MockLLM()),  # type: ignore[arg-type]
+        SimpleNamespace(),  # type: ignore[arg-type]
+        index_component,
+        embedding_component,  # type: ignore[arg-type]
+    )
+    return service, embedding_component, bundles
+
+
+def _messages() -> list[ChatMessage]:
+    return [ChatMessage(content="What is Brainiax?", role=MessageRole.USER)]
+
+
+def test_an_async_chat_embeds_the_message_once() -> None:
+    service, embedding_component, bundles = _chat_service()
+
+    asyncio.run(service.achat(_messages(), use_context=True))
+
+    assert embedding_component.embedded == ["What is Brainiax?"]
+    assert [bundle.embedding for bundle in bundles] == [[1.0, 17.0]]
+
+
+def test_a_chat_embeds_the_message_once() -> None:
+    service, embedding_component, bundles = _chat_service()
+
+    first = service.chat(_messages(), use_context=True)
+    second = service.chat(_messages(), use_context=True)
+
+    assert embedding_component.embedded == ["What is Brainiax?"] * 2
+    assert [bundle.embedding for bundle in bundles] == [[1.0, 17.0]] * 2
+    assert second.response == first.response
+    assert service.response_cache is not None
+    assert service.response_cache.hits == 1
@@ -0,0 +1,104 @@
+import pytest
+
+from brainiax.server.chat import response_cache
+from brainiax.server.chat.response_cache import ResponseCache, ResponseCacheQuery
+
+
+def _cache(
+    max_entries: int = 10, ttl: float = 0, similarity_threshold: float = 0.95
+) -> ResponseCache:
+    return ResponseCache(max_entries, ttl, similarity_threshold)
+
+
+def _query(
+    embedding: list[float],
+    key: str = "key",
+    collection: str | None = "collection",
+    generation: int = 0,
+) -> ResponseCacheQuery:
+    return ResponseCacheQuery(key, embedding, collection, generation)
+
+
+def test_a_paraphrase_above_the_threshold_is_answered_from_the_cache() -> None:
+    cache = _cache()
+    cache.put(_query([1.0, 0.0]), "Entropy is disorder", None, latency=2.0)
+
+    cached = cache.get(_query([1.0, 0.1]))
+
+    assert cached is not None and cached.response == "Entropy is disorder"
+    assert cache.get(_query([1.0, 1.0])) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["saved_seconds"] == 2.0
+
+
+def test_a_different_key_is_not_answered_from_the_cache() -> None:
+    cache = _cache()
+    cache.put(_query([1.0, 0.0], key="prompt"), "response", None, latency=1.0)
+
+    assert cache.get(_query([1.0, 0.0], key="other prompt")) is None
+
+
+def test_a_new_generation_evicts_the_responses_of_its_collection() -> None:
+    cache = _cache()
+    cache.put(_query([1.0, 0.0]), "old", None, latency=1.0)
+    cache.put(_query([0.0, 1.0], collection="other"), "other", None, latency=1.0)
+
+    assert cache.get(_query([1.0, 0.0], generation=1)) is None
+    assert cache.get(_query([0.0, 1.0], collection="other")) is not None
+    assert cache.stats()["entries"] == 1
+
+
+def test_a_response_generated_from_an_outdated_context_is_not_cached() -> None:
+    cache = _cache()
+    cache.get(_query([1.0, 0.0], generation=1))
+
+    cache.put(_query([1.0, 0.0], generation=0), "outdated", None, latency=1.0)
+
+    assert cache.stats()["entries"] == 0
+
+
+def test_the_expired_responses_are_evicted(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [100.0]
+    monkeypatch.setattr(response_cache.time, "monotonic", lambda: now[0])
+    cache = _cache(ttl=10)
+    cache.put(_query([1.0, 0.0]), "response", None, latency=1.0)
+
+    now[0] += 5
+    assert cache.get(_query([1.0, 0.0])) is not None
+    now[0] += 6
+    assert cache.get(_query([1.0, 0.0])) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_the_least_recently_used_responses_are_evicted() -> None:
+    cache = _cache(max_entries=2)
+    cache.put(_query([1.0, 0.0]), "first", None, latency=1.0)
+    cache.put(_query([0.0, 1.0]), "second", None, latency=1.0)
+    assert cache.get(_query([1.0, 0.0])) is not None
+
+    cache.put(_query([-1.0, 0.0]), "third", None, latency=1.0)
+
+    assert cache.get(_query([0.0, 1.0])) is None
+    assert cache.get(_query([1.0, 0.0])) is not None
+    assert cache.get(_query([-1.0, 0.0])) is not None
+
+
+def test_the_evictions_keep_the_keys_consistent(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    now = [100.0]
+    monkeypatch.setattr(response_cache.time, "monotonic", lambda: now[0])
+    cache = _cache(max_entries=3, ttl=10)
+    for i in range(4):
+        # The first one is evicted by LRU
+        cache.put(_query([1.0, 0.0], key=f"key{i}"), f"{i}", None, latency=1.0)
+    cache.put(_query([1.0, 0.0], collection=None), "no context", None, latency=1.0)
+
+    assert cache.get(_query([1.0, 0.0], key="key3", generation=1)) is None
+    now[0] += 11
+    assert cache.get(_query([1.0, 0.0], collection=None)) is None
+    assert cache.stats()["entries"] == 0
+    cache.put(_query([1.0, 0.0], key="key3", generation=1), "new", None, latency=1.0)
+    cached = cache.get(_query([1.0, 0.0], key="key3", generation=1))
+    assert cached is not None and cached.response == "new"
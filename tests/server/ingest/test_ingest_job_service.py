@@ -0,0 +1,113 @@
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from brainiax.components.ingest.ingest_component import IngestProgressCallback
+from brainiax.components.ingest.persist_scheduler import PersistScheduler
+from brainiax.server.ingest import ingest_job_service
+from brainiax.server.ingest.ingest_job_service import IngestJob, IngestJobService
+from brainiax.server.ingest.model import IngestedDoc
+
+
+class _IngestService:
+    """Indexes one document per file, persisted by a real `PersistScheduler`."""
+
+    def __init__(self, interval: float) -> None:
+        self.persist_error: Exception | None = None
+        self.scheduler = PersistScheduler(
+            self._persist, threading.RLock(), interval, max_pending_operations=10
+        )
+
+    def _persist(self) -> None:
+        if self.persist_error is not None:
+            raise self.persist_error
+
+    def ingest_file(
+        self,
+        file_name: str,
+        file_data: Path,
+        progress: IngestProgressCallback,
+        collection: str | None = None,
+    ) -> list[IngestedDoc]:
+        progress("parsed", 1)
+        progress("indexed", 1)
+        self.scheduler.mark_dirty(
+            on_persisted=lambda error: progress(
+                "persisted" if error is None else "persist_failed", 1
+            )
+        )
+        return [IngestedDoc(object="ingest.document", doc_id="1", doc_metadata={})]
+
+
+@pytest.fixture(autouse=True)
+def _jobs_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(ingest_job_service, "local_data_path", tmp_path)
+
+
+def _job_service(ingest_service: _IngestService) -> IngestJobService:
+    settings: Any = SimpleNamespace(embedding=SimpleNamespace(job_workers=1))
+    return IngestJobService(settings, ingest_service)  # type: ignore[arg-type]
+
+
+def _wait_for(service: IngestJobService, job_id: str, status: str) -> IngestJob:
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        job = service.get_job(job_id)
+        if job.status == status:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job is {service.get_job(job_id).status}, not {status}")
+
+
+def test_the_job_completes_once_persisted() -> None:
+    ingest_service = _IngestService(interval=60)
+    service = _job_service(ingest_service)
+
+    job = service.submit_text("a.txt", "text")
+    _wait_for(service, job.job_id, "indexed")
+    ingest_service.scheduler.flush()
+
+    _wait_for(service, job.job_id, "completed")
+    events = [event.event for event in service.stream_events(job.job_id)]
+    assert events[-2:] == ["persisted", "completed"]
+
+
+def test_the_job_fails_when_the_grouped_persist_fails() -> None:
+    ingest_service = _IngestService(interval=60)
+    service = _job_service(ingest_service)
+
+    job = service.submit_text("a.txt", "text")
+    _wait_for(service, job.job_id, "indexed")
+    ingest_service.persist_error = OSError("disk full")
+    with pytest.raises(OSError):
+        ingest_service.scheduler.flush()
+
+    failed_job = _wait_for(service, job.job_id, "failed")
+    assert failed_job.error is not None
+    # The stream of events terminates
+    events = [event.event for event in service.stream_events(job.job_id)]
+    assert events[-2:] == ["persist_failed", "failed"]
+
+
+def test_without_periodic_persist_the_job_is_persisted_right_away() -> None:
+    ingest_service = _IngestService(interval=0)
+    service = _job_service(ingest_service)
+
+    job = service.submit_text("a.txt", "text")
+
+    _wait_for(service, job.job_id, "completed")
+
+
+def test_without_periodic_persist_a_failed_persist_fails_the_job() -> None:
+    ingest_service = _IngestService(interval=0)
+    ingest_service.persist_error = OSError("disk full")
+    service = _job_service(ingest_service)
+
+    job = service.submit_text("a.txt", "text")
+
+    failed_job = _wait_for(service, job.job_id, "failed")
+    assert failed_job.error == "OSError: disk full"
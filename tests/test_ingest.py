@@ -0,0 +1,143 @@
+import hashlib
+import os
+from pathlib import Path
+
+import pytest
+
+from brainiax.ingest import IngestManifest, LocalIngestWorker
+from brainiax.server.ingest.model import IngestedDoc
+
+
+class _IngestService:
+    """Ingests a document per file, identified by the hash of its content.
+
+    Like the real service, a file whose content is already ingested is not
+    ingested again, and the files listed in `failing` are skipped.
+    """
+
+    def __init__(self) -> None:
+        self.docs: dict[str, str] = {}
+        self.calls: list[str] = []
+        self.failing: set[str] = set()
+        self.error: Exception | None = None
+
+    def bulk_ingest(
+        self, files: list[tuple[str, Path]], collection: str | None = None
+    ) -> list[IngestedDoc]:
+        if self.error is not None:
+            raise self.error
+        ingested_docs = []
+        for file_name, file_path in files:
+            if file_name in self.failing:
+                continue
+            doc_id = hashlib.sha256(file_path.read_bytes()).hexdigest()[:8]
+            if doc_id not in self.docs:
+                self.calls.append(f"ingest {file_name}")
+                self.docs[doc_id] = file_name
+            ingested_docs.append(
+                IngestedDoc(
+                    object="ingest.document",
+                    doc_id=doc_id,
+                    doc_metadata={"file_name": file_name},
+                )
+            )
+        return ingested_docs
+
+    def bulk_delete(
+        self, doc_ids: list[str], collection: str | None = None
+    ) -> list[str]:
+        self.calls.append(f"delete {sorted(doc_ids)}")
+        for doc_id in doc_ids:
+            del self.docs[doc_id]
+        return doc_ids
+
+    def flush(self, collection: str | None = None) -> None:
+        pass
+
+
+@pytest.fixture()
+def folder(tmp_path: Path) -> Path:
+    folder = tmp_path / "folder"
+    folder.mkdir()
+    (folder / "a.txt").write_text("a")
+    (folder / "b.txt").write_text("b")
+    return folder
+
+
+def _worker(folder: Path, ingest_service: _IngestService) -> LocalIngestWorker:
+    manifest = IngestManifest(folder.parent / "manifest.json", folder)
+    return LocalIngestWorker(
+        ingest_service,  # type: ignore[arg-type]
+        folder,
+        manifest,
+        batch_size=10,
+        ignored=[],
+    )
+
+
+def _touch(path: Path) -> None:
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_only_the_new_and_modified_files_are_ingested(folder: Path) -> None:
+    ingest_service = _IngestService()
+    assert _worker(folder, ingest_service).ingest_folder() == 2
+
+    # A restart resumes from the manifest
+    assert _worker(folder, ingest_service).ingest_folder() == 0
+    assert ingest_service.calls == ["ingest a.txt", "ingest b.txt"]
+
+
+def test_a_touched_file_keeps_its_documents(folder: Path) -> None:
+    ingest_service = _IngestService()
+    _worker(folder, ingest_service).ingest_folder()
+    ingest_service.calls.clear()
+
+    _touch(folder / "a.txt")
+    assert _worker(folder, ingest_service).ingest_folder() == 1
+
+    assert ingest_service.calls == []
+    assert sorted(ingest_service.docs.values()) == ["a.txt", "b.txt"]
+
+
+def test_a_modified_file_replaces_its_documents_once_ingested(folder: Path) -> None:
+    ingest_service = _IngestService()
+    _worker(folder, ingest_service).ingest_folder()
+    [old_doc_id] = [k for k, v in ingest_service.docs.items() if v == "a.txt"]
+    ingest_service.calls.clear()
+
+    (folder / "a.txt").write_text("a, modified")
+    _touch(folder / "a.txt")
+    _worker(folder, ingest_service).ingest_folder()
+
+    assert ingest_service.calls == ["ingest a.txt", f"delete {[old_doc_id]}"]
+    assert sorted(ingest_service.docs.values()) == ["a.txt", "b.txt"]
+
+
+def test_a_failed_ingestion_keeps_the_previous_version(folder: Path) -> None:
+    ingest_service = _IngestService()
+    _worker(folder, ingest_service).ingest_folder()
+    docs = dict(ingest_service.docs)
+
+    (folder / "a.txt").write_text("a, modified")
+    _touch(folder / "a.txt")
+    ingest_service.error = OSError("disk full")
+    with pytest.raises(OSError):
+        _worker(folder, ingest_service).ingest_folder()
+    ingest_service.error = None
+    ingest_service.failing = {"a.txt"}
+    _worker(folder, ingest_service).ingest_folder()
+
+    assert ingest_service.docs == docs
+
+
+def test_a_file_without_documents_is_retried(folder: Path) -> None:
+    ingest_service = _IngestService()
+    ingest_service.failing = {"a.txt"}
+    _worker(folder, ingest_service).ingest_folder()
+    assert list(ingest_service.docs.values()) == ["b.txt"]
+
+    ingest_service.failing = set()
+    assert _worker(folder, ingest_service).ingest_folder() == 1
+    assert sorted(ingest_service.docs.values()) == ["a.txt", "b.txt"]
@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from injector import Injector
+
+from brainiax.components.embedding.embedding_component import EmbeddingComponent
+from brainiax.components.llm.llm_component import LLMComponent
+from brainiax.components.vector_store.vector_store_component import (
+    VectorStoreComponent,
+)
+from brainiax.launcher import create_app
+from brainiax.server.ingest.ingest_job_service import IngestJobService
+from brainiax.server.ingest.ingest_service import IngestService
+from brainiax.settings.settings import Settings
+
+
+def test_the_pending_ingestions_are_persisted_before_the_vector_stores_close() -> None:
+    calls: list[str] = []
+
+    async def aclose() -> None:
+        calls.append("close the vector stores")
+
+    injector = Injector()
+    injector.binder.bind(
+        Settings,
+        to=SimpleNamespace(
+            server=SimpleNamespace(cors=SimpleNamespace(enabled=False)),
+            ui=SimpleNamespace(enabled=False),
+        ),
+    )
+    injector.binder.bind(LLMComponent, to=SimpleNamespace())
+    injector.binder.bind(EmbeddingComponent, to=SimpleNamespace())
+    injector.binder.bind(IngestJobService, to=SimpleNamespace())
+    injector.binder.bind(VectorStoreComponent, to=SimpleNamespace(aclose=aclose))
+    injector.binder.bind(
+        IngestService,
+        to=SimpleNamespace(close=lambda: calls.append("persist the ingestions")),
+    )
+
+    with TestClient(create_app(injector)):
+        pass
+
+    assert calls == ["persist the ingestions", "close the vector stores"]
@@ -0,0 +1,68 @@
+import sys
+from pathlib import Path
+
+import pytest
+from llama_index.core.schema import TextNode
+from llama_index.core.storage import StorageContext
+
+from brainiax import migrate_node_store
+from brainiax.components.ingest.persist_scheduler import (
+    persist_storage_context_atomically,
+)
+from brainiax.components.node_store import node_store_component
+from brainiax.components.node_store.node_store_component import (
+    SQLITE_NODE_STORE_FILE_NAME,
+)
+from brainiax.components.node_store.sqlite_store import (
+    SQLiteDocumentStore,
+    SQLiteKVStore,
+)
+
+
+@pytest.fixture()
+def local_data(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setattr(node_store_component, "local_data_path", tmp_path)
+    for persist_dir, text in [
+        (tmp_path, "default"),
+        (tmp_path / "collections" / "team_a", "a"),
+        (tmp_path / "collections" / "team_b", "b"),
+    ]:
+        storage_context = StorageContext.from_defaults()
+        storage_context.docstore.add_documents([TextNode(text=text, id_=text)])
+        persist_storage_context_atomically(storage_context, persist_dir)
+    return tmp_path
+
+
+def _migrate(monkeypatch: pytest.MonkeyPatch, *args: str) -> None:
+    monkeypatch.setattr(sys, "argv", ["migrate_node_store", *args])
+    migrate_node_store.main()
+
+
+def _node_ids(persist_dir: Path) -> list[str]:
+    kvstore = SQLiteKVStore(persist_dir / SQLITE_NODE_STORE_FILE_NAME)
+    try:
+        return list(SQLiteDocumentStore(kvstore).docs)
+    finally:
+        kvstore.close()
+
+
+def test_every_collection_is_migrated(
+    local_data: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    _migrate(monkeypatch)
+
+    assert _node_ids(local_data) == ["default"]
+    assert _node_ids(local_data / "collections" / "team_a") == ["a"]
+    assert _node_ids(local_data / "collections" / "team_b") == ["b"]
+
+
+def test_a_single_collection_can_be_migrated(
+    local_data: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    _migrate(monkeypatch, "--collection", "team_a")
+
+    assert _node_ids(local_data / "collections" / "team_a") == ["a"]
+    assert not (local_data / SQLITE_NODE_STORE_FILE_NAME).exists()
+    assert not (
+        local_data / "collections" / "team_b" / SQLITE_NODE_STORE_FILE_NAME
+    ).exists()